@@ -0,0 +1,205 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+from aligner.alignment_engine import auto_align, refine_alignment_with_anchors, sort_anchors
+
+
+# AI cues per chunk; big enough that pickling a chunk costs far less than aligning it.
+CHUNK_CUES = 5000
+# AI cues each text-mode window extends into its neighbours, where the two paths must meet.
+CHUNK_OVERLAP = 200
+
+Pairs = List[Tuple[int, int]]
+
+
+def _align_window(ai: SubtitleTrack, human: SubtitleTrack, align_options: Dict) -> Pairs:
+    """Worker entry point; module level so process pools can pickle it."""
+    return auto_align(ai, human, **align_options)
+
+
+def _align_anchored(ai: SubtitleTrack, human: SubtitleTrack, anchors: Pairs, align_options: Dict) -> Pairs:
+    return refine_alignment_with_anchors(ai, human, anchors, **align_options)
+
+
+def _open_pool(executor: Union[str, Executor], workers: int) -> Tuple[Executor, bool]:
+    if isinstance(executor, Executor):
+        return executor, False
+    if executor == "process":
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=workers), True
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers), True
+    raise ValueError(f"Unknown executor: {executor}")
+
+
+def _quiet_cuts(track: SubtitleTrack, every: int, window: int) -> List[int]:
+    """
+    Cue positions near each multiple of every where the track is cut: the start of
+    the cue after the longest silence within +-window cues of the multiple.
+    """
+    n = len(track)
+    cuts = []
+    for target in range(every, n - every // 2, every):
+        lo, hi = max(target - window, 1), min(target + window, n - 1)
+        gaps = track.start_ms[lo:hi + 1] - track.end_ms[lo - 1:hi]
+        cut = lo + int(np.argmax(gaps))
+        if not cuts or cut > cuts[-1]:
+            cuts.append(cut)
+    return cuts
+
+
+def _anchored_chunks(anchors: Pairs, n_ai: int, n_human: int, chunk_cues: int) -> List[Tuple[int, int, int, int]]:
+    """(ai_lo, ai_hi, human_lo, human_hi) spans cut at anchors about chunk_cues AI cues apart; neighbours share the anchor."""
+    bounds = [(0, 0)]
+    for ai_idx, human_idx in anchors:
+        if ai_idx - bounds[-1][0] >= chunk_cues and n_ai - ai_idx >= chunk_cues // 2:
+            bounds.append((ai_idx, human_idx))
+    bounds.append((n_ai - 1, n_human - 1))
+    return [(a0, a1 + 1, h0, h1 + 1) for (a0, h0), (a1, h1) in zip(bounds, bounds[1:])]
+
+
+def _meeting_point(left: Pairs, right: Pairs, lo: int, hi: int, cut: int) -> Optional[Tuple[int, int]]:
+    """
+    The pair nearest cut at which the two paths can be joined: both contain it, and
+    they agree on every pair in the half of AI rows [lo, hi) centred on it.
+    """
+    ours = [p for p in left if lo <= p[0] < hi]
+    theirs = [p for p in right if lo <= p[0] < hi]
+    shared = set(ours) & set(theirs)
+    reach = (hi - lo) // 4
+    for p in sorted(shared, key=lambda p: (abs(p[0] - cut), p)):
+        a, b = max(p[0] - reach, lo), min(p[0] + reach, hi - 1)
+        if [q for q in ours if a <= q[0] <= b] == [q for q in theirs if a <= q[0] <= b]:
+            return p
+    return None
+
+
+def align_parallel(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Sequence[SubtitleEvent],
+    anchors: Optional[Sequence[Tuple[int, int]]] = None,
+    workers: Optional[int] = None,
+    executor: Union[str, Executor] = "process",
+    chunk_cues: int = CHUNK_CUES,
+    overlap: int = CHUNK_OVERLAP,
+    **align_options,
+) -> Pairs:
+    """
+    auto_align (or refine_alignment_with_anchors, with anchors) of one long pair of
+    tracks, using workers of a "process" (default) or "thread" pool, or an existing
+    Executor, which is left running. Only anchored and text-mode alignments are
+    split into chunks; timing mode without anchors runs the serial alignment and
+    only scores the drift search on threads.
+
+    With anchors, both tracks are cut at anchors about chunk_cues AI cues apart; the
+    segments between anchors are independent, so each chunk is aligned on its own
+    and the result is the serial alignment.
+
+    In text mode the AI track is cut about every chunk_cues cues at the longest
+    silence nearby, and each chunk is aligned in a window reaching overlap cues into
+    its neighbours, with the human cues along the same stretch of the proportional
+    diagonal. Neighbouring windows are stitched at the pair nearest the cut where
+    both paths agree over half the overlap; where they do not agree anywhere the
+    two chunks are merged and aligned again. This is an approximation: windows only
+    see their own stretch of the diagonal, so where long runs of cues are missing
+    on one side, or the texts are too noisy to agree on, the result can differ from
+    the serial alignment. Use auto_align where the exact serial result matters.
+
+    In timing mode, the global drift search dominates and cannot be split without
+    changing its result, so its candidate scales are scored on a thread pool instead
+    (see estimate_drift) and the cheap interval matching runs as usual; the result
+    is the serial alignment.
+    """
+    ai, human = as_track(ai_events), as_track(human_events)
+    workers = workers or os.cpu_count() or 1
+    mode = align_options.get("mode", "timing")
+    if anchors:
+        ordered = sort_anchors(anchors)
+        for ai_idx, human_idx in ordered:
+            if not (0 <= ai_idx < len(ai) and 0 <= human_idx < len(human)):
+                raise ValueError(f"Anchor ({ai_idx}, {human_idx}) is out of range")
+    if not len(ai) or not len(human):
+        return []
+    if not anchors and mode == "text" and len(ai) < 2 * chunk_cues:
+        return auto_align(ai, human, **align_options)
+    if not anchors and mode != "text":
+        if isinstance(executor, ThreadPoolExecutor):
+            return auto_align(ai, human, executor=executor, **align_options)
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            return auto_align(ai, human, executor=threads, **align_options)
+
+    pool, owned = _open_pool(executor, workers)
+    try:
+        if anchors:
+            return _run_anchored(pool, ai, human, ordered, chunk_cues, align_options)
+        return _run_windows(pool, ai, human, chunk_cues, min(overlap, chunk_cues // 4), align_options)
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def _run_anchored(pool: Executor, ai: SubtitleTrack, human: SubtitleTrack, anchors: Pairs,
+                  chunk_cues: int, align_options: Dict) -> Pairs:
+    chunks = _anchored_chunks(anchors, len(ai), len(human), chunk_cues)
+    futures = [
+        pool.submit(_align_anchored, ai[a0:a1], human[h0:h1],
+                    [(a - a0, h - h0) for a, h in anchors if a0 <= a < a1], align_options)
+        for a0, a1, h0, h1 in chunks
+    ]
+    result: Pairs = []
+    for k, ((a0, _, h0, _), future) in enumerate(zip(chunks, futures)):
+        pairs = [(a + a0, h + h0) for a, h in future.result()]
+        # A chunk after the first starts with the anchor that ended the one before it
+        result += pairs[1:] if k else pairs
+    return result
+
+
+def _run_windows(pool: Executor, ai: SubtitleTrack, human: SubtitleTrack,
+                 chunk_cues: int, overlap: int, align_options: Dict) -> Pairs:
+    n, m = len(ai), len(human)
+    bounds = [0] + _quiet_cuts(ai, chunk_cues, overlap // 2) + [n]
+    spans = list(zip(bounds, bounds[1:]))
+    ratio = (m - 1) / max(n - 1, 1)
+    done: Dict[Tuple[int, int], Pairs] = {}
+
+    def window(lo: int, hi: int) -> Tuple[int, int, int, int]:
+        # The window's diagonal is the stretch of the whole pair's diagonal, which the
+        # serial band follows too
+        a0, a1 = max(lo - overlap, 0), min(hi + overlap, n)
+        h0 = 0 if a0 == 0 else int(round(a0 * ratio))
+        h1 = m if a1 == n else int(round((a1 - 1) * ratio)) + 1
+        return a0, a1, h0, h1
+
+    while True:
+        futures = {}
+        for span in spans:
+            if span not in done:
+                a0, a1, h0, h1 = window(*span)
+                futures[span] = (a0, h0, pool.submit(_align_window, ai[a0:a1], human[h0:h1], align_options))
+        for span, (a0, h0, future) in futures.items():
+            done[span] = [(a + a0, h + h0) for a, h in future.result()]
+        # Stitch at a pair both neighbouring paths contain; merge the chunks where there is none
+        meets, merged = [], [spans[0]]
+        for previous, span in zip(spans, spans[1:]):
+            cut = span[0]
+            meet = _meeting_point(done[previous], done[span], cut - overlap, cut + overlap, cut)
+            if meet is None:
+                merged[-1] = (merged[-1][0], span[1])
+            else:
+                meets.append(meet)
+                merged.append(span)
+        if len(merged) == len(spans):
+            break
+        spans = merged
+
+    result: Pairs = []
+    for k, span in enumerate(spans):
+        lo = meets[k - 1] if k else (-1, -1)
+        hi = meets[k] if k < len(meets) else (n, m)
+        result += [p for p in done[span] if lo < p <= hi]
+    return result
@@ -1,45 +1,513 @@
+import json
 import os
-from typing import List, Dict, Tuple
-from parser.subtitle_parser import load_subtitles
-from aligner.alignment_engine import auto_align, refine_alignment_with_anchors
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from parser.subtitle_parser import PathOrFile
+from parser.subtitle_track import SubtitleTrack, load_track
+from aligner.alignment_engine import ReferenceIndex, auto_align, refine_alignment_with_anchors
 from generator.output_generator import generate_retimed_subtitles
+from generator.timing_normalizer import TimingPolicy
+
+
+# How often the batch loop checks running pairs against their time limit (seconds).
+_POLL_INTERVAL = 0.25
+# Extra time a worker gets to interrupt itself before the pair is abandoned (seconds).
+_TIMEOUT_GRACE = 1.0
+
+
+@dataclass
+class PairResult:
+    """Outcome and diagnostics of one AI/human pair."""
+    ai_path: str
+    human_path: str
+    output_path: str
+    status: str = "ok"  # "ok", "error" or "timeout"
+    error_type: Optional[str] = None
+    error_message: Optional[str] = None
+    ai_cues: int = 0
+    human_cues: int = 0
+    matched: int = 0  # alignment pairs written
+    unmatched_ai: int = 0
+    unmatched_human: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage
+    normalized: Dict[str, int] = field(default_factory=dict)  # cues changed per normalization rule
+    index: Optional[int] = None  # position in the batch input
+    cached: bool = False  # taken from the batch manifest instead of being re-run
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def fail(self, exc: BaseException) -> "PairResult":
+        self.status = "timeout" if isinstance(exc, TimeoutError) else "error"
+        self.error_type = type(exc).__name__
+        self.error_message = str(exc)
+        return self
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _describe(path: PathOrFile) -> str:
+    if isinstance(path, (str, os.PathLike)):
+        return os.fspath(path)
+    return str(getattr(path, "name", repr(path)))
+
+
+def _load(path: PathOrFile, cache_dir: Optional[str]) -> SubtitleTrack:
+    if not cache_dir:
+        return load_track(path)
+    # The cache modules (sqlite3, zipfile) are only imported by runs that use them
+    from parser.track_cache import load_track_cached
+    return load_track_cached(path, cache_dir=cache_dir)
+
+
+def run_pair(
+    ai_path: PathOrFile,
+    human_path: PathOrFile,
+    output_path: PathOrFile,
+    anchors: List[Tuple[int,int]] = None,
+    align_options: Optional[Dict] = None,
+    normalize: Union[bool, Dict, None] = None,
+    cache_dir: Optional[str] = None,
+    reference: Optional[ReferenceIndex] = None,
+    align_workers: Optional[int] = None,
+) -> PairResult:
+    """
+    Same steps as process_pair, but return a PairResult with cue and match counts,
+    the wall time of each stage (parse, align, write) and the error if one occurred.
+    align_options are passed on to the aligner (e.g. {"mode": "text"}). normalize
+    (True for the defaults, or TimingPolicy fields as a dict) cleans up the output
+    timings before writing. With cache_dir, inputs are loaded through the parsed-track
+    cache in that directory (see parser.track_cache.TrackCache). A prepared reference
+    is used as the human track instead of loading human_path, which then only names
+    it in the result. With align_workers > 1 the pair itself is aligned on that many
+    workers (see aligner.parallel_alignment.align_parallel: anchored and text-mode
+    alignments are chunked, the latter approximately; timing mode only threads the
+    drift search).
+    """
+    align_options = align_options or {}
+    result = PairResult(_describe(ai_path), _describe(human_path), _describe(output_path))
+    stage = time.perf_counter()
+
+    def lap(name: str) -> None:
+        nonlocal stage
+        now = time.perf_counter()
+        result.timings[name] = now - stage
+        stage = now
+
+    try:
+        ai_events = _load(ai_path, cache_dir)
+        human_events = reference.track if reference is not None else _load(human_path, cache_dir)
+        result.ai_cues, result.human_cues = len(ai_events), len(human_events)
+        lap("parse")
+        if align_workers and align_workers > 1:
+            from aligner.parallel_alignment import align_parallel
+            alignment = align_parallel(
+                ai_events, human_events, anchors, workers=align_workers, **align_options,
+            )
+        elif anchors:
+            alignment = refine_alignment_with_anchors(ai_events, human_events, anchors, **align_options)
+        else:
+            alignment = auto_align(ai_events, reference or human_events, **align_options)
+        result.matched = len(alignment)
+        result.unmatched_ai = result.ai_cues - len({ai for ai, _ in alignment})
+        result.unmatched_human = result.human_cues - len({human for _, human in alignment})
+        lap("align")
+        if isinstance(output_path, (str, os.PathLike)):
+            out_dir = os.path.dirname(output_path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+        policy = None
+        if normalize:
+            policy = TimingPolicy(**normalize) if isinstance(normalize, dict) else TimingPolicy()
+        result.normalized = generate_retimed_subtitles(
+            ai_events, human_events, alignment, output_path, normalize=policy,
+        )
+        lap("write")
+    except Exception as exc:
+        lap("failed")
+        result.fail(exc)
+    return result
 
 
 def process_pair(
-    ai_path: str,
-    human_path: str,
-    output_path: str,
+    ai_path: PathOrFile,
+    human_path: PathOrFile,
+    output_path: PathOrFile,
     anchors: List[Tuple[int,int]] = None
 ) -> bool:
     """
-    1. Load ai_events = load_subtitles(ai_path)
-    2. Load human_events = load_subtitles(human_path)
+    1. Load ai_events = load_track(ai_path)
+    2. Load human_events = load_track(human_path)
     3. If anchors provided: alignment = refine_alignment_with_anchors(...)
        else: alignment = auto_align(...)
     4. Call generate_retimed_subtitles(ai_events, human_events, alignment, output_path)
     5. Return True on success, False on any exception.
+
+    Each of the paths may also be an open file object (e.g. a pipe), in which case
+    cues are parsed and written as a stream and no output directory is created.
+    Use run_pair to find out what failed and how long each stage took.
+    """
+    return run_pair(ai_path, human_path, output_path, anchors).ok
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Raise TimeoutError in the current thread after `seconds` (POSIX main thread only)."""
+    usable = (
+        seconds is not None and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not usable:
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise TimeoutError(f"Pair exceeded its {seconds}s time limit")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _config_result(cfg: Dict) -> PairResult:
+    return PairResult(_describe(cfg["ai_path"]), _describe(cfg["human_path"]), _describe(cfg["output_path"]))
+
+
+# Set in process pool workers by _init_worker: where they report each pair they start.
+_START_QUEUE = None
+
+
+def _init_worker(start_queue) -> None:
+    global _START_QUEUE
+    _START_QUEUE = start_queue
+
+
+# Fan-out references this process loaded from files (see process_batch), oldest first.
+_SHARED_REFERENCES: Dict[str, ReferenceIndex] = {}
+_MAX_SHARED_REFERENCES = 4
+
+
+def _shared_reference(path: str) -> ReferenceIndex:
+    """The ReferenceIndex pickled to path, loaded once per process so its drift spectra carry over between pairs."""
+    reference = _SHARED_REFERENCES.pop(path, None)
+    if reference is None:
+        import pickle
+        with open(path, "rb") as f:
+            reference = pickle.load(f)
+        while len(_SHARED_REFERENCES) >= _MAX_SHARED_REFERENCES:
+            del _SHARED_REFERENCES[next(iter(_SHARED_REFERENCES))]
+    _SHARED_REFERENCES[path] = reference
+    return reference
+
+
+def _run_config(cfg: Dict, timeout: Optional[float] = None, tag: Optional[Tuple[int, int]] = None) -> PairResult:
+    """Worker entry point: run one batch config; module level so process pools can pickle it."""
+    if tag is not None and _START_QUEUE is not None:
+        _START_QUEUE.put((tag, os.getpid()))
+    try:
+        reference = cfg.get("reference")
+        if "reference_file" in cfg:
+            reference = _shared_reference(cfg["reference_file"])
+        with _time_limit(timeout):
+            return run_pair(
+                cfg["ai_path"], cfg["human_path"], cfg["output_path"],
+                cfg.get("anchors"), cfg.get("align_options"), cfg.get("normalize"), cfg.get("cache_dir"),
+                reference, cfg.get("align_workers"),
+            )
+    except TimeoutError as exc:
+        return _config_result(cfg).fail(exc)
+
+
+def fanout_configs(cfg: Dict) -> List[Dict]:
+    """
+    Pair configs of a fan-out config {"human_path": ..., "targets": [{"ai_path": ...,
+    "output_path": ...}, ...]}: every target is paired with the one human file and
+    inherits the other keys of cfg (anchors, align_options, ...) unless it sets them.
+    """
+    shared = {key: value for key, value in cfg.items() if key != "targets"}
+    return [{**shared, **target} for target in cfg["targets"]]
+
+
+def _prepare_reference(cfg: Dict) -> ReferenceIndex:
+    reference = ReferenceIndex(_load(cfg["human_path"], cfg.get("cache_dir")))
+    if any((pair.get("align_options") or {}).get("mode") == "text" for pair in fanout_configs(cfg)):
+        reference.features  # computed once here rather than in every worker
+    return reference
+
+
+def process_batch(
+    configs: Iterable[Dict],
+    workers: int = 1,
+    executor: Union[str, Executor] = "process",
+    max_in_flight: Optional[int] = None,
+    timeout: Optional[float] = None,
+    report_path: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> List[PairResult]:
+    """
+    Given a list of configs, each { "ai_path": str, "human_path": str, "output_path": str }
+    (and optionally "anchors", "align_options", "normalize" and "align_workers"), run each pair and return
+    a PairResult per config, in input order. Results are truthy on success, so they can still be used
+    as booleans.
+
+    A config may instead be a fan-out of one human reference to many AI tracks,
+    {"human_path": str, "targets": [{"ai_path": str, "output_path": str, ...}, ...]}
+    (see fanout_configs); it contributes one result per target, in order. The
+    reference is parsed and indexed (ReferenceIndex) once, before its targets are
+    submitted, and the targets then run in parallel like any other pairs. Threads
+    share the one ReferenceIndex; for process workers it is written to a temporary
+    file once, and each worker loads it on its first target and keeps it (with the
+    drift spectra it computes) for the rest, rather than receiving a copy per pair.
+
+    With workers > 1 the pairs run on a "process" (default) or "thread" pool; an existing
+    Executor may be passed instead and is left running. At most max_in_flight pairs
+    (default 2 * workers) are submitted at a time, so configs may be a lazy iterable and
+    memory stays flat. A pair running longer than timeout seconds counts as a timeout:
+    process and serial workers are interrupted with SIGALRM, threads are abandoned.
+    Pools created here are also watched from this process, from the moment a worker
+    starts a pair: a process worker stuck past the limit (e.g. in a long C call) is
+    killed and the pool replaced, and once every thread is held by an abandoned pair
+    the queued pairs move to a new thread pool. In a passed-in thread pool whose
+    threads are all held that way, the remaining pairs time out instead.
+
+    If report_path is given, every result is appended to it as a JSON line as soon as
+    the pair finishes. If manifest_path is given, pairs whose inputs, anchors, options
+    and output are unchanged since a successful earlier run are skipped and their stored
+    result is returned with cached=True (see batch.manifest.BatchManifest).
+
+    With cache_dir (or a "cache_dir" per config), workers load inputs through the
+    shared parsed-track cache in that directory, so a reference used by many pairs
+    or runs is parsed once.
     """
+    report = open(report_path, "a", encoding="utf-8") if report_path else None
+    manifest = None
+    if manifest_path:
+        from batch.manifest import BatchManifest
+        manifest = BatchManifest(manifest_path)
+    results: List[Optional[PairResult]] = []
+    keys: Dict[int, str] = {}
+    in_process = (workers <= 1 and isinstance(executor, str)) or executor == "thread" \
+        or isinstance(executor, ThreadPoolExecutor)
+    share_dir: Optional[str] = None
+
+    def share(reference: ReferenceIndex, idx: int) -> Dict:
+        nonlocal share_dir
+        if in_process:
+            return {"reference": reference}
+        import pickle
+        import tempfile
+        if share_dir is None:
+            share_dir = tempfile.mkdtemp(prefix="subtitle-aligner-")
+        path = os.path.join(share_dir, f"reference{idx}.pickle")
+        with open(path, "wb") as f:
+            pickle.dump(reference, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return {"reference_file": path}
+
+    def record(idx: int, result: PairResult) -> None:
+        result.index = idx
+        results[idx] = result
+        key = keys.pop(idx, None)
+        if key is not None:
+            manifest.record(key, result.to_dict())
+        if report is not None:
+            report.write(json.dumps(result.to_dict()) + "\n")
+            report.flush()
+
+    def todo() -> Iterator[Tuple[int, Dict]]:
+        for cfg in configs:
+            if cache_dir and "cache_dir" not in cfg:
+                cfg = {**cfg, "cache_dir": cache_dir}
+            reference = failure = None
+            shared: Dict = {}
+            for pair in fanout_configs(cfg) if "targets" in cfg else [cfg]:
+                idx = len(results)
+                results.append(None)
+                key = manifest.pair_key(pair) if manifest is not None else None
+                if key is not None:
+                    stored = manifest.lookup(key)
+                    if stored is not None:
+                        record(idx, replace(PairResult(**stored), cached=True))
+                        continue
+                    keys[idx] = key
+                if "targets" in cfg and reference is None and failure is None:
+                    # Prepared lazily, so a fan-out whose targets are all unchanged skips it
+                    try:
+                        reference = _prepare_reference(cfg)
+                        shared = share(reference, idx)
+                    except Exception as exc:
+                        failure = exc
+                if failure is not None:
+                    record(idx, _config_result(pair).fail(failure))
+                    continue
+                yield idx, {**pair, **shared}
+
     try:
-        ai_events = load_subtitles(ai_path)
-        human_events = load_subtitles(human_path)
-        if anchors:
-            alignment = refine_alignment_with_anchors(ai_events, human_events, anchors)
+        if workers <= 1 and isinstance(executor, str):
+            for idx, cfg in todo():
+                record(idx, _run_config(cfg, timeout))
         else:
-            alignment = auto_align(ai_events, human_events)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        generate_retimed_subtitles(ai_events, human_events, alignment, output_path)
-        return True
-    except Exception:
-        return False
+            _run_parallel(todo(), workers, executor, max_in_flight, timeout, record)
+        return results
+    finally:
+        if report is not None:
+            report.close()
+        if manifest is not None:
+            manifest.close()
+        if share_dir is not None:
+            import shutil
+            shutil.rmtree(share_dir, ignore_errors=True)
 
 
-def process_batch(configs: List[Dict]) -> List[bool]:
+def run_fanout(human_path: PathOrFile, targets: Sequence[Dict], **batch_options) -> List[PairResult]:
     """
-    Given a list of configs, each { "ai_path": str, "human_path": str, "output_path": str },
-    call process_pair for each and return a list of booleans indicating success/failure.
+    Align every target {"ai_path", "output_path", ...} against one human reference,
+    preparing the reference once; batch_options are passed on to process_batch
+    (workers, executor, cache_dir, ...). Returns one PairResult per target.
     """
-    results = []
-    for cfg in configs:
-        result = process_pair(cfg["ai_path"], cfg["human_path"], cfg["output_path"])
-        results.append(result)
-    return results
+    return process_batch([{"human_path": human_path, "targets": list(targets)}], **batch_options)
+
+
+def _run_parallel(
+    jobs: Iterator[Tuple[int, Dict]],
+    workers: int,
+    executor: Union[str, Executor],
+    max_in_flight: Optional[int],
+    timeout: Optional[float],
+    record: Callable[[int, PairResult], None],
+) -> None:
+    owned = not isinstance(executor, Executor)
+    if owned and executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor: {executor}")
+    start_queue = None
+    if owned and executor == "process" and timeout:
+        # A process pool marks a future running as soon as it is queued for a worker, so
+        # workers report when they really start a pair (and their pid, to be killed).
+        import multiprocessing
+        start_queue = multiprocessing.Queue()
+
+    def open_pool() -> Executor:
+        if executor == "thread":
+            return ThreadPoolExecutor(max_workers=workers)
+        # Imported here: the process pool machinery (multiprocessing) is slow to import
+        # and the CLI should start quickly for single pairs.
+        from concurrent.futures import ProcessPoolExecutor
+        if start_queue is None:
+            return ProcessPoolExecutor(max_workers=workers)
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(start_queue,))
+
+    pool = open_pool() if owned else executor
+    threads = isinstance(pool, ThreadPoolExecutor)
+    slots = workers if owned else getattr(pool, "_max_workers", workers)
+    watchdog = bool(timeout) and (threads or start_queue is not None)
+    limit = max_in_flight or 2 * max(workers, 1)
+
+    pending: Dict[Future, Tuple[int, Dict]] = {}
+    started: Dict[Future, float] = {}
+    pids: Dict[Future, int] = {}
+    tags: Dict[Tuple[int, int], Future] = {}
+    generation = 0  # bumped whenever the pool is replaced
+    born: Dict[Future, int] = {}  # generation of the pool a pending future runs on
+    stuck = 0  # abandoned threads still holding a slot of the current pool
+    starved = False  # a passed-in thread pool with every slot stuck
+    abandoned = False
+    exhausted = False
+
+    def expire(idx: int, cfg: Dict, reason: str = "exceeded its") -> None:
+        record(idx, _config_result(cfg).fail(TimeoutError(f"Pair {reason} {timeout}s time limit")))
+
+    def submit(job: Tuple[int, Dict]) -> None:
+        tag = (generation, job[0]) if start_queue is not None else None
+        fut = pool.submit(_run_config, job[1], timeout, tag)
+        pending[fut], born[fut] = job, generation
+        if tag is not None:
+            tags[tag] = fut
+
+    def take(fut: Future) -> Tuple[int, Dict]:
+        started.pop(fut, None)
+        pids.pop(fut, None)
+        born.pop(fut)
+        return pending.pop(fut)
+
+    def replace_pool(rerun: List[Future]) -> None:
+        # rerun: futures of the old pool that have not finished and run again on the new one
+        nonlocal pool, generation, stuck
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool, generation, stuck = open_pool(), generation + 1, 0
+        for fut in rerun:
+            submit(take(fut))
+
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < limit:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                elif starved:
+                    expire(*job, reason="found no free worker within its")
+                else:
+                    submit(job)
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=_POLL_INTERVAL if watchdog else None, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx, cfg = take(fut)
+                try:
+                    record(idx, fut.result())
+                except Exception as exc:
+                    record(idx, _config_result(cfg).fail(exc))
+            if not watchdog:
+                continue
+            now = time.monotonic()
+            if start_queue is not None:
+                while not start_queue.empty():
+                    tag, pid = start_queue.get()
+                    fut = tags.pop(tag, None)
+                    if fut in pending:
+                        started[fut], pids[fut] = now, pid
+            else:
+                for fut in pending:
+                    if fut.running():
+                        started.setdefault(fut, now)
+            for fut in [f for f, t in started.items() if now - t > timeout + _TIMEOUT_GRACE]:
+                if fut not in pending:
+                    continue  # already run again on a new pool
+                # The worker did not stop by itself; give up waiting for it.
+                pid, stuck_here = pids.get(fut), born[fut] == generation
+                expire(*take(fut))
+                abandoned = True
+                if not threads:
+                    # Reap the process; that breaks the pool, so the pairs left on it run again
+                    os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+                    replace_pool([f for f in pending if born[f] == generation])
+                    continue
+                stuck += stuck_here
+                if stuck >= slots:
+                    # Every thread is held by an abandoned pair, so queued pairs would never start
+                    queued = [f for f in pending if f not in started and f.cancel()]
+                    if owned:
+                        replace_pool(queued)
+                    else:
+                        starved = True
+                        for f in queued:
+                            expire(*take(f), reason="found no free worker within its")
+    finally:
+        if owned:
+            pool.shutdown(wait=not abandoned, cancel_futures=True)
+        if start_queue is not None:
+            start_queue.close()
+            start_queue.cancel_join_thread()
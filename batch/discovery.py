@@ -0,0 +1,221 @@
+import bisect
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from parser.subtitle_parser import _parse_timing_line
+
+
+SUBTITLE_EXTENSIONS = (".srt", ".vtt")
+# Bytes read from the start of a file to estimate its cue count, and from the end to find its last timing line.
+_HEAD_BYTES = 65536
+_TAIL_BYTES = 8192
+
+# Release/language/source tags dropped from stems before matching, e.g. "show.s01e02.en.ai".
+_TAG_RE = re.compile(
+    r"[\[(][^\])]*[\])]|\b(?:ai|asr|auto|human|ref|reference|en|eng|english|sdh|cc|forced|"
+    r"\d{3,4}p|web(?:-?dl|rip)?|bluray|hdtv|x26[45]|h ?26[45])\b"
+)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_EPISODE_RE = re.compile(
+    r"(?:\bs(?P<season>\d{1,3})[ ._-]*e(?P<episode>\d{1,4})"
+    r"|\b(?P<season2>\d{1,2})x(?P<episode2>\d{2,3})\b"
+    r"|\b(?:ep|episode|e)[ ._-]*(?P<episode3>\d{1,4})\b)"
+)
+
+
+def _clean(text: str) -> str:
+    text = _TAG_RE.sub(" ", text.replace("_", " ").replace(".", " "))
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def normalized_stem(path: str) -> str:
+    """File name without extension, tags and punctuation, e.g. "Show.S01E02.en.ai" -> "show s01e02"."""
+    stem = os.path.basename(path).lower()
+    while True:
+        stem, ext = os.path.splitext(stem)
+        if ext not in SUBTITLE_EXTENSIONS and ext not in (".gz", ".bz2", ".xz", ".zst"):
+            stem += ext
+            break
+    return _clean(stem)
+
+
+def episode_key(path: str) -> Optional[str]:
+    """
+    Series and season/episode of a file name as "show s01e02" ("show e02" without a
+    season), or None. The series is the normalized part of the name before the
+    episode number, so files of different shows never share a key.
+    """
+    name = os.path.basename(path).lower().replace("_", " ")
+    match = _EPISODE_RE.search(name)
+    if match is None:
+        return None
+    season = match["season"] or match["season2"]
+    episode = match["episode"] or match["episode2"] or match["episode3"]
+    number = f"s{int(season):02d}e{int(episode):02d}" if season else f"e{int(episode):02d}"
+    return " ".join(filter(None, (_clean(name[:match.start()]), number)))
+
+
+def quick_fingerprint(path: str) -> Tuple[int, int]:
+    """
+    (cue count, end of the last cue in ms) from two partial reads. Timing arrows are
+    counted in the first _HEAD_BYTES and scaled by the file size (exact for files that
+    fit), and only the last timing line, read from the tail, is parsed.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(_HEAD_BYTES)
+        cues = head.count(b"-->")
+        if size > len(head):
+            cues = round(cues * size / len(head))
+        f.seek(max(size - _TAIL_BYTES, 0))
+        tail = f.read().decode("utf-8", "replace")
+    for line in reversed(tail.splitlines()):
+        if "-->" in line:
+            try:
+                return cues, _parse_timing_line(line)[1]
+            except ValueError:
+                continue
+    return cues, 0
+
+
+def _scan_dir(path: str, extensions: Tuple[str, ...]) -> Tuple[List[str], List[str]]:
+    files, dirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.name.lower().endswith(extensions) and entry.is_file():
+                files.append(entry.path)
+    files.sort()
+    return files, dirs
+
+
+def iter_subtitle_files(
+    roots: Sequence[str],
+    extensions: Tuple[str, ...] = SUBTITLE_EXTENSIONS,
+    workers: int = 8,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Walk several directory trees at once, yielding (root position, file path) as
+    directories are listed. Directories are scanned with os.scandir on a thread pool,
+    so slow (network) file systems are listed in parallel, but listings are consumed
+    in the order they were requested, so the output order is deterministic.
+    """
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        pending: Deque[Tuple[Future, int]] = deque(
+            (pool.submit(_scan_dir, root, extensions), i) for i, root in enumerate(roots)
+        )
+        while pending:
+            future, which = pending.popleft()
+            files, dirs = future.result()
+            for sub in sorted(dirs):
+                pending.append((pool.submit(_scan_dir, sub, extensions), which))
+            for path in files:
+                yield which, path
+
+
+# Nearest candidates (by last cue end) considered for each leftover AI file.
+_FINGERPRINT_NEIGHBOURS = 3
+
+
+def _match_fingerprints(
+    ai_paths: List[str], human_paths: List[str], tolerance_ms: int, workers: int,
+) -> List[Tuple[str, str]]:
+    """Pair leftovers whose last cue ends within tolerance_ms, closest first, one to one."""
+    if not ai_paths or not human_paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        ai_prints = list(pool.map(quick_fingerprint, ai_paths))
+        human_prints = sorted(zip(pool.map(quick_fingerprint, human_paths), range(len(human_paths))))
+    human_ends = [end for (_, end), _ in human_prints]
+    candidates = []
+    for i, (ai_cues, ai_end) in enumerate(ai_prints):
+        at = bisect.bisect_left(human_ends, ai_end)
+        lo, hi = max(at - _FINGERPRINT_NEIGHBOURS, 0), at + _FINGERPRINT_NEIGHBOURS
+        for (human_cues, human_end), j in human_prints[lo:hi]:
+            diff = abs(ai_end - human_end)
+            if diff <= tolerance_ms and ai_cues and human_cues and 0.5 <= ai_cues / human_cues <= 2:
+                candidates.append((diff, abs(ai_cues - human_cues), i, j))
+    candidates.sort()
+    used_ai, used_human, pairs = set(), set(), []
+    for _, _, i, j in candidates:
+        if i not in used_ai and j not in used_human:
+            used_ai.add(i)
+            used_human.add(j)
+            pairs.append((ai_paths[i], human_paths[j]))
+    return pairs
+
+
+def discover_pairs(
+    ai_root: str,
+    human_root: str,
+    output_root: str,
+    output_ext: Optional[str] = None,
+    fingerprint: bool = True,
+    tolerance_ms: int = 5000,
+    workers: int = 8,
+    unmatched: Optional[List[str]] = None,
+) -> Iterator[Dict]:
+    """
+    Scan ai_root and human_root and yield process_batch configs as pairs are found, so
+    a batch can start while the trees are still being listed.
+
+    Files with the same normalized stem pair up as soon as both sides have been seen
+    (first come, first paired, in the scanner's deterministic order). After the scan,
+    the remaining files pair up by episode key (series plus S01E02, 1x02 or E02)
+    where that key belongs to exactly one remaining file on each side, and then by
+    quick_fingerprint: the last cue ends within tolerance_ms and the cue counts are
+    within a factor of two; the pairs of both steps come sorted by AI path. Outputs
+    mirror the AI file's place under ai_root in output_root (with output_ext if given).
+    Each config records how it was matched under "match"; paths left unpaired are
+    appended to unmatched if a list is given.
+    """
+    def config(ai_path: str, human_path: str, how: str) -> Dict:
+        rel = os.path.relpath(ai_path, ai_root)
+        if output_ext:
+            rel = os.path.splitext(rel)[0] + output_ext
+        return {
+            "ai_path": ai_path,
+            "human_path": human_path,
+            "output_path": os.path.join(output_root, rel),
+            "match": how,
+        }
+
+    # Per side: unpaired files in scan order, and those per stem in scan order.
+    waiting: Tuple[Dict[str, None], Dict[str, None]] = ({}, {})
+    by_stem: Tuple[Dict[str, Deque[str]], Dict[str, Deque[str]]] = ({}, {})
+
+    for side, path in iter_subtitle_files([ai_root, human_root], workers=workers):
+        other = 1 - side
+        stem = normalized_stem(path)
+        queue = by_stem[other].get(stem)
+        if not queue:
+            waiting[side][path] = None
+            by_stem[side].setdefault(stem, deque()).append(path)
+            continue
+        partner = queue.popleft()
+        del waiting[other][partner]
+        yield config(path, partner, "stem") if side == 0 else config(partner, path, "stem")
+
+    # Episode keys only pair files whose key is unique among the leftovers of both sides
+    keys = [{path: episode_key(path) for path in side} for side in waiting]
+    counts = [Counter(key for key in side.values() if key is not None) for side in keys]
+    human_by_key = {key: path for path, key in keys[1].items() if key is not None}
+    episode_pairs = sorted(
+        (ai_path, human_by_key[key]) for ai_path, key in keys[0].items()
+        if key is not None and counts[0][key] == 1 and counts[1][key] == 1
+    )
+    for ai_path, human_path in episode_pairs:
+        del waiting[0][ai_path], waiting[1][human_path]
+        yield config(ai_path, human_path, "episode")
+
+    leftovers = [list(waiting[0]), list(waiting[1])]
+    pairs = sorted(_match_fingerprints(*leftovers, tolerance_ms, workers)) if fingerprint else []
+    for ai_path, human_path in pairs:
+        yield config(ai_path, human_path, "fingerprint")
+    if unmatched is not None:
+        paired = {p for pair in pairs for p in pair}
+        unmatched.extend(p for side in leftovers for p in side if p not in paired)
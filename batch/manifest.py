@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from parser.track_cache import DIGEST_TABLE, cached_digest, prune_digests
+
+
+# Bump when a change to parsing/alignment/output makes earlier results stale.
+MANIFEST_VERSION = 2
+
+_SCHEMA = DIGEST_TABLE + """
+CREATE TABLE IF NOT EXISTS pairs (
+    key TEXT PRIMARY KEY, output_path TEXT, status TEXT, result TEXT, updated REAL
+);
+"""
+
+
+class BatchManifest:
+    """
+    SQLite journal of finished pairs, keyed by the content hashes of the AI and human
+    files plus the output path, anchors and aligner options of the pair.
+
+    File hashes are remembered by (path, mtime, size) as in the parsed-track cache (see
+    parser.track_cache.cached_digest), so unchanged inputs are not even re-read on the
+    next run. Results are committed as each pair finishes, so an
+    interrupted batch resumes where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+        prune_digests(self._db)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "BatchManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def digest(self, path: str) -> str:
+        return cached_digest(self._db, path)
+
+    def pair_key(self, cfg: Dict) -> Optional[str]:
+        """Key for a batch config, or None if its inputs are not plain files."""
+        paths = (cfg["ai_path"], cfg["human_path"], cfg["output_path"])
+        if not all(isinstance(p, (str, os.PathLike)) for p in paths):
+            return None
+        try:
+            ai_digest, human_digest = self.digest(paths[0]), self.digest(paths[1])
+        except OSError:
+            return None
+        material = json.dumps({
+            "version": MANIFEST_VERSION,
+            "ai": ai_digest,
+            "human": human_digest,
+            "output": os.path.abspath(paths[2]),
+            "anchors": sorted(map(list, cfg.get("anchors") or [])),
+            "align_options": cfg.get("align_options") or {},
+            "normalize": cfg.get("normalize") or None,
+        }, sort_keys=True)
+        return hashlib.blake2b(material.encode("utf-8"), digest_size=20).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Stored result of a successful earlier run whose output still exists."""
+        row = self._db.execute(
+            "SELECT output_path, result FROM pairs WHERE key = ? AND status = 'ok'", (key,)
+        ).fetchone()
+        if not row or not os.path.exists(row[0]):
+            return None
+        return json.loads(row[1])
+
+    def record(self, key: str, result: Dict) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?, ?)",
+                (key, result["output_path"], result["status"], json.dumps(result), time.time()),
+            )
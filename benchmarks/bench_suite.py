@@ -0,0 +1,200 @@
+"""End-to-end benchmark suite on synthetic pairs from benchmarks/synthetic.py.
+
+Times loading (parsing and parsed-track cache hits), saving, auto alignment (timing
+and text modes, serial and chunked over --workers processes), retimed output and a process_batch run at each size, checks
+alignment accuracy against the generator's true alignment, and writes everything as
+JSON so runs can be compared over time.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000,1000000] [--output FILE]
+    python benchmarks/bench_suite.py --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from aligner.alignment_engine import auto_align
+from aligner.parallel_alignment import align_parallel
+from batch.batch_processor import process_batch
+from generator.output_generator import generate_retimed_subtitles
+from parser.subtitle_parser import load_subtitles, save_subtitles
+from parser.subtitle_track import load_track
+from parser.track_cache import TrackCache
+from synthetic import generate_pair, write_pair
+
+RESULTS_FORMAT = 1
+DEFAULT_SIZES = "1000,10000,100000"
+# Text alignment is quadratic-ish in the band width; skip it above this size.
+TEXT_MODE_MAX = 100_000
+# Cues per pair in the process_batch case; the pair count scales with the size.
+BATCH_PAIR_CUES = 2000
+
+
+def _time(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _accuracy(found: List, truth: List) -> Dict[str, float]:
+    found_set, truth_set = set(found), set(truth)
+    hits = len(found_set & truth_set)
+    return {
+        "precision": round(hits / max(len(found_set), 1), 4),
+        "recall": round(hits / max(len(truth_set), 1), 4),
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_size(n: int, repeat: int, workdir: str, seed: int, workers: int) -> List[Dict]:
+    """All cases at one size; each result has case, cues, times_s, best_s, median_s, cues_per_s."""
+    results = []
+
+    def record(case: str, times: List[float], cues: int, **extra) -> None:
+        best = min(times)
+        results.append({
+            "case": case,
+            "size": n,
+            "cues": cues,
+            "times_s": [round(t, 6) for t in times],
+            "best_s": round(best, 6),
+            "median_s": round(statistics.median(times), 6),
+            "cues_per_s": round(cues / best) if best > 0 else None,
+            **extra,
+        })
+        print(f"{case:24s} {n:>9,d}  {best * 1e3:10.1f} ms  {cues / best if best else 0:12,.0f} cues/s", flush=True)
+
+    ai, human, truth = generate_pair(n, seed)
+    ai_path, human_path = write_pair(workdir, n, seed, name=f"pair{n}")
+    out_path = os.path.join(workdir, f"out{n}.srt")
+    cues = len(ai) + len(human)
+
+    record("load_subtitles", _time(lambda: (load_subtitles(ai_path), load_subtitles(human_path)), repeat), cues)
+    record("load_track", _time(lambda: (load_track(ai_path), load_track(human_path)), repeat), cues)
+    cache = TrackCache(os.path.join(workdir, "track-cache"))
+    cache.load(ai_path), cache.load(human_path)
+    record("load_track_cached", _time(lambda: (cache.load(ai_path), cache.load(human_path)), repeat), cues)
+    record("save_subtitles", _time(lambda: save_subtitles(ai, out_path), repeat), len(ai))
+
+    pairs: List = []
+
+    def align() -> None:
+        pairs[:] = auto_align(ai, human)
+    record("auto_align", _time(align, repeat), cues, **_accuracy(pairs, truth))
+    if n <= TEXT_MODE_MAX:
+        text_pairs: List = []
+
+        def align_text() -> None:
+            text_pairs[:] = auto_align(ai, human, mode="text")
+        record("auto_align_text", _time(align_text, repeat), cues, **_accuracy(text_pairs, truth))
+        chunked: List = []
+
+        def align_text_chunked() -> None:
+            chunked[:] = align_parallel(ai, human, mode="text", workers=workers)
+        record("auto_align_text_chunked", _time(align_text_chunked, repeat), cues,
+               workers=workers, same_as_serial=chunked == text_pairs, **_accuracy(chunked, truth))
+
+    record("generate_retimed", _time(lambda: generate_retimed_subtitles(ai, human, pairs, out_path), repeat), len(ai))
+
+    n_pairs = max(n // BATCH_PAIR_CUES, 1)
+    batch_dir = os.path.join(workdir, f"batch{n}")
+    configs = []
+    for i in range(n_pairs):
+        a, h = write_pair(batch_dir, min(n, BATCH_PAIR_CUES), seed + i, name=f"p{i}")
+        configs.append({"ai_path": a, "human_path": h, "output_path": os.path.join(batch_dir, f"p{i}.out.srt")})
+    ok: List = []
+
+    def batch() -> None:
+        ok[:] = process_batch(configs, workers=workers)
+    record("process_batch", _time(batch, repeat), n_pairs * min(n, BATCH_PAIR_CUES) * 2,
+           pairs=n_pairs, workers=workers, failed=sum(not r for r in ok))
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> int:
+    """Print best-time ratios against a baseline; returns the number of cases slower than threshold."""
+    base = {(r["case"], r["size"]): r for r in baseline["results"]}
+    slower = 0
+    print(f"\n{'case':24s} {'size':>9s}  {'baseline':>10s}  {'current':>10s}  ratio")
+    for r in current["results"]:
+        b = base.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        slower += bool(flag)
+        print(f"{r['case']:24s} {r['size']:>9,d}  {b['best_s'] * 1e3:8.1f}ms  {r['best_s'] * 1e3:8.1f}ms  {ratio:5.2f}x{flag}")
+    return slower
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated human cue counts")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 4))
+    ap.add_argument("--output", help="results JSON (default benchmarks/results/<commit>-<time>.json)")
+    ap.add_argument("--compare", metavar="BASELINE", help="results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="ratio above which a case counts as slower")
+    args = ap.parse_args()
+
+    sizes = [int(s.replace("_", "")) for s in args.sizes.split(",") if s]
+    run = {"format": RESULTS_FORMAT, "environment": environment(), "seed": args.seed,
+           "repeat": args.repeat, "results": []}
+    with tempfile.TemporaryDirectory(prefix="subtitle-bench-") as workdir:
+        for n in sizes:
+            run["results"].extend(run_size(n, args.repeat, workdir, args.seed, args.workers))
+
+    output = args.output
+    if output is None:
+        env = run["environment"]
+        output = str(ROOT / "benchmarks" / "results" / f"{env['commit'] or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=1)
+        f.write("\n")
+    print(f"results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return 1 if compare(run, json.load(f), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Microbenchmark: timestamp parsing/formatting, legacy implementation vs the fast path.
+
+Run from the repository root:  python benchmarks/bench_timestamps.py [--lines N]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from parser.subtitle_parser import _format_ms, _parse_timing_line
+from parser.subtitle_track import parse_timing_lines
+
+
+def legacy_parse_timestamp(ts: str) -> float:
+    ts = ts.replace(',', '.')
+    hms, ms = ts.split('.') if '.' in ts else (ts, '0')
+    h, m, s = [int(x) for x in hms.split(':')]
+    return h * 3600 + m * 60 + s + int(ms) / (1000 if len(ms) > 2 else 1)
+
+
+def legacy_parse_line(line: str):
+    parts = line.split('-->')
+    if len(parts) != 2:
+        raise ValueError(f"Invalid timestamp line: {line}")
+    start_ts, end_ts = [t.strip() for t in parts]
+    return legacy_parse_timestamp(start_ts), legacy_parse_timestamp(end_ts)
+
+
+def legacy_format_timestamp(seconds: float, as_vtt: bool = False) -> str:
+    ms = int(round((seconds - int(seconds)) * 1000))
+    h = int(seconds) // 3600
+    m = (int(seconds) % 3600) // 60
+    s = int(seconds) % 60
+    sep = '.' if as_vtt else ','
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    starts = sorted(rng.randrange(0, 12 * 3600 * 1000) for _ in range(args.lines))
+    lines = [f"{_format_ms(s)} --> {_format_ms(s + rng.randrange(500, 5000))}" for s in starts]
+    seconds = [s / 1000 for s in starts]
+
+    cases = [
+        ("parse  legacy", lambda: [legacy_parse_line(line) for line in lines]),
+        ("parse  fast", lambda: [_parse_timing_line(line) for line in lines]),
+        ("parse  bulk", lambda: parse_timing_lines(lines)),
+        ("format legacy", lambda: [legacy_format_timestamp(t) for t in seconds]),
+        ("format fast", lambda: [_format_ms(ms) for ms in starts]),
+    ]
+    timings = {}
+    for name, fn in cases:
+        timings[name] = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:14s} {timings[name] * 1e3:8.1f} ms  ({timings[name] / args.lines * 1e9:6.0f} ns/item)")
+    print(f"parse speedup  {timings['parse  legacy'] / timings['parse  fast']:.2f}x per line, "
+          f"{timings['parse  legacy'] / timings['parse  bulk']:.2f}x bulk")
+    print(f"format speedup {timings['format legacy'] / timings['format fast']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
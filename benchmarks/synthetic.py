@@ -0,0 +1,159 @@
+"""Seeded synthetic AI/human subtitle pairs for benchmarks.
+
+The human track is the reference. The AI track is derived from it cue by cue: most
+cues are kept, some are split in two, merged with the next one, dropped, or joined
+by an extra AI-only line. Its timings are then scaled (drift), shifted (offset) and
+jittered, and a share of its texts get character noise. The generator also returns
+the true alignment, so benchmarks can report accuracy as well as speed.
+
+    python benchmarks/synthetic.py 100000 /tmp/pair --seed 1
+"""
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from parser.subtitle_parser import save_subtitles
+from parser.subtitle_track import SubtitleTrack
+
+
+_WORDS = (
+    "the a you I to it and what is that of in we this be me on have for no not are do "
+    "your he know with was all just go right here can get yes there they out okay like "
+    "one come so up about him now but well how see want think she look why back her "
+    "time let good who something tell then take from never need sorry maybe really "
+    "night going nothing where thank please still over again people mean home away"
+).split()
+
+
+@dataclass
+class PairSpec:
+    """Knobs of generate_pair; rates are per human cue."""
+    offset_ms: int = 2500
+    scale: float = 1.001  # AI timeline runs this much slower (e.g. frame-rate drift)
+    jitter_ms: float = 80.0
+    split_rate: float = 0.04
+    merge_rate: float = 0.04
+    drop_rate: float = 0.02
+    extra_rate: float = 0.01
+    noise_rate: float = 0.2  # share of AI texts with character noise
+    noise_chars: float = 0.08  # share of characters replaced in a noisy text
+
+
+def _texts(rng: np.random.Generator, n: int) -> List[str]:
+    counts = rng.integers(2, 11, n)
+    words = np.array(_WORDS)[rng.integers(0, len(_WORDS), int(counts.sum()))].tolist()
+    bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+    texts = [" ".join(words[a:b]) for a, b in zip(bounds, bounds[1:])]
+    # Long cues get a line break at the space nearest the middle, as real subtitles do
+    return [t if len(t) < 40 else _break_line(t) for t in texts]
+
+
+def _break_line(text: str) -> str:
+    at = text.find(" ", len(text) // 2)
+    return text[:at] + "\n" + text[at + 1:] if at > 0 else text
+
+
+def _noisy(rng: np.random.Generator, text: str, share: float) -> str:
+    chars = np.array(list(text))
+    hit = rng.random(len(chars)) < share
+    chars[hit] = np.array(list("abcdefghijklmnopqrstuvwxyz"))[rng.integers(0, 26, int(hit.sum()))]
+    return "".join(chars.tolist())
+
+
+def generate_pair(n_cues: int, seed: int = 0, spec: PairSpec = PairSpec()) -> Tuple[SubtitleTrack, SubtitleTrack, List[Tuple[int, int]]]:
+    """Return (ai, human, truth) with about n_cues human cues; truth lists (ai, human) pairs."""
+    rng = np.random.default_rng(seed)
+    durations = rng.integers(800, 4500, n_cues)
+    gaps = rng.integers(40, 1800, n_cues)
+    h_start = np.cumsum(gaps + np.concatenate(([0], durations[:-1])))
+    h_end = h_start + durations
+    h_texts = _texts(rng, n_cues)
+    human = SubtitleTrack.from_texts(h_start, h_end, h_texts)
+
+    ops = rng.choice(5, n_cues, p=[
+        1 - spec.split_rate - spec.merge_rate - spec.drop_rate - spec.extra_rate,
+        spec.split_rate, spec.merge_rate, spec.drop_rate, spec.extra_rate,
+    ]).tolist()
+    starts: List[int] = []
+    ends: List[int] = []
+    texts: List[str] = []
+    truth: List[Tuple[int, int]] = []
+    h_start_l, h_end_l = h_start.tolist(), h_end.tolist()
+
+    def emit(start: int, end: int, text: str, *human_rows: int) -> None:
+        for row in human_rows:
+            truth.append((len(texts), row))
+        starts.append(start)
+        ends.append(end)
+        texts.append(text)
+
+    i = 0
+    while i < n_cues:
+        op, s, e, text = ops[i], h_start_l[i], h_end_l[i], h_texts[i]
+        if op == 1 and " " in text:  # split
+            words = text.replace("\n", " ").split(" ")
+            mid = s + (e - s) * (len(words) // 2) // len(words)
+            emit(s, mid, " ".join(words[:len(words) // 2]), i)
+            emit(mid, e, " ".join(words[len(words) // 2:]), i)
+        elif op == 2 and i + 1 < n_cues:  # merge with the next cue
+            emit(s, h_end_l[i + 1], text.replace("\n", " ") + "\n" + h_texts[i + 1].replace("\n", " "), i, i + 1)
+            i += 1
+        elif op == 3:  # missing from the AI track
+            pass
+        else:
+            emit(s, e, text, i)
+            if op == 4:  # extra AI-only line in the gap that follows
+                gap_end = h_start_l[i + 1] if i + 1 < n_cues else e + 2000
+                if gap_end - e > 400:
+                    starts.append(e + 100)
+                    ends.append(gap_end - 100)
+                    texts.append(" ".join(rng.choice(_WORDS, 3).tolist()))
+        i += 1
+
+    n_ai = len(texts)
+    jitter = rng.normal(0, spec.jitter_ms, (2, n_ai))
+    a_start = np.rint(np.asarray(starts) * spec.scale + spec.offset_ms + jitter[0]).astype(np.int64)
+    a_end = np.rint(np.asarray(ends) * spec.scale + spec.offset_ms + jitter[1]).astype(np.int64)
+    a_start = np.maximum(a_start, 0)
+    a_end = np.maximum(a_end, a_start + 200)
+    noisy = np.flatnonzero(rng.random(n_ai) < spec.noise_rate).tolist()
+    for k in noisy:
+        texts[k] = _noisy(rng, texts[k], spec.noise_chars)
+    ai = SubtitleTrack.from_texts(a_start, a_end, texts)
+    truth.sort()
+    return ai, human, truth
+
+
+def write_pair(directory: str, n_cues: int, seed: int = 0, spec: PairSpec = PairSpec(), name: str = "pair") -> Tuple[str, str]:
+    """Generate a pair and save it as <name>.ai.srt / <name>.human.srt; returns both paths."""
+    ai, human, _ = generate_pair(n_cues, seed, spec)
+    os.makedirs(directory, exist_ok=True)
+    ai_path = os.path.join(directory, f"{name}.ai.srt")
+    human_path = os.path.join(directory, f"{name}.human.srt")
+    save_subtitles(ai, ai_path)
+    save_subtitles(human, human_path)
+    return ai_path, human_path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("cues", type=int)
+    ap.add_argument("directory")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--offset-ms", type=int, default=PairSpec.offset_ms)
+    ap.add_argument("--scale", type=float, default=PairSpec.scale)
+    args = ap.parse_args()
+    spec = PairSpec(offset_ms=args.offset_ms, scale=args.scale)
+    for path in write_pair(args.directory, args.cues, args.seed, spec):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,122 @@
-from typing import List, Tuple
-from parser.subtitle_parser import SubtitleEvent, save_subtitles
-
-
-def generate_retimed_subtitles(ai_events: List[SubtitleEvent], human_events: List[SubtitleEvent], alignment: List[Tuple[int, int]], output_path: str) -> None:
-    output_events: List[SubtitleEvent] = []
-    for out_index, (ai_idx, human_idx) in enumerate(alignment, start=1):
-        if ai_idx < len(ai_events) and human_idx < len(human_events):
-            ai_event = ai_events[ai_idx]
-            human_event = human_events[human_idx]
-            output_events.append(
-                SubtitleEvent(
-                    index=out_index,
-                    start=human_event.start,
-                    end=human_event.end,
-                    text=ai_event.text,
-                )
-            )
-    save_subtitles(output_events, output_path)
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from parser.subtitle_parser import PathOrFile, SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+from parser.subtitle_writer import SubtitleWriter
+from generator.timing_normalizer import TimingPolicy, normalize_timing
+
+
+def _alignment_array(alignment: List[Tuple[int, int]], n_ai: int, n_human: int) -> np.ndarray:
+    pairs = np.asarray(alignment, dtype=np.int64).reshape(-1, 2)
+    bad = (pairs[:, 0] < 0) | (pairs[:, 0] >= n_ai) | (pairs[:, 1] < 0) | (pairs[:, 1] >= n_human)
+    if bad.any():
+        ai_idx, human_idx = pairs[np.argmax(bad)].tolist()
+        raise ValueError(f"Alignment pair ({ai_idx}, {human_idx}) is out of range for {n_ai} AI / {n_human} human cues")
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    # Duplicates would count as extra matches of their cues
+    keep = np.ones(len(pairs), dtype=bool)
+    keep[1:] = (pairs[1:] != pairs[:-1]).any(axis=1)
+    return pairs[keep]
+
+
+def _drop_cross_links(pairs: np.ndarray, n_ai: int, n_human: int) -> np.ndarray:
+    """
+    Drop pairs whose AI and human cue are both matched elsewhere too, e.g. a long
+    human "[music]" cue overlapping dialogue that has its own matches. What is left
+    are 1:1, 1:N and N:1 groups whose shared cue belongs to that group alone.
+    """
+    ai_count = np.bincount(pairs[:, 0], minlength=n_ai)
+    human_count = np.bincount(pairs[:, 1], minlength=n_human)
+    return pairs[(ai_count[pairs[:, 0]] == 1) | (human_count[pairs[:, 1]] == 1)]
+
+
+def retime_track(ai: SubtitleTrack, human: SubtitleTrack, alignment: List[Tuple[int, int]], fill_unmatched: bool = True) -> SubtitleTrack:
+    """
+    Give every matched AI cue the timing of its human cue(s), as one pass over the
+    timing arrays. The output has one cue per AI cue, in AI order, sharing ai's texts.
+
+    Pairs are grouped into connected runs (1:1, 1:N or N:1), after dropping pairs that
+    would chain groups together (see _drop_cross_links). Each run covers the span from
+    its earliest human start to its latest human end; a single AI cue takes the whole
+    span and several AI cues split it in proportion to their text lengths.
+    With fill_unmatched, AI cues without a match keep their duration and are shifted
+    by the offset interpolated between the neighbouring matched cues; otherwise they
+    are left out.
+    """
+    pairs = _drop_cross_links(_alignment_array(alignment, len(ai), len(human)), len(ai), len(human))
+    if not len(pairs):
+        return ai.take(np.zeros(0, dtype=np.int64))
+    ai_idx, human_idx = pairs[:, 0], pairs[:, 1]
+
+    # Every pair now has a cue of its own on one side: a human cue shared by several
+    # pairs makes an N:1 run, anything else is the 1:1 or 1:N run of its AI cue.
+    shared = np.bincount(human_idx, minlength=len(human))[human_idx] > 1
+    run_keys, run_of_pair = np.unique(np.where(shared, len(ai) + human_idx, ai_idx), return_inverse=True)
+    span_lo = np.full(len(run_keys), np.iinfo(np.int64).max)
+    span_hi = np.full(len(run_keys), np.iinfo(np.int64).min)
+    np.minimum.at(span_lo, run_of_pair, human.start_ms[human_idx])
+    np.maximum.at(span_hi, run_of_pair, human.end_ms[human_idx])
+
+    # Split each run's span between its AI cues in AI order, by text length (at least 1 each).
+    new_ai = np.ones(len(pairs), dtype=bool)
+    new_ai[1:] = ai_idx[1:] != ai_idx[:-1]
+    order = np.lexsort((ai_idx[new_ai], run_of_pair[new_ai]))
+    matched = ai_idx[new_ai][order]
+    run_of = run_of_pair[new_ai][order]
+    weight = np.maximum(ai.text_lengths()[matched], 1)
+    upto = np.cumsum(weight)
+    before = upto - weight
+    run_base = before[np.flatnonzero(np.r_[True, run_of[1:] != run_of[:-1]])]
+    run_total = np.bincount(run_of, weights=weight)
+    base, total = run_base[run_of], run_total[run_of]
+    lo, span = span_lo[run_of], (span_hi - span_lo)[run_of]
+    start = np.empty(len(ai), dtype=np.int64)
+    end = np.empty(len(ai), dtype=np.int64)
+    start[matched] = lo + np.rint((before - base) / total * span).astype(np.int64)
+    end[matched] = lo + np.rint((upto - base) / total * span).astype(np.int64)
+    matched = np.sort(matched)
+
+    if not fill_unmatched:
+        return ai.take(matched).retimed(start[matched], end[matched], np.arange(1, len(matched) + 1))
+    unmatched = np.ones(len(ai), dtype=bool)
+    unmatched[matched] = False
+    if unmatched.any():
+        order = np.argsort(ai.start_ms[matched], kind="stable")
+        xs = ai.start_ms[matched][order]
+        offsets = (start[matched] - ai.start_ms[matched])[order]
+        shift = np.rint(np.interp(ai.start_ms[unmatched], xs, offsets)).astype(np.int64)
+        start[unmatched] = ai.start_ms[unmatched] + shift
+        end[unmatched] = ai.end_ms[unmatched] + shift
+    return ai.retimed(start, end, np.arange(1, len(ai) + 1))
+
+
+def iter_retimed_subtitles(ai_events: Sequence[SubtitleEvent], human_events: Sequence[SubtitleEvent], alignment: List[Tuple[int, int]], fill_unmatched: bool = True) -> Iterator[SubtitleEvent]:
+    """Yield the retimed events of retime_track one by one."""
+    yield from retime_track(as_track(ai_events), as_track(human_events), alignment, fill_unmatched)
+
+
+def generate_retimed_subtitles(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Sequence[SubtitleEvent],
+    alignment: List[Tuple[int, int]],
+    output_path: PathOrFile,
+    fmt: Optional[str] = None,
+    fill_unmatched: bool = True,
+    normalize: Optional[TimingPolicy] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Retime ai_events with retime_track and stream the result to output_path. With a
+    normalize policy the timings are cleaned up by normalize_timing first; the number
+    of cues each of its rules changed is returned (empty without a policy). progress
+    is passed on to SubtitleWriter.write_track.
+    """
+    track = retime_track(as_track(ai_events), as_track(human_events), alignment, fill_unmatched)
+    counts: Dict[str, int] = {}
+    if normalize is not None:
+        track, counts = normalize_timing(track, normalize)
+    with SubtitleWriter(output_path, fmt) as writer:
+        writer.write_track(track, progress)
+    return counts
@@ -1,17 +1,25 @@
 import sys
-from typing import List, Tuple
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QAction,
+    QApplication, QMainWindow, QAction, QAbstractItemView,
     QFileDialog, QMessageBox,
-    QTableWidget, QTableWidgetItem,
+    QTableView, QProgressBar,
     QSplitter, QWidget, QVBoxLayout, QPushButton
 )
 
-from parser.subtitle_parser import load_subtitles, SubtitleEvent
-from aligner.alignment_engine import auto_align, refine_alignment_with_anchors
-from manual.manual_alignment import add_anchor
+from parser.subtitle_parser import SubtitleEvent
+from parser.track_cache import default_cache_dir, load_track_cached
+from aligner.alignment_engine import PiecewiseAligner, auto_align, refine_alignment_with_anchors
+from manual.history import EditHistory, HistoryEntry
+from manual.manual_alignment import AnchorSet
 from generator.output_generator import generate_retimed_subtitles
+from gui.subtitle_table_model import SubtitleTableModel, configure_table_view, size_columns_from_sample
+from gui.timeline_view import AlignmentTimeline
+from gui.workers import Worker
 
 
 class SubtitleRetimerMainWindow(QMainWindow):
@@ -25,8 +33,10 @@ class SubtitleRetimerMainWindow(QMainWindow):
         self._create_menu()
 
         # 2. Create central widgets
-        self.ai_table = QTableWidget()
-        self.human_table = QTableWidget()
+        self.ai_table = QTableView()
+        self.human_table = QTableView()
+        self.ai_model = SubtitleTableModel(parent=self)
+        self.human_model = SubtitleTableModel(parent=self)
         self._configure_tables()
 
         self.splitter = QSplitter()
@@ -37,6 +47,9 @@ class SubtitleRetimerMainWindow(QMainWindow):
         container = QWidget()
         layout = QVBoxLayout()
         layout.addWidget(self.splitter)
+        # Both tracks as interval lanes with match links, following the tables
+        self.timeline = AlignmentTimeline()
+        layout.addWidget(self.timeline)
 
         # 4. Buttons for Align, Link, Save
         button_layout = QWidget()
@@ -53,26 +66,62 @@ class SubtitleRetimerMainWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-        # 5. State variables
-        self.ai_events: List[SubtitleEvent] = []
-        self.human_events: List[SubtitleEvent] = []
+        # 5. Status bar: busy indicator and cancel button for background jobs
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.cancel_btn = QPushButton("Cancel")
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_btn)
+        self.progress_bar.hide()
+        self.cancel_btn.hide()
+
+        # 6. State variables
+        self.ai_events: Sequence[SubtitleEvent] = []
+        self.human_events: Sequence[SubtitleEvent] = []
         self.alignment: List[Tuple[int, int]] = []
         self.anchors: List[Tuple[int, int]] = []
+        # Caches segment alignments between anchors for the currently loaded pair
+        self.piecewise: Optional[PiecewiseAligner] = None
+        # Bumped whenever a subtitle file is replaced; results computed for older data are dropped
+        self.data_version = 0
+        # Background jobs by kind ("ai", "human", "align", "save"); a new job replaces the old one
+        self.jobs: Dict[str, Worker] = {}
+        # Every job still running, including cancelled ones, so none is freed mid-run
+        self.running: Set[Worker] = set()
+        self.pool = QThreadPool.globalInstance()
+        # Alignment jobs share self.piecewise, so they run one at a time
+        self._align_lock = threading.Lock()
+        # Anchor/alignment states of the current pair, for undo, redo and jumping back
+        self.history = EditHistory()
+        # Parsed tracks are cached on disk, so reopening a file skips parsing (None: no cache)
+        self.cache_dir = default_cache_dir()
+        self._update_history_actions()
 
-        # 6. Connect signals
+        # 7. Connect signals
         self.align_btn.clicked.connect(self.on_auto_align)
         self.link_btn.clicked.connect(self.on_link_lines)
         self.save_btn.clicked.connect(self.on_save_output)
+        self.cancel_btn.clicked.connect(self.on_cancel)
+        self.timeline.cueClicked.connect(self.on_timeline_clicked)
+        self._syncing_scroll = False
+        self.ai_table.verticalScrollBar().valueChanged.connect(lambda _: self._on_table_scrolled("ai"))
+        self.human_table.verticalScrollBar().valueChanged.connect(lambda _: self._on_table_scrolled("human"))
 
     def _create_actions(self):
         # File → Open AI Subtitles
         self.open_ai_action = QAction("Open AI Subtitles", self)
         self.open_human_action = QAction("Open Human Subtitles", self)
         self.exit_action = QAction("Exit", self)
+        self.undo_action = QAction("Undo", self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.redo_action = QAction("Redo", self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
 
         self.open_ai_action.triggered.connect(self.on_open_ai)
         self.open_human_action.triggered.connect(self.on_open_human)
         self.exit_action.triggered.connect(self.close)
+        self.undo_action.triggered.connect(self.on_undo)
+        self.redo_action.triggered.connect(self.on_redo)
 
     def _create_menu(self):
         menubar = self.menuBar()
@@ -81,77 +130,262 @@ class SubtitleRetimerMainWindow(QMainWindow):
         file_menu.addAction(self.open_human_action)
         file_menu.addSeparator()
         file_menu.addAction(self.exit_action)
+        edit_menu = menubar.addMenu("Edit")
+        edit_menu.addAction(self.undo_action)
+        edit_menu.addAction(self.redo_action)
+        # Lists every alignment state of the current pair; picking one jumps to it
+        self.history_menu = edit_menu.addMenu("History")
+        self.history_menu.aboutToShow.connect(self._fill_history_menu)
 
     def _configure_tables(self):
-        # Each table has 3 columns: Index, Timestamp, Text
-        for table in (self.ai_table, self.human_table):
-            table.setColumnCount(3)
-            table.setHorizontalHeaderLabels(["#", "Time", "Text"])
-            table.setEditTriggers(QTableWidget.NoEditTriggers)
-            table.setSelectionBehavior(QTableWidget.SelectRows)
-            table.setSelectionMode(QTableWidget.SingleSelection)
+        # Each table has 3 columns: Index, Timestamp, Text, formatted lazily by its model
+        for table, model in ((self.ai_table, self.ai_model), (self.human_table, self.human_model)):
+            table.setModel(model)
+            configure_table_view(table)
 
-    def on_open_ai(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open AI subtitle (.srt/.vtt)", "", "Subtitles (*.srt *.vtt)")
-        if not path:
+    # Background jobs
+
+    def start_job(self, kind: str, message: str, fn: Callable[..., Any], *args: Any,
+                  on_done: Callable[[Any], None]) -> Worker:
+        """Run fn(worker, *args) on the thread pool; on_done(result) runs on the GUI thread."""
+        previous = self.jobs.get(kind)
+        if previous is not None:
+            previous.cancel()
+        worker = Worker(fn, *args, kind=kind, version=self.data_version)
+        worker.on_done = on_done
+        worker.signals.progress.connect(self._on_job_progress)
+        worker.signals.finished.connect(self._on_job_finished)
+        worker.signals.failed.connect(self._on_job_failed)
+        worker.signals.stopped.connect(self._on_job_stopped)
+        self.jobs[kind] = worker
+        self.running.add(worker)
+        self._show_busy(message)
+        self.pool.start(worker)
+        return worker
+
+    def _is_current(self, worker: Worker) -> bool:
+        """False for cancelled or replaced jobs and for results based on data loaded since."""
+        if worker.cancelled or self.jobs.get(worker.kind) is not worker:
+            return False
+        # A finished save is still worth reporting after another file was opened
+        return worker.kind in ("ai", "human", "save") or worker.version == self.data_version
+
+    def _end_job(self, worker: Worker) -> None:
+        if self.jobs.get(worker.kind) is worker:
+            del self.jobs[worker.kind]
+        if not self.jobs:
+            self.progress_bar.hide()
+            self.cancel_btn.hide()
+            self.statusBar().clearMessage()
+
+    def _show_busy(self, message: str) -> None:
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_btn.show()
+        self.statusBar().showMessage(message)
+
+    def _on_job_progress(self, worker: Worker, percent: int, message: str) -> None:
+        if not self._is_current(worker):
+            return
+        if percent >= 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(percent)
+        if message:
+            self.statusBar().showMessage(message)
+
+    def _on_job_finished(self, worker: Worker, result: Any) -> None:
+        current = self._is_current(worker)
+        self._end_job(worker)
+        if current:
+            worker.on_done(result)
+
+    def _on_job_failed(self, worker: Worker, message: str) -> None:
+        current = self._is_current(worker)
+        self._end_job(worker)
+        if current:
+            QMessageBox.critical(self, "Error", f"{worker.kind.capitalize()} failed:\n{message}")
+
+    def _on_job_stopped(self, worker: Worker) -> None:
+        self.running.discard(worker)
+
+    def on_cancel(self):
+        for worker in list(self.jobs.values()):
+            worker.cancel()
+            self._end_job(worker)
+
+    # Linked scrolling
+
+    def _on_table_scrolled(self, kind: str) -> None:
+        """Scroll the other table to the counterpart of the top visible row and follow it in the timeline."""
+        index = self.timeline.index
+        if self._syncing_scroll or index is None:
+            return
+        source, target = (self.ai_table, self.human_table) if kind == "ai" else (self.human_table, self.ai_table)
+        lookup = index.ai_to_human if kind == "ai" else index.human_to_ai
+        row = source.rowAt(0)
+        if row < 0 or row >= len(lookup) or not target.model().rowCount():
             return
+        events = self.ai_events if kind == "ai" else self.human_events
+        self._syncing_scroll = True
         try:
-            self.ai_events = load_subtitles(path)
-            self._populate_table(self.ai_table, self.ai_events)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load AI subtitles:\n{e}")
+            target.scrollTo(target.model().index(int(lookup[row]), 0), QAbstractItemView.PositionAtTop)
+            self.timeline.scroll_to(int(round(events[row].start * 1000)))
+        finally:
+            self._syncing_scroll = False
+
+    def on_timeline_clicked(self, kind: str, row: int) -> None:
+        table = self.ai_table if kind == "ai" else self.human_table
+        table.selectRow(row)
+        table.scrollTo(table.model().index(row, 0), QAbstractItemView.PositionAtCenter)
+
+    def closeEvent(self, event):
+        self.on_cancel()
+        super().closeEvent(event)
+
+    # Actions
+
+    def on_open_ai(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open AI subtitle (.srt/.vtt)", "", "Subtitles (*.srt *.vtt)")
+        if path:
+            self.open_file("ai", path)
 
     def on_open_human(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open Human subtitle (.srt/.vtt)", "", "Subtitles (*.srt *.vtt)")
-        if not path:
-            return
-        try:
-            self.human_events = load_subtitles(path)
-            self._populate_table(self.human_table, self.human_events)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load Human subtitles:\n{e}")
-
-    def _populate_table(self, table: QTableWidget, events: List[SubtitleEvent]):
-        table.setRowCount(len(events))
-        for i, ev in enumerate(events):
-            idx_item = QTableWidgetItem(str(ev.index))
-            time_item = QTableWidgetItem(f"{ev.start:.3f} → {ev.end:.3f}")
-            text_item = QTableWidgetItem(ev.text)
-            table.setItem(i, 0, idx_item)
-            table.setItem(i, 1, time_item)
-            table.setItem(i, 2, text_item)
-        table.resizeColumnsToContents()
+        if path:
+            self.open_file("human", path)
+
+    def open_file(self, kind: str, path: str) -> Worker:
+        """Load an "ai" or "human" file in the background and show it when done."""
+        cache_dir = self.cache_dir
+        return self.start_job(kind, f"Loading {path}…", lambda worker: load_track_cached(path, cache_dir=cache_dir),
+                              on_done=lambda track: self._set_events(kind, track))
+
+    def _set_events(self, kind: str, events: Sequence[SubtitleEvent]):
+        if kind == "ai":
+            self.ai_events = events
+            self._populate_table(self.ai_table, self.ai_model, events)
+        else:
+            self.human_events = events
+            self._populate_table(self.human_table, self.human_model, events)
+        # Alignment, anchors and cached segments all refer to the previous file
+        self.data_version += 1
+        self.piecewise = None
+        self.alignment = []
+        self.anchors = []
+        self.history.clear()
+        self._update_history_actions()
+        self.timeline.set_tracks(self.ai_events, self.human_events)
+
+    def _populate_table(self, table: QTableView, model: SubtitleTableModel, events: Sequence[SubtitleEvent]):
+        model.set_events(events)
+        size_columns_from_sample(table)
+
+    def _align_job(self, worker: Worker, ai, human, anchors, aligner: Optional[PiecewiseAligner]):
+        with self._align_lock:
+            worker.check()
+            if not anchors:
+                return auto_align(ai, human)
+            return refine_alignment_with_anchors(ai, human, anchors, aligner=aligner)
 
     def on_auto_align(self):
         if not self.ai_events or not self.human_events:
             QMessageBox.warning(self, "Warning", "Load both AI and Human subtitles first.")
             return
-        try:
-            self.alignment = auto_align(self.ai_events, self.human_events)
-            # Highlight matches in tables (optional—just highlight first matched pair to show it worked)
-            for human_idx, ai_idx in self.alignment:
-                self.human_table.selectRow(human_idx)
+
+        def done(alignment):
+            self.alignment = alignment
+            self._commit_history("Auto-align")
+            self.timeline.set_alignment(self.alignment, self.anchors)
+            # Show the first matched pair; the timeline shows the rest
+            if alignment:
+                ai_idx, human_idx = alignment[0]
                 self.ai_table.selectRow(ai_idx)
-                break
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Auto-alignment failed:\n{e}")
+                self.human_table.selectRow(human_idx)
+
+        self.start_job("align", "Aligning…", self._align_job, self.ai_events, self.human_events, [], None, on_done=done)
 
     def on_link_lines(self):
         # User must have selected one row in each table
-        ai_sel = self.ai_table.currentRow()
-        human_sel = self.human_table.currentRow()
+        ai_sel = self.ai_table.currentIndex().row()
+        human_sel = self.human_table.currentIndex().row()
         if ai_sel < 0 or human_sel < 0:
             QMessageBox.warning(self, "Warning", "Select one line in each table to link.")
             return
         try:
-            self.anchors = add_anchor(self.anchors, ai_sel, human_sel)
-            # Recompute alignment with anchors
-            self.alignment = refine_alignment_with_anchors(self.ai_events, self.human_events, self.anchors)
-            # Highlight the newly anchored line
-            self.ai_table.selectRow(ai_sel)
-            self.human_table.selectRow(human_sel)
+            # Conflicting or crossing links are refused here rather than failing the re-align
+            anchor_set = AnchorSet(self._pending_anchors())
+            anchor_set.add(ai_sel, human_sel)
+            anchors = anchor_set.to_list()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to add anchor:\n{e}")
+            return
+
+        def done(alignment):
+            # Recomputed with only the segments next to the new anchors re-aligned; links
+            # made while an earlier re-align was running are committed together
+            links = [pair for pair in anchors if pair not in self.anchors]
+            self.alignment = alignment
+            self.anchors = anchors
+            self._commit_history("Link " + ", ".join(f"AI {a + 1} ↔ human {h + 1}" for a, h in links))
+            self.timeline.set_alignment(self.alignment, self.anchors)
+            self.ai_table.selectRow(ai_sel)
+            self.human_table.selectRow(human_sel)
+
+        if self.piecewise is None:
+            self.piecewise = PiecewiseAligner(self.ai_events, self.human_events)
+        # Linking again before this finishes replaces the job, so the next link builds on these anchors
+        job = self.start_job("align", "Re-aligning around the new anchor…", self._align_job,
+                             self.ai_events, self.human_events, anchors, self.piecewise, on_done=done)
+        job.anchors = anchors
+
+    def _pending_anchors(self) -> List[Tuple[int, int]]:
+        """Anchors including links whose re-align is still running."""
+        job = self.jobs.get("align")
+        if job is not None and self._is_current(job):
+            return getattr(job, "anchors", self.anchors)
+        return self.anchors
+
+    # History
+
+    def _commit_history(self, label: str) -> None:
+        self.history.commit(self.anchors, self.alignment, label)
+        self._update_history_actions()
+
+    def _update_history_actions(self) -> None:
+        self.undo_action.setEnabled(self.history.can_undo())
+        self.redo_action.setEnabled(self.history.can_redo())
+
+    def _fill_history_menu(self) -> None:
+        self.history_menu.clear()
+        for position, label in enumerate(self.history.labels):
+            action = self.history_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(position == self.history.position)
+            action.triggered.connect(lambda _=False, p=position: self.restore_history(p))
+
+    def restore_history(self, position: int) -> None:
+        self._apply_history(self.history.goto(position))
+
+    def on_undo(self):
+        entry = self.history.undo()
+        if entry is not None:
+            self._apply_history(entry)
+
+    def on_redo(self):
+        entry = self.history.redo()
+        if entry is not None:
+            self._apply_history(entry)
+
+    def _apply_history(self, entry: HistoryEntry) -> None:
+        # A re-align still running would overwrite the restored state
+        job = self.jobs.get("align")
+        if job is not None:
+            job.cancel()
+            self._end_job(job)
+        self.anchors = entry.anchors.to_list()
+        self.alignment = entry.alignment.to_list()
+        self.timeline.set_alignment(self.alignment, self.anchors)
+        self._update_history_actions()
 
     def on_save_output(self):
         if not (self.ai_events and self.human_events and self.alignment):
@@ -160,11 +394,18 @@ class SubtitleRetimerMainWindow(QMainWindow):
         out_path, _ = QFileDialog.getSaveFileName(self, "Save Retimed Subtitles", "", "Subtitles (*.srt *.vtt)")
         if not out_path:
             return
-        try:
-            generate_retimed_subtitles(self.ai_events, self.human_events, self.alignment, out_path)
-            QMessageBox.information(self, "Success", f"Saved retimed subtitles to:\n{out_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save output:\n{e}")
+
+        def save(worker: Worker):
+            # Cancelling stops between batches; the writer then removes its temporary file
+            def progress(done: int, total: int):
+                worker.check()
+                worker.progress(100 * done // max(total, 1), f"Saving… {done}/{total} cues")
+            generate_retimed_subtitles(ai, human, alignment, out_path, progress=progress)
+            return out_path
+
+        ai, human, alignment = self.ai_events, self.human_events, self.alignment
+        self.start_job("save", f"Saving {out_path}…", save, on_done=lambda path: QMessageBox.information(
+            self, "Success", f"Saved retimed subtitles to:\n{path}"))
 
 
 def main():
@@ -1,6 +1,15 @@
-"""Main entry point for the Subtitle Aligner GUI application."""
+"""
+Main entry point for the Subtitle Aligner.
+
+Without arguments the GUI starts; with arguments they are handled by the batch CLI
+(see ``python main.py --help``), which never imports PyQt5.
+"""
+import sys
 
-from src.gui.gui_frontend import main as gui_main
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from src.batch.cli import main as cli_main
+        sys.exit(cli_main())
+    from src.gui.gui_frontend import main as gui_main
     gui_main()
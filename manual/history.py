@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# AI rows per block; an edit costs memory for the blocks it touches, rounded up to this.
+BLOCK_ROWS = 1024
+
+
+class PairBlocks:
+    """
+    Immutable (ai_index, human_index) pairs sorted by AI then human index, stored as
+    read-only arrays, one per block of BLOCK_ROWS AI rows.
+
+    from_pairs(..., previous=...) reuses every block of the previous version whose
+    content is unchanged, so successive versions of a long alignment share all but
+    the blocks an edit touched.
+    """
+
+    __slots__ = ("keys", "blocks", "_len")
+
+    def __init__(self, keys: Tuple[int, ...] = (), blocks: Tuple[np.ndarray, ...] = ()):
+        self.keys = keys
+        self.blocks = blocks
+        self._len = sum(len(b) for b in blocks)
+
+    @classmethod
+    def from_pairs(
+        cls, pairs: Iterable[Tuple[int, int]], previous: Optional["PairBlocks"] = None, block_rows: int = BLOCK_ROWS,
+    ) -> "PairBlocks":
+        arr = np.asarray(pairs if isinstance(pairs, np.ndarray) else list(pairs), dtype=np.int64).reshape(-1, 2)
+        step = np.diff(arr[:, 0])
+        if np.any((step < 0) | ((step == 0) & (np.diff(arr[:, 1]) < 0))):
+            arr = arr[np.lexsort((arr[:, 1], arr[:, 0]))]
+        ids = arr[:, 0] // block_rows
+        cuts = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        starts = np.r_[0, cuts].tolist() if len(arr) else []
+        stops = np.r_[cuts, len(arr)].tolist() if len(arr) else []
+        old: Dict[int, np.ndarray] = dict(zip(previous.keys, previous.blocks)) if previous is not None else {}
+        keys, blocks = [], []
+        for a, b in zip(starts, stops):
+            key, part = int(ids[a]), arr[a:b]
+            block = old.get(key)
+            if block is None or block.shape != part.shape or not np.array_equal(block, part):
+                # A copy, so the block does not keep the whole input array alive
+                block = part.copy()
+                block.setflags(write=False)
+            keys.append(key)
+            blocks.append(block)
+        return cls(tuple(keys), tuple(blocks))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PairBlocks):
+            return NotImplemented
+        return self.keys == other.keys and all(
+            a is b or np.array_equal(a, b) for a, b in zip(self.blocks, other.blocks)
+        )
+
+    def to_array(self) -> np.ndarray:
+        return np.concatenate(self.blocks) if self.blocks else np.zeros((0, 2), dtype=np.int64)
+
+    def to_list(self) -> List[Tuple[int, int]]:
+        arr = self.to_array()
+        return list(zip(arr[:, 0].tolist(), arr[:, 1].tolist()))
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    anchors: PairBlocks
+    alignment: PairBlocks
+    label: str = ""
+
+
+class EditHistory:
+    """
+    Linear undo/redo history of (anchors, alignment) states.
+
+    Each commit stores the state as PairBlocks sharing unchanged blocks with the
+    current entry, so memory per edit is proportional to the part of the alignment
+    it changed. undo/redo/goto only move a position; committing after an undo
+    drops the entries that could have been redone. With max_entries the oldest
+    entries are forgotten.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, block_rows: int = BLOCK_ROWS):
+        self.max_entries = max_entries
+        self.block_rows = block_rows
+        self._entries: List[HistoryEntry] = []
+        self._position = -1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def position(self) -> int:
+        """Index of the current entry, -1 while the history is empty."""
+        return self._position
+
+    @property
+    def current(self) -> Optional[HistoryEntry]:
+        return self._entries[self._position] if self._position >= 0 else None
+
+    @property
+    def labels(self) -> List[str]:
+        return [entry.label for entry in self._entries]
+
+    def can_undo(self) -> bool:
+        return self._position > 0
+
+    def can_redo(self) -> bool:
+        return self._position < len(self._entries) - 1
+
+    def commit(self, anchors: Iterable[Tuple[int, int]], alignment: Iterable[Tuple[int, int]], label: str = "") -> HistoryEntry:
+        previous = self.current
+        entry = HistoryEntry(
+            PairBlocks.from_pairs(anchors, previous.anchors if previous else None, self.block_rows),
+            PairBlocks.from_pairs(alignment, previous.alignment if previous else None, self.block_rows),
+            label,
+        )
+        del self._entries[self._position + 1:]
+        self._entries.append(entry)
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            del self._entries[:len(self._entries) - self.max_entries]
+        self._position = len(self._entries) - 1
+        return entry
+
+    def undo(self) -> Optional[HistoryEntry]:
+        """Step back and return the now current entry, or None if there is nothing to undo."""
+        return self.goto(self._position - 1) if self.can_undo() else None
+
+    def redo(self) -> Optional[HistoryEntry]:
+        return self.goto(self._position + 1) if self.can_redo() else None
+
+    def goto(self, position: int) -> HistoryEntry:
+        """Make the entry at position (as in labels) current; later entries stay redoable."""
+        if not 0 <= position < len(self._entries):
+            raise IndexError(f"No history entry {position}")
+        self._position = position
+        return self._entries[position]
+
+    def clear(self) -> None:
+        self._entries = []
+        self._position = -1
+
+    def nbytes(self) -> int:
+        """Memory held by all entries, counting shared blocks once."""
+        seen: Dict[int, int] = {}
+        for entry in self._entries:
+            for blocks in (entry.anchors.blocks, entry.alignment.blocks):
+                for block in blocks:
+                    seen[id(block)] = block.nbytes
+        return sum(seen.values())
@@ -1,4 +1,8 @@
-from typing import List, Tuple
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+Anchor = Tuple[int, int]
 
 
 def add_anchor(
@@ -15,22 +19,16 @@ def add_anchor(
     Raises ValueError if the anchor conflicts with an existing anchor (e.g. same ai_index mapped to two human_indices).
     """
 
-    if not validate_anchors(anchors):
+    # A thin wrapper over AnchorSet (crossing allowed, as before); use AnchorSet itself for repeated edits.
+    try:
+        anchor_set = AnchorSet(anchors, allow_crossing=True)
+    except ValueError:
+        raise ValueError("Invalid anchors list") from None
+    if len(anchor_set) != len(anchors):
         raise ValueError("Invalid anchors list")
-
-    for ai, human in anchors:
-        if ai == ai_index and human == human_index:
-            # anchor already present
-            return anchors
-        if ai == ai_index and human != human_index:
-            raise ValueError(
-                f"AI index {ai_index} already mapped to human index {human}"
-            )
-        if human == human_index and ai != ai_index:
-            raise ValueError(
-                f"Human index {human_index} already mapped to ai index {ai}"
-            )
-
+    if not anchor_set.add(ai_index, human_index):
+        # anchor already present
+        return anchors
     return anchors + [(ai_index, human_index)]
 
 
@@ -46,9 +44,9 @@ def remove_anchor(
     Return a list of anchors with the specified pair removed. If the pair isn't present, return anchors unchanged.
     """
 
-    if (ai_index, human_index) not in anchors:
+    if not AnchorSet(anchors, allow_crossing=True).discard(ai_index, human_index):
         return anchors
-
+    # The caller's order is kept
     return [pair for pair in anchors if pair != (ai_index, human_index)]
 
 
@@ -62,11 +60,152 @@ def validate_anchors(
     Check that no ai_index or human_index appears more than once across all anchors.
     """
 
-    ai_seen = set()
-    human_seen = set()
-    for ai, human in anchors:
-        if ai in ai_seen or human in human_seen:
+    try:
+        return len(AnchorSet(anchors, allow_crossing=True)) == len(anchors)
+    except ValueError:
+        return False
+
+
+class AnchorSet:
+    """
+    Anchors (ai_index, human_index) with a hash index on each side and the AI indices
+    kept in sorted order, so lookups are O(1) and an insert is checked in O(log n).
+
+    Each AI and human index may be anchored once. Unless allow_crossing is set,
+    anchors must also be monotonic: ordered by AI index, their human indices increase,
+    which is what the piecewise aligner needs. Invalid edits raise ValueError and
+    leave the set unchanged; bulk edits are all-or-nothing. Iteration is in AI order.
+    """
+
+    def __init__(self, anchors: Iterable[Anchor] = (), allow_crossing: bool = False):
+        self.allow_crossing = allow_crossing
+        self._human_of: Dict[int, int] = {}
+        self._ai_of: Dict[int, int] = {}
+        self._ai_order: List[int] = []
+        self.update(anchors)
+
+    def __len__(self) -> int:
+        return len(self._ai_order)
+
+    def __iter__(self) -> Iterator[Anchor]:
+        human_of = self._human_of
+        return ((ai, human_of[ai]) for ai in self._ai_order)
+
+    def __contains__(self, anchor: object) -> bool:
+        try:
+            ai, human = anchor
+        except (TypeError, ValueError):
+            return False
+        return self._human_of.get(ai) == human and human is not None
+
+    def __repr__(self) -> str:
+        return f"AnchorSet({self.to_list()!r})"
+
+    def to_list(self) -> List[Anchor]:
+        return list(self)
+
+    def copy(self) -> "AnchorSet":
+        other = AnchorSet(allow_crossing=self.allow_crossing)
+        other._human_of = dict(self._human_of)
+        other._ai_of = dict(self._ai_of)
+        other._ai_order = list(self._ai_order)
+        return other
+
+    def human_for(self, ai_index: int) -> Optional[int]:
+        return self._human_of.get(ai_index)
+
+    def ai_for(self, human_index: int) -> Optional[int]:
+        return self._ai_of.get(human_index)
+
+    def neighbours(self, ai_index: int) -> Tuple[Optional[Anchor], Optional[Anchor]]:
+        """The nearest anchors strictly before and after ai_index in AI order (None at the ends)."""
+        order = self._ai_order
+        lo = bisect.bisect_left(order, ai_index)
+        hi = bisect.bisect_right(order, ai_index)
+        before = (order[lo - 1], self._human_of[order[lo - 1]]) if lo > 0 else None
+        after = (order[hi], self._human_of[order[hi]]) if hi < len(order) else None
+        return before, after
+
+    def _check(self, ai_index: int, human_index: int) -> bool:
+        """False if the anchor is already present; ValueError if it conflicts or crosses."""
+        human = self._human_of.get(ai_index)
+        if human == human_index:
+            return False
+        if human is not None:
+            raise ValueError(f"AI index {ai_index} already mapped to human index {human}")
+        ai = self._ai_of.get(human_index)
+        if ai is not None:
+            raise ValueError(f"Human index {human_index} already mapped to ai index {ai}")
+        if not self.allow_crossing:
+            before, after = self.neighbours(ai_index)
+            for other in (before, after):
+                if other is not None and (other[0] < ai_index) != (other[1] < human_index):
+                    raise ValueError(f"Anchor ({ai_index}, {human_index}) crosses anchor {other}")
+        return True
+
+    def add(self, ai_index: int, human_index: int) -> bool:
+        """Add an anchor; returns False if it was already present."""
+        if not self._check(ai_index, human_index):
+            return False
+        self._human_of[ai_index] = human_index
+        self._ai_of[human_index] = ai_index
+        bisect.insort(self._ai_order, ai_index)
+        return True
+
+    def discard(self, ai_index: int, human_index: int) -> bool:
+        """Remove an anchor; returns False if it was not present."""
+        if self._human_of.get(ai_index) != human_index:
             return False
-        ai_seen.add(ai)
-        human_seen.add(human)
-    return True
+        del self._human_of[ai_index]
+        del self._ai_of[human_index]
+        del self._ai_order[bisect.bisect_left(self._ai_order, ai_index)]
+        return True
+
+    def update(self, anchors: Iterable[Anchor]) -> int:
+        """Add many anchors at once (O((n + k) log k)); returns how many were new."""
+        new_human_of: Dict[int, int] = {}
+        new_ai_of: Dict[int, int] = {}
+        for ai, human in anchors:
+            ai, human = int(ai), int(human)
+            if new_human_of.get(ai) == human:
+                continue
+            if ai in new_human_of:
+                raise ValueError(f"AI index {ai} given twice, with human indices {new_human_of[ai]} and {human}")
+            if human in new_ai_of:
+                raise ValueError(f"Human index {human} given twice, with ai indices {new_ai_of[human]} and {ai}")
+            if self._human_of.get(ai) == human:
+                continue
+            if ai in self._human_of:
+                raise ValueError(f"AI index {ai} already mapped to human index {self._human_of[ai]}")
+            if human in self._ai_of:
+                raise ValueError(f"Human index {human} already mapped to ai index {self._ai_of[human]}")
+            new_human_of[ai] = human
+            new_ai_of[human] = ai
+        if not new_human_of:
+            return 0
+        # Both runs are sorted, so this sort is a linear merge.
+        order = self._ai_order + sorted(new_human_of)
+        order.sort()
+        if not self.allow_crossing:
+            human_of = {**self._human_of, **new_human_of}
+            humans = [human_of[ai] for ai in order]
+            for k in range(1, len(humans)):
+                if humans[k - 1] >= humans[k]:
+                    raise ValueError(f"Anchor ({order[k - 1]}, {humans[k - 1]}) crosses anchor ({order[k]}, {humans[k]})")
+        self._human_of.update(new_human_of)
+        self._ai_of.update(new_ai_of)
+        self._ai_order = order
+        return len(new_human_of)
+
+    def difference_update(self, anchors: Iterable[Anchor]) -> int:
+        """Remove many anchors at once (O(n + k)); anchors not present are ignored. Returns how many were removed."""
+        gone = set()
+        for ai, human in anchors:
+            ai, human = int(ai), int(human)
+            if self._human_of.get(ai) == human:
+                del self._human_of[ai]
+                del self._ai_of[human]
+                gone.add(ai)
+        if gone:
+            self._ai_order = [ai for ai in self._ai_order if ai not in gone]
+        return len(gone)
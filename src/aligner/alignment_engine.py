@@ -1,13 +1,342 @@
-from typing import List, Tuple
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
 from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+from aligner.drift import DriftReference, estimate_drift
+from aligner.text_alignment import TextFeatures, align_by_text, text_features
+
+
+# Number of neighbouring human cues on each side used as offset candidates per AI cue.
+_OFFSET_NEIGHBOURS = 4
+# Cues longer than this many times the median duration are matched separately (see match_intervals).
+_LONG_CUE_FACTOR = 8
+
+
+def _sorted_intervals(track: SubtitleTrack) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (order, starts, ends) with the track's intervals sorted by start time."""
+    order = np.argsort(track.start_ms, kind="stable")
+    return order, track.start_ms[order], track.end_ms[order]
+
+
+class ReferenceIndex(DriftReference):
+    """
+    A human track prepared for aligning any number of AI tracks against it: its cue
+    intervals in start order (offset voting and overlap matching), the speech-raster
+    FFTs of drift estimation and, once needed, its text features. Passing it to
+    auto_align instead of the human events does this work once per reference
+    instead of once per pair; it is picklable, so process pools can share it too.
+    """
+
+    def __init__(self, human_events: Sequence[SubtitleEvent]):
+        super().__init__(human_events)
+        self.ends = self.track.end_ms[self.order]
+        self._features: Optional[TextFeatures] = None
+
+    @property
+    def features(self) -> TextFeatures:
+        if self._features is None:
+            self._features = text_features(self.track)
+        return self._features
+
+
+def estimate_offset(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Union[Sequence[SubtitleEvent], DriftReference],
+    max_offset_ms: int = 10000,
+    bin_ms: int = 100,
+) -> int:
+    """
+    Estimate the constant offset (ms) to add to AI timings to line them up with the human track.
+
+    Every AI cue votes for the start deltas to its nearest human cues; the most voted
+    histogram bin wins and the median of the deltas around it is returned.
+    Returns 0 when either track is empty or no delta falls within max_offset_ms.
+    """
+    ai = as_track(ai_events)
+    if isinstance(human_events, DriftReference):
+        human_starts = human_events.starts
+    else:
+        human_starts = np.sort(as_track(human_events).start_ms)
+    if not len(ai) or not len(human_starts):
+        return 0
+    ai_starts = np.sort(ai.start_ms)
+    pos = np.searchsorted(human_starts, ai_starts)
+    k = np.arange(-_OFFSET_NEIGHBOURS, _OFFSET_NEIGHBOURS)
+    cand = np.clip(pos[:, None] + k[None, :], 0, len(human_starts) - 1)
+    deltas = (human_starts[cand] - ai_starts[:, None]).ravel()
+    deltas = deltas[np.abs(deltas) <= max_offset_ms]
+    if not len(deltas):
+        return 0
+    bins = np.floor_divide(deltas, bin_ms)
+    values, counts = np.unique(bins, return_counts=True)
+    best = values[np.argmax(counts)]
+    near = deltas[np.abs(bins - best) <= 1]
+    return int(np.median(near))
+
+
+def _window_pairs(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(query, position) for every position in each query's [lo, hi) range."""
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    query = np.repeat(np.arange(len(lo)), counts)
+    # Offsets of each candidate inside its query's range.
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return query, lo[query] + within
+
+
+def _split_long(durations: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """(short positions, long positions, longest short duration); long is over _LONG_CUE_FACTOR x the median."""
+    limit = _LONG_CUE_FACTOR * max(float(np.median(durations)), 1.0)
+    short = durations <= limit
+    longest = int(durations[short].max()) if short.any() else 0
+    return np.flatnonzero(short), np.flatnonzero(~short), longest
+
+
+def match_intervals(
+    ai_starts: np.ndarray,
+    ai_ends: np.ndarray,
+    human_starts: np.ndarray,
+    human_ends: np.ndarray,
+    min_overlap: float = 0.5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Match two start-sorted interval arrays by temporal overlap.
+
+    Candidates are found with binary search on starts: an interval no longer than D
+    can only overlap an AI interval if it starts within D before it. The few cues
+    far longer than usual on either side (a "[music]" cue over the whole file, a
+    broken end time) are split off so they do not widen every search: they are
+    searched from their own side, and long against long is checked directly.
+    A pair is kept when the overlap covers at least min_overlap of the shorter interval,
+    which lets one cue match several split/merged cues on the other side (1:N and N:1).
+    Returns (ai_positions, human_positions) into the sorted arrays, sorted by AI then
+    human position.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(ai_starts) or not len(human_starts):
+        return empty, empty
+    human_short, human_long, human_reach = _split_long(human_ends - human_starts)
+    ai_short, ai_long, ai_reach = _split_long(ai_ends - ai_starts)
+    # Any AI cue against short human cues
+    short_starts = human_starts[human_short]
+    ai_a, pos = _window_pairs(
+        np.searchsorted(short_starts, ai_starts - human_reach, side="right"),
+        np.searchsorted(short_starts, ai_ends, side="left"),
+    )
+    human_a = human_short[pos]
+    # Long human cues against short AI cues
+    short_ai_starts = ai_starts[ai_short]
+    human_b, pos = _window_pairs(
+        np.searchsorted(short_ai_starts, human_starts[human_long] - ai_reach, side="right"),
+        np.searchsorted(short_ai_starts, human_ends[human_long], side="left"),
+    )
+    ai_b, human_b = ai_short[pos], human_long[human_b]
+    # Long against long
+    ai_c, human_c = (a.ravel() for a in np.meshgrid(ai_long, human_long, indexing="ij"))
+    ai_pos = np.concatenate((ai_a, ai_b, ai_c)).astype(np.int64)
+    human_pos = np.concatenate((human_a, human_b, human_c)).astype(np.int64)
+    overlap = (
+        np.minimum(ai_ends[ai_pos], human_ends[human_pos])
+        - np.maximum(ai_starts[ai_pos], human_starts[human_pos])
+    )
+    shorter = np.minimum(
+        ai_ends[ai_pos] - ai_starts[ai_pos], human_ends[human_pos] - human_starts[human_pos]
+    )
+    keep = (overlap > 0) & (overlap >= min_overlap * np.maximum(shorter, 1))
+    ai_pos, human_pos = ai_pos[keep], human_pos[keep]
+    order = np.lexsort((human_pos, ai_pos))
+    return ai_pos[order], human_pos[order]
+
+
+def auto_align(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Union[Sequence[SubtitleEvent], ReferenceIndex],
+    min_overlap: float = 0.5,
+    max_offset_ms: int = 10000,
+    drift: bool = True,
+    max_drift_offset_ms: int = 60000,
+    mode: str = "timing",
+    min_similarity: float = 0.2,
+    executor: Optional[Executor] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Align cues by timing: map the AI track through the global drift estimate (if drift),
+    shift it by the residual offset and match overlapping intervals. Returns
+    (ai_index, human_index) pairs sorted by AI then human index; an index may appear in
+    several pairs and unmatched cues are left out.
+
+    With mode="text" timings are ignored and cues are aligned by text similarity
+    instead (see aligner.text_alignment.align_by_text).
+
+    human_events may be a ReferenceIndex, to align many AI tracks against one
+    reference without preparing it again for each of them. A thread pool executor
+    is used to score the drift candidates concurrently (see estimate_drift).
+    """
+    ai = as_track(ai_events)
+    reference = human_events if isinstance(human_events, ReferenceIndex) else None
+    human = reference.track if reference is not None else as_track(human_events)
+    if not len(ai) or not len(human):
+        return []
+    if mode == "text":
+        features = reference.features if reference is not None else None
+        return align_by_text(ai, human, min_similarity=min_similarity, human_features=features)
+    if mode != "timing":
+        raise ValueError(f"Unknown alignment mode: {mode}")
+    if reference is None:
+        reference = ReferenceIndex(human)
+    if drift:
+        ai = estimate_drift(ai, reference, max_offset_ms=max_drift_offset_ms, executor=executor).apply(ai)
+    offset = estimate_offset(ai, reference, max_offset_ms=max_offset_ms)
+    ai_order, ai_starts, ai_ends = _sorted_intervals(ai)
+    ai_pos, human_pos = match_intervals(
+        ai_starts + offset, ai_ends + offset, reference.starts, reference.ends, min_overlap
+    )
+    return _to_pairs(ai_order[ai_pos], reference.order[human_pos])
+
+
+def _to_pairs(ai_idx: np.ndarray, human_idx: np.ndarray) -> List[Tuple[int, int]]:
+    order = np.lexsort((human_idx, ai_idx))
+    return list(zip(ai_idx[order].tolist(), human_idx[order].tolist()))
+
+
+def sort_anchors(anchors: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Return anchors sorted by AI index; raises ValueError if any two of them cross."""
+    ordered = sorted(set(anchors))
+    for (ai_a, human_a), (ai_b, human_b) in zip(ordered, ordered[1:]):
+        if ai_a == ai_b or human_a >= human_b:
+            raise ValueError(f"Anchors ({ai_a}, {human_a}) and ({ai_b}, {human_b}) cross")
+    return ordered
+
+
+class PiecewiseAligner:
+    """
+    Anchor-constrained alignment of one pair of tracks.
+
+    Anchors split both tracks into independent segments. Inside a segment the AI cues
+    are warped by interpolating the offsets of the bounding anchors and then matched by
+    overlap (or by text with mode="text"). Segment results are cached by their bounds,
+    so adding or removing one anchor only re-aligns the segments next to it.
+    """
+
+    def __init__(
+        self,
+        ai_events: Sequence[SubtitleEvent],
+        human_events: Sequence[SubtitleEvent],
+        min_overlap: float = 0.5,
+        mode: str = "timing",
+        min_similarity: float = 0.2,
+        max_cached_segments: int = 4096,
+        **align_options,
+    ):
+        if mode not in ("timing", "text"):
+            raise ValueError(f"Unknown alignment mode: {mode}")
+        self.ai = as_track(ai_events)
+        self.human = as_track(human_events)
+        self.min_overlap = min_overlap
+        self.mode = mode
+        self.min_similarity = min_similarity
+        self.max_cached_segments = max_cached_segments
+        # Extra auto_align keyword arguments used when there are no anchors (e.g. drift).
+        self.align_options = align_options
+        self._segments: "OrderedDict[Tuple[int, int, int, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._unanchored: Optional[List[Tuple[int, int]]] = None
+
+    def align(self, anchors: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Alignment honouring all anchors, as sorted (ai_index, human_index) pairs."""
+        if not anchors:
+            if self._unanchored is None:
+                self._unanchored = auto_align(
+                    self.ai, self.human, min_overlap=self.min_overlap,
+                    mode=self.mode, min_similarity=self.min_similarity, **self.align_options,
+                )
+            return list(self._unanchored)
+        ordered = sort_anchors(anchors)
+        for ai_idx, human_idx in ordered:
+            if not (0 <= ai_idx < len(self.ai) and 0 <= human_idx < len(self.human)):
+                raise ValueError(f"Anchor ({ai_idx}, {human_idx}) is out of range")
+        bounds = [(-1, -1)] + ordered + [(len(self.ai), len(self.human))]
+        ai_parts, human_parts = [], []
+        for (ai_a, human_a), (ai_b, human_b) in zip(bounds, bounds[1:]):
+            ai_seg, human_seg = self._segment(ai_a + 1, ai_b, human_a + 1, human_b)
+            ai_parts += [ai_seg, np.array([ai_b])]
+            human_parts += [human_seg, np.array([human_b])]
+        # The last part is the sentinel bound, not a real anchor.
+        ai_idx = np.concatenate(ai_parts[:-1]).astype(np.int64)
+        human_idx = np.concatenate(human_parts[:-1]).astype(np.int64)
+        return list(zip(ai_idx.tolist(), human_idx.tolist()))
 
+    def _segment(self, ai_lo: int, ai_hi: int, human_lo: int, human_hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (ai_lo, ai_hi, human_lo, human_hi)
+        cached = self._segments.get(key)
+        if cached is not None:
+            self._segments.move_to_end(key)
+            return cached
+        if ai_lo >= ai_hi or human_lo >= human_hi:
+            result = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        elif self.mode == "text":
+            # Slices are new tracks, so their features are sliced from the whole tracks'
+            # (computed once per track) instead of being computed per segment
+            pairs = align_by_text(
+                self.ai[ai_lo:ai_hi], self.human[human_lo:human_hi], min_similarity=self.min_similarity,
+                ai_features=text_features(self.ai)[ai_lo:ai_hi],
+                human_features=text_features(self.human)[human_lo:human_hi],
+            )
+            pos = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+            result = (pos[:, 0] + ai_lo, pos[:, 1] + human_lo)
+        else:
+            result = self._match_segment(ai_lo, ai_hi, human_lo, human_hi)
+        self._segments[key] = result
+        if len(self._segments) > self.max_cached_segments:
+            self._segments.popitem(last=False)
+        return result
 
-def auto_align(ai_events: List[SubtitleEvent], human_events: List[SubtitleEvent]) -> List[Tuple[int, int]]:
-    length = min(len(ai_events), len(human_events))
-    return [(i, i) for i in range(length)]
+    def _match_segment(self, ai_lo: int, ai_hi: int, human_lo: int, human_hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        ai_start, ai_end = self.ai.start_ms[ai_lo:ai_hi], self.ai.end_ms[ai_lo:ai_hi]
+        # Offsets (human - ai) at the bounding anchors, interpolated across the segment.
+        xs, offsets = [], []
+        if ai_lo > 0:
+            xs.append(self.ai.start_ms[ai_lo - 1])
+            offsets.append(self.human.start_ms[human_lo - 1] - self.ai.start_ms[ai_lo - 1])
+        if ai_hi < len(self.ai):
+            xs.append(self.ai.start_ms[ai_hi])
+            offsets.append(self.human.start_ms[human_hi] - self.ai.start_ms[ai_hi])
+        if len(xs) == 2 and xs[0] < xs[1]:
+            shift = np.rint(np.interp(ai_start, xs, offsets)).astype(np.int64)
+        elif offsets:
+            shift = int(offsets[0])
+        else:
+            shift = estimate_offset(self.ai[ai_lo:ai_hi], self.human[human_lo:human_hi])
+        ai_order = np.argsort(ai_start, kind="stable")
+        human_order = np.argsort(self.human.start_ms[human_lo:human_hi], kind="stable")
+        mapped_start, mapped_end = (ai_start + shift)[ai_order], (ai_end + shift)[ai_order]
+        ai_pos, human_pos = match_intervals(
+            mapped_start, mapped_end,
+            self.human.start_ms[human_lo:human_hi][human_order],
+            self.human.end_ms[human_lo:human_hi][human_order],
+            self.min_overlap,
+        )
+        ai_idx, human_idx = ai_order[ai_pos] + ai_lo, human_order[human_pos] + human_lo
+        order = np.lexsort((human_idx, ai_idx))
+        return ai_idx[order], human_idx[order]
 
 
-def refine_alignment_with_anchors(ai_events: List[SubtitleEvent], human_events: List[SubtitleEvent], anchors: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
-    if anchors:
-        return anchors
-    return auto_align(ai_events, human_events)
+def refine_alignment_with_anchors(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Sequence[SubtitleEvent],
+    anchors: List[Tuple[int, int]],
+    aligner: Optional[PiecewiseAligner] = None,
+    **align_options,
+) -> List[Tuple[int, int]]:
+    """
+    Align the segments between anchors independently and return them together with the
+    anchors. Pass a PiecewiseAligner kept for the same pair of tracks to reuse the
+    segments that earlier calls already aligned; otherwise one is built with
+    align_options.
+    """
+    if aligner is None:
+        aligner = PiecewiseAligner(ai_events, human_events, **align_options)
+    return aligner.align(anchors)
@@ -0,0 +1,190 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+
+
+# Frame-rate conversions commonly seen between AI transcripts and human references.
+COMMON_SCALES: Tuple[float, ...] = (
+    1.0,
+    25 / 23.976, 23.976 / 25,
+    25 / 24, 24 / 25,
+    24 / 23.976, 23.976 / 24,
+    30 / 29.97, 29.97 / 30,
+)
+
+
+@dataclass
+class DriftEstimate:
+    """Linear timing map human_ms ~= scale * ai_ms + offset_ms."""
+    scale: float = 1.0
+    offset_ms: int = 0
+    score: float = 0.0  # share of human speech time covered by the mapped AI track
+
+    def apply(self, track: SubtitleTrack) -> SubtitleTrack:
+        if self.scale == 1.0 and self.offset_ms == 0:
+            return track
+        starts = np.rint(track.start_ms * self.scale + self.offset_ms).astype(np.int64)
+        ends = np.rint(track.end_ms * self.scale + self.offset_ms).astype(np.int64)
+        return track.retimed(starts, ends)
+
+
+class DriftReference:
+    """
+    The human side of estimate_drift, prepared once so several AI tracks can be
+    measured against it: cue starts in sorted order and the FFT of the speech raster,
+    cached per (resolution, FFT length). AI tracks of about the same duration share
+    the FFTs, since the raster only depends on the longer of the two tracks.
+    """
+
+    def __init__(self, human_events: Sequence[SubtitleEvent]):
+        self.track = as_track(human_events)
+        self.order = np.argsort(self.track.start_ms, kind="stable")
+        self.starts = self.track.start_ms[self.order]
+        self._spectra: Dict[Tuple[int, int], Tuple[np.ndarray, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.track)
+
+    def spectrum(self, resolution_ms: int, length: int, n: int) -> Tuple[np.ndarray, float]:
+        """(rfft of the speech raster zero-padded to n, speech samples) for a raster of length samples."""
+        key = (resolution_ms, n)
+        cached = self._spectra.get(key)
+        if cached is None:
+            # Any length that covers the track gives the same raster up to zero padding.
+            signal = rasterize(self.track.start_ms, self.track.end_ms, resolution_ms, length)
+            cached = self._spectra[key] = (np.fft.rfft(signal, n), max(float(signal.sum()), 1.0))
+        return cached
+
+
+def _raster_size(span_ms: int, resolution_ms: int, max_offset_ms: int) -> Tuple[int, int, int]:
+    """(max lag, raster length, FFT length) so that lags up to max_offset_ms never wrap around."""
+    max_lag = max(max_offset_ms // resolution_ms, 0)
+    n = _next_fast_len(span_ms // resolution_ms + 2 + max_lag)
+    return max_lag, n - max_lag, n
+
+
+def rasterize(starts_ms: np.ndarray, ends_ms: np.ndarray, resolution_ms: int, length: int) -> np.ndarray:
+    """Return a 0/1 float "speech active" signal with one sample per resolution_ms."""
+    first = np.clip(starts_ms // resolution_ms, 0, length)
+    last = np.clip(-(-ends_ms // resolution_ms), 0, length)
+    edges = np.bincount(first, minlength=length + 1) - np.bincount(last, minlength=length + 1)
+    return (np.cumsum(edges[:length]) > 0).astype(np.float64)
+
+
+def _next_fast_len(n: int) -> int:
+    """Smallest 2-3-5-smooth length >= n, which pocketfft transforms efficiently."""
+    best = 1 << max(int(n - 1).bit_length(), 1)
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p235 = p35
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _correlation_peak(human_fft: np.ndarray, n: int, ai_signal: np.ndarray, max_lag: int) -> Tuple[int, float]:
+    """Best lag (in samples, AI shifted later for positive lags) of the circular cross-correlation."""
+    corr = np.fft.irfft(human_fft * np.conj(np.fft.rfft(ai_signal, n)), n)
+    lags = np.concatenate((np.arange(0, max_lag + 1), np.arange(-max_lag, 0)))
+    window = np.concatenate((corr[:max_lag + 1], corr[n - max_lag:] if max_lag else corr[:0]))
+    best = int(np.argmax(window))
+    return int(lags[best]), float(window[best])
+
+
+def _fit_pairs(ai_starts: np.ndarray, human_starts: np.ndarray, est: DriftEstimate, tolerance_ms: int) -> DriftEstimate:
+    """Refine a coarse estimate by a robust linear fit over mutually nearest cue starts."""
+    # The fit needs 8 pairs, each with a human cue of its own; fewer cues would
+    # also leave no valid neighbour range for the clipped search below.
+    if len(human_starts) < 8:
+        return est
+    mapped = ai_starts * est.scale + est.offset_ms
+    pos = np.clip(np.searchsorted(human_starts, mapped), 1, len(human_starts) - 1)
+    left, right = human_starts[pos - 1], human_starts[pos]
+    nearest = np.where(mapped - left <= right - mapped, pos - 1, pos)
+    close = np.abs(human_starts[nearest] - mapped) <= tolerance_ms
+    # Keep only pairs whose human cue is claimed by a single AI cue.
+    claimed = np.bincount(nearest[close], minlength=len(human_starts))
+    keep = close & (claimed[nearest] == 1)
+    if keep.sum() < 8:
+        return est
+    x, y = ai_starts[keep].astype(np.float64), human_starts[nearest[keep]].astype(np.float64)
+    for _ in range(2):
+        scale, offset = np.polyfit(x, y, 1)
+        resid = np.abs(y - (scale * x + offset))
+        cutoff = max(3 * np.median(resid), 1.0)
+        inliers = resid <= cutoff
+        if inliers.sum() < 8:
+            break
+        x, y = x[inliers], y[inliers]
+    return DriftEstimate(float(scale), int(round(offset)), est.score)
+
+
+def estimate_drift(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Union[Sequence[SubtitleEvent], DriftReference],
+    max_offset_ms: int = 60000,
+    scales: Sequence[float] = COMMON_SCALES,
+    resolution_ms: int = 200,
+    scale_step: float = 0.002,
+    scale_steps: int = 2,
+    executor: Optional[Executor] = None,
+) -> DriftEstimate:
+    """
+    Estimate offset and linear drift of the AI track against the human track.
+
+    Coarse stage: both tracks are rasterized into speech-active signals and each candidate
+    scale is scored by its FFT cross-correlation peak within +-max_offset_ms; the common
+    frame-rate ratios are screened at 4 * resolution_ms, then a small grid around the
+    winner is scored at resolution_ms.
+    Fine stage: the best map is refined with a robust least-squares fit over cue starts
+    that it brings within two raster cells of each other.
+
+    human_events may be a DriftReference to reuse its sorted starts and raster FFTs.
+    With a thread pool executor the candidate scales of each stage are scored
+    concurrently; numpy's FFTs release the GIL, and the result does not change.
+    """
+    reference = human_events if isinstance(human_events, DriftReference) else DriftReference(human_events)
+    ai, human = as_track(ai_events), reference.track
+    if not len(ai) or not len(human):
+        return DriftEstimate()
+    max_scale = max(max(scales), 1.0) * (1.0 + scale_step * scale_steps)
+    span_ms = int(max(int(human.end_ms.max()), int(ai.end_ms.max())) * max_scale)
+
+    def scorer(res: int):
+        max_lag, length, n = _raster_size(span_ms, res, max_offset_ms)
+        human_fft, speech = reference.spectrum(res, length, n)
+
+        def score(scale: float) -> Tuple[float, int]:
+            signal = rasterize(
+                np.floor(ai.start_ms * scale).astype(np.int64),
+                np.ceil(ai.end_ms * scale).astype(np.int64),
+                res, length,
+            )
+            lag, value = _correlation_peak(human_fft, n, signal, max_lag)
+            return value / speech, lag * res
+        return score
+
+    def pick(results) -> float:
+        # Only move away from the identity map when another scale is clearly better.
+        return max(results, key=lambda s: results[s][0] * (1.01 if s == 1.0 else 1.0))
+
+    # Screen the candidate scales on a 4x coarser raster, then search around the winner.
+    screen = scorer(4 * resolution_ms)
+    mapper = executor.map if executor is not None else map
+    best = pick(dict(zip(scales, mapper(screen, scales))))
+    fine = [best * (1 + k * scale_step) for k in range(-scale_steps, scale_steps + 1)]
+    results = dict(zip(fine, mapper(scorer(resolution_ms), fine)))
+    best = pick(results)
+    value, offset = results[best]
+    coarse = DriftEstimate(best, offset, value)
+    return _fit_pairs(np.sort(ai.start_ms), reference.starts, coarse, 2 * resolution_ms)
@@ -0,0 +1,179 @@
+import re
+import weakref
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+
+
+NGRAM = 3
+SIGNATURE_SIZE = 32
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x5EED)
+_HASH_A = _rng.integers(1, _PRIME, SIGNATURE_SIZE, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _PRIME, SIGNATURE_SIZE, dtype=np.uint64)
+_WORD_RE = re.compile(r"\w+")
+
+_feature_cache: "weakref.WeakKeyDictionary[SubtitleTrack, TextFeatures]" = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class TextFeatures:
+    """MinHash signatures of each cue's character n-gram set."""
+    signatures: np.ndarray  # (n, SIGNATURE_SIZE) uint32
+    empty: np.ndarray       # (n,) bool, cue has no n-grams
+
+    def __getitem__(self, cues: slice) -> "TextFeatures":
+        """Features of a range of cues, as views of these arrays."""
+        return TextFeatures(self.signatures[cues], self.empty[cues])
+
+
+def pair_similarity(a: TextFeatures, b: TextFeatures, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of cue pairs (a[rows], b[cols]); arrays broadcast."""
+    sims = (a.signatures[rows] == b.signatures[cols]).mean(axis=-1, dtype=np.float32)
+    return np.where(a.empty[rows] | b.empty[cols], np.float32(0), sims)
+
+
+def _normalize(text: str) -> str:
+    return " " + " ".join(_WORD_RE.findall(text.lower())) + " "
+
+
+def compute_text_features(texts: Sequence[str]) -> TextFeatures:
+    """Vectorized MinHash over character n-grams of all texts at once."""
+    n = len(texts)
+    codes = np.frombuffer("\0".join(_normalize(t) for t in texts).encode("utf-32-le"), dtype=np.uint32)
+    codes = codes.astype(np.uint64)
+    cue = np.cumsum(codes == 0)
+    count = max(len(codes) - NGRAM + 1, 0)
+    valid = np.ones(count, dtype=bool)
+    grams = np.zeros(count, dtype=np.uint64)
+    for k in range(NGRAM):
+        part = codes[k:k + count]
+        valid &= part != 0
+        grams = (grams * np.uint64(0x01000193) + part) & np.uint64(0xFFFFFFFF)
+    grams, owner = grams[valid], cue[:count][valid]
+    counts = np.bincount(owner, minlength=n)
+    signatures = np.full((n, SIGNATURE_SIZE), _PRIME, dtype=np.uint32)
+    nonempty = counts > 0
+    if len(grams):
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        for k in range(SIGNATURE_SIZE):
+            hashed = (_HASH_A[k] * grams + _HASH_B[k]) % np.uint64(_PRIME)
+            signatures[nonempty, k] = np.minimum.reduceat(hashed, starts)
+    return TextFeatures(signatures, ~nonempty)
+
+
+def text_features(track: SubtitleTrack) -> TextFeatures:
+    """Features for a track, computed once and cached for the lifetime of the track."""
+    features = _feature_cache.get(track)
+    if features is None:
+        features = compute_text_features(track.texts())
+        _feature_cache[track] = features
+    return features
+
+
+def _band(n: int, m: int, width: int) -> Tuple[np.ndarray, int]:
+    """First column of each row's fixed-width band around the proportional diagonal."""
+    size = min(2 * width + 1, m)
+    center = np.rint(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(np.int64)
+    return np.clip(center - width, 0, m - size), size
+
+
+def _banded_dtw(ai: TextFeatures, human: TextFeatures, width: int, gap: float, chunk: int = 4096):
+    """
+    Maximize the sum of (similarity - gap) along a monotone path from (0, 0) to
+    (n-1, m-1) with diagonal, vertical (N:1) and horizontal (1:N) steps.
+
+    Band similarities are computed up front in vectorized row chunks. Rows are then
+    processed one at a time; the horizontal dependency inside a row is a max-plus
+    prefix scan, so each row is a handful of array operations and only O(n * width)
+    back-pointers are stored.
+    Returns the path as (rows, cols) arrays and whether it ran along the band edge.
+    """
+    n, m = len(ai.empty), len(human.empty)
+    lo, size = _band(n, m, width)
+    offsets = np.arange(size)
+    scores = np.empty((n, size), dtype=np.float32)
+    for r in range(0, n, chunk):
+        rows = np.arange(r, min(r + chunk, n))
+        scores[rows] = pair_similarity(ai, human, rows[:, None], lo[rows, None] + offsets) - gap
+    moves = np.empty((n, size), dtype=np.int8)
+    padded = np.full(2 * size + 2, -np.inf)
+    row = np.full(size, -np.inf)
+    for i in range(n):
+        score = scores[i]
+        if i == 0:
+            best_in = np.full(size, -np.inf)
+            best_in[0] = 0.0
+            src = np.zeros(size, dtype=np.int8)
+        else:
+            shift = lo[i] - lo[i - 1]
+            padded[1:size + 1] = row
+            diag = padded[shift:shift + size]
+            up = padded[shift + 1:shift + 1 + size]
+            src = (diag < up).astype(np.int8)
+            best_in = np.maximum(diag, up)
+        # row[j] = max(best_in[j], row[j-1]) + score[j], solved as a prefix scan.
+        prefix = np.cumsum(score, dtype=np.float64)
+        entry = best_in - (prefix - score)
+        running = np.maximum.accumulate(entry)
+        row = running + prefix
+        moves[i] = np.where(entry >= running, src, 2)
+
+    rows, cols = [], []
+    i, j = n - 1, m - 1
+    touched = False
+    while True:
+        rows.append(i)
+        cols.append(j)
+        k = j - lo[i]
+        if (k == 0 and lo[i] > 0) or (k == size - 1 and lo[i] + size < m):
+            touched = True
+        if i == 0 and j == 0:
+            break
+        move = moves[i, k]
+        if move == 0:
+            i, j = i - 1, j - 1
+        elif move == 1:
+            i -= 1
+        else:
+            j -= 1
+    return np.array(rows[::-1]), np.array(cols[::-1]), touched
+
+
+def align_by_text(
+    ai_events: Sequence[SubtitleEvent],
+    human_events: Sequence[SubtitleEvent],
+    min_similarity: float = 0.2,
+    band: int = 16,
+    max_band: int = 4096,
+    human_features: Optional[TextFeatures] = None,
+    ai_features: Optional[TextFeatures] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Monotone text-driven alignment by banded DTW over MinHash n-gram similarities.
+
+    The band starts at band columns either side of the proportional diagonal and doubles, up to max_band, while the best path runs along
+    its edge. Path cells with similarity below min_similarity are left unmatched.
+    human_features and ai_features may be passed in when they were computed
+    beforehand, e.g. sliced from the features of a whole track.
+    """
+    ai, human = as_track(ai_events), as_track(human_events)
+    if not len(ai) or not len(human):
+        return []
+    if ai_features is None:
+        ai_features = text_features(ai)
+    if human_features is None:
+        human_features = text_features(human)
+    # The band must at least cover the diagonal's slope to stay connected.
+    width = max(band, -(-max(len(ai), len(human)) // min(len(ai), len(human))) + 1)
+    while True:
+        rows, cols, touched = _banded_dtw(ai_features, human_features, width, min_similarity)
+        if not touched or width >= max_band or width >= max(len(ai), len(human)):
+            break
+        width *= 2
+    keep = pair_similarity(ai_features, human_features, rows, cols) >= min_similarity
+    return list(zip(rows[keep].tolist(), cols[keep].tolist()))
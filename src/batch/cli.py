@@ -0,0 +1,190 @@
+"""
+Command-line entry point: ``python -m batch`` (or ``python main.py <args>``).
+
+Only argparse/json/csv are imported up front; the parsing, alignment and pool
+machinery load once the arguments are known, and nothing here touches Qt.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+_PATH_KEYS = ("ai_path", "human_path", "output_path")
+_TRUE = {"1", "true", "yes", "y", "on"}
+
+
+def parse_anchors(text: str) -> List[Tuple[int, int]]:
+    """Parse "ai:human" pairs separated by commas or semicolons, e.g. "0:0,12:15"."""
+    anchors = []
+    for item in text.replace(";", ",").split(","):
+        item = item.strip()
+        if item:
+            ai, _, human = item.partition(":")
+            anchors.append((int(ai), int(human)))
+    return anchors
+
+
+def _from_row(row: Dict[str, str]) -> Dict:
+    """Turn a CSV row into a batch config; empty optional columns are ignored."""
+    cfg: Dict = {key: row[key] for key in _PATH_KEYS}
+    if (row.get("anchors") or "").strip():
+        cfg["anchors"] = parse_anchors(row["anchors"])
+    if (row.get("mode") or "").strip():
+        cfg["align_options"] = {"mode": row["mode"].strip()}
+    if (row.get("normalize") or "").strip():
+        cfg["normalize"] = row["normalize"].strip().lower() in _TRUE
+    return cfg
+
+
+def load_manifest(path: str) -> Iterator[Dict]:
+    """
+    Yield batch configs from a .csv (header ai_path,human_path,output_path and optional
+    anchors/mode/normalize columns), a .jsonl file or a .json list (or {"pairs": [...]})
+    of process_batch configs, including fan-out configs with a human_path and a list
+    of targets. Relative paths are taken relative to the manifest file.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            configs: Iterator[Dict] = map(_from_row, csv.DictReader(f))
+        elif ext == ".jsonl":
+            configs = (json.loads(line) for line in f if line.strip())
+        else:
+            data = json.load(f)
+            configs = iter(data["pairs"] if isinstance(data, dict) else data)
+        for cfg in configs:
+            if "targets" in cfg:
+                # Fan-out: one human_path, then ai_path and output_path per target
+                checks = [(cfg, ("human_path",))] + [(t, ("ai_path", "output_path")) for t in cfg["targets"]]
+            else:
+                checks = [(cfg, _PATH_KEYS)]
+            for entry, keys in checks:
+                missing = [key for key in keys if not entry.get(key)]
+                if missing:
+                    raise ValueError(f"{path}: config is missing {', '.join(missing)}: {entry}")
+                for key in keys:
+                    entry[key] = os.path.join(base, os.path.expanduser(entry[key]))
+            yield cfg
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="subtitle-aligner",
+        description="Retime AI subtitles to match the timing of human subtitles.",
+    )
+    parser.add_argument("pair", nargs="*", metavar="AI HUMAN OUTPUT",
+                        help='one pair of input files and the output path ("-" for stdin/stdout)')
+    parser.add_argument("-m", "--manifest", help="JSON, JSONL or CSV file listing pairs to process")
+    parser.add_argument("--scan", nargs=3, metavar=("AI_DIR", "HUMAN_DIR", "OUT_DIR"),
+                        help="find pairs in two directory trees by file name, episode or fingerprint")
+    align = parser.add_argument_group("alignment")
+    align.add_argument("--anchors", type=parse_anchors, help='anchor pairs for a single pair, e.g. "0:0,12:15"')
+    align.add_argument("--mode", choices=("timing", "text"), help="align by cue timing (default) or by text")
+    align.add_argument("--min-overlap", type=float, help="minimum overlap of the shorter cue for a timing match")
+    align.add_argument("--align-workers", type=int, metavar="N",
+                       help="align each pair on N workers (for very long tracks; text mode "
+                            "is chunked and approximate, timing mode threads the drift search)")
+    norm = parser.add_argument_group("output timing")
+    norm.add_argument("--normalize", action="store_true", help="fix overlaps, flicker gaps and too short cues")
+    norm.add_argument("--min-duration", type=int, metavar="MS", help="minimum cue duration (implies --normalize)")
+    norm.add_argument("--min-gap", type=int, metavar="MS", help="minimum gap between cues (implies --normalize)")
+    norm.add_argument("--max-cps", type=float, help="maximum characters per second (implies --normalize)")
+    run = parser.add_argument_group("batch")
+    run.add_argument("-j", "--workers", type=int, default=1, help="pairs to process in parallel")
+    run.add_argument("--executor", choices=("process", "thread"), default="process")
+    run.add_argument("--timeout", type=float, metavar="SECONDS", help="time limit per pair")
+    run.add_argument("--report", metavar="PATH", help="write one JSON line per pair to PATH")
+    run.add_argument("--resume", metavar="DB", help="SQLite state file; unchanged pairs that succeeded are skipped")
+    run.add_argument("--cache", action="store_true",
+                     help="reuse parsed input tracks from an on-disk cache ($SUBTITLE_ALIGNER_CACHE_DIR or ~/.cache/subtitle-aligner/tracks)")
+    run.add_argument("--cache-dir", metavar="DIR", help="parsed-track cache directory (implies --cache)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    return parser
+
+
+def _options(args: argparse.Namespace) -> Tuple[Dict, Optional[Dict]]:
+    align_options = {}
+    if args.mode:
+        align_options["mode"] = args.mode
+    if args.min_overlap is not None:
+        align_options["min_overlap"] = args.min_overlap
+    limits = {
+        "min_duration_ms": args.min_duration,
+        "min_gap_ms": args.min_gap,
+        "max_cps": args.max_cps,
+    }
+    normalize = {key: value for key, value in limits.items() if value is not None}
+    return align_options, normalize if normalize or args.normalize else None
+
+
+def _configs(args: argparse.Namespace, align_options: Dict, normalize: Optional[Dict]) -> Iterator[Dict]:
+    if args.manifest:
+        configs: Iterator[Dict] = load_manifest(args.manifest)
+    elif args.scan:
+        from batch.discovery import discover_pairs
+        configs = discover_pairs(*args.scan)
+    else:
+        cfg: Dict = dict(zip(_PATH_KEYS, args.pair))
+        if args.anchors:
+            cfg["anchors"] = args.anchors
+        configs = iter([cfg])
+    for cfg in configs:
+        if align_options:
+            cfg["align_options"] = {**align_options, **(cfg.get("align_options") or {})}
+        if normalize is not None and "normalize" not in cfg:
+            cfg["normalize"] = normalize
+        if args.align_workers and "align_workers" not in cfg:
+            cfg["align_workers"] = args.align_workers
+        yield cfg
+
+
+def _stdio(cfg: Dict) -> Dict:
+    """Map "-" inputs to stdin; the writer already maps an output of "-" to stdout."""
+    for key in ("ai_path", "human_path"):
+        if cfg.get(key) == "-":
+            cfg[key] = sys.stdin.buffer
+    return cfg
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the CLI; returns 0 if every pair succeeded, 1 if any failed and 2 on usage errors."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if sum(map(bool, (args.pair, args.manifest, args.scan))) != 1 or (args.pair and len(args.pair) != 3):
+        parser.error("give one of AI HUMAN OUTPUT, --manifest FILE or --scan AI_DIR HUMAN_DIR OUT_DIR")
+    if not args.pair and args.anchors:
+        parser.error("--anchors applies to a single pair; put anchors in the manifest instead")
+    if args.pair[:2].count("-") > 1:
+        parser.error("only one input can be read from stdin")
+
+    from batch.batch_processor import process_batch
+    from parser.track_cache import default_cache_dir
+
+    align_options, normalize = _options(args)
+    configs = map(_stdio, _configs(args, align_options, normalize))
+    failed = 0
+    try:
+        results = process_batch(
+            configs, workers=args.workers, executor=args.executor, timeout=args.timeout,
+            report_path=args.report, manifest_path=args.resume,
+            cache_dir=args.cache_dir or (default_cache_dir() if args.cache else None),
+        )
+    except (OSError, ValueError) as exc:
+        print(f"subtitle-aligner: {exc}", file=sys.stderr)
+        return 1
+    for result in results:
+        if not result.ok:
+            failed += 1
+            print(f"{result.status}: {result.ai_path}: {result.error_type}: {result.error_message}", file=sys.stderr)
+        elif not args.quiet:
+            note = " (unchanged)" if result.cached else ""
+            print(
+                f"ok: {result.ai_path} -> {result.output_path}: "
+                f"{result.matched} pairs, {result.unmatched_ai} AI cues unmatched{note}",
+                file=sys.stderr,
+            )
+    return 1 if failed else 0
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from parser.subtitle_track import SubtitleTrack
+
+
+RULES = ("max_cps", "min_duration", "overlap", "min_gap", "shifted")
+
+
+@dataclass
+class TimingPolicy:
+    """Limits enforced by normalize_timing; 0 or None turns a rule off."""
+    min_duration_ms: int = 700
+    min_gap_ms: int = 80
+    max_cps: Optional[float] = 25.0
+    overlap: str = "trim"  # "trim" the earlier cue or "shift" the later ones back
+
+
+def normalize_timing(track: SubtitleTrack, policy: Optional[TimingPolicy] = None) -> Tuple[SubtitleTrack, Dict[str, int]]:
+    """
+    Make a retimed track playable: no overlaps, no gaps shorter than min_gap_ms, no cue
+    shorter than min_duration_ms (and never zero-length) or faster than max_cps.
+
+    Works on the timing arrays in start order, in linear time after the sort. Short
+    or fast cues are extended, but never into the gap before the next cue. Overlaps
+    and flicker gaps are then resolved by trimming the earlier cue or, with
+    overlap="shift" (or when a trim would leave nothing), by pushing later cues back.
+    Returns the new track, in start order (renumbered from 1 if it had to be sorted),
+    and the number of cues each rule changed.
+    """
+    policy = policy or TimingPolicy()
+    if policy.overlap not in ("trim", "shift"):
+        raise ValueError(f"Unknown overlap policy: {policy.overlap}")
+    counts = dict.fromkeys(RULES, 0)
+    n = len(track)
+    if not n:
+        return track, counts
+    order = np.argsort(track.start_ms, kind="stable")
+    in_order = bool(np.all(order == np.arange(n)))
+    start = track.start_ms[order].copy()
+    end = track.end_ms[order].copy()
+    gap = max(policy.min_gap_ms or 0, 0)
+
+    next_start = np.empty(n, dtype=np.int64)
+    next_start[:-1] = start[1:]
+    next_start[-1] = np.iinfo(np.int64).max // 2
+    # Every cue may grow to at least 1 ms; a cue that then runs into the next one
+    # (same start) is resolved below like any other overlap.
+    cap = np.maximum(np.maximum(end, start + 1), next_start - gap)
+    if policy.max_cps:
+        chars = track.char_counts()[order]
+        extended = np.maximum(end, np.minimum(start + np.ceil(chars * 1000 / policy.max_cps).astype(np.int64), cap))
+        counts["max_cps"] = int(np.count_nonzero(extended > end))
+        end = extended
+    extended = np.maximum(end, np.minimum(start + max(policy.min_duration_ms or 0, 1), cap))
+    counts["min_duration"] = int(np.count_nonzero(extended > end))
+    end = extended
+
+    limit = next_start[:-1] - gap
+    overlapping = end[:-1] > next_start[:-1]
+    tight = ~overlapping & (end[:-1] > limit)
+    counts["overlap"] = int(np.count_nonzero(overlapping))
+    counts["min_gap"] = int(np.count_nonzero(tight))
+    if policy.overlap == "trim":
+        end[:-1] = np.where(overlapping | tight, np.maximum(limit, start[:-1] + 1), end[:-1])
+
+    # Whatever still collides moves back: start'[i] = max(start[i], end'[i-1] + gap),
+    # solved for all cues at once with a running maximum over duration prefix sums.
+    duration = end - start
+    reach = np.zeros(n, dtype=np.int64)
+    np.cumsum(duration[:-1] + gap, out=reach[1:])
+    shifted = reach + np.maximum.accumulate(start - reach)
+    counts["shifted"] = int(np.count_nonzero(shifted > start))
+    start, end = shifted, shifted + duration
+
+    if in_order:
+        return track.retimed(start, end), counts
+    # Reordered cues are numbered afresh, so the written cue numbers stay sequential
+    return track.take(order).retimed(start, end, np.arange(1, n + 1, dtype=np.int64)), counts
@@ -0,0 +1,97 @@
+from typing import Optional, Sequence
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+from PyQt5.QtWidgets import QHeaderView, QTableView
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack
+
+
+HEADERS = ("#", "Time", "Text")
+# Rows measured by size_columns_from_sample.
+SAMPLE_ROWS = 200
+
+
+class SubtitleTableModel(QAbstractTableModel):
+    """
+    Read-only table over a list of events or a SubtitleTrack (#, Time, Text).
+
+    Nothing is copied or formatted up front: the view asks for the cells it is about
+    to paint and data() formats just those, reading a track's columns directly.
+    """
+
+    def __init__(self, events: Sequence[SubtitleEvent] = (), parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._events: Sequence[SubtitleEvent] = events
+
+    def set_events(self, events: Sequence[SubtitleEvent]) -> None:
+        self.beginResetModel()
+        self._events = events
+        self.endResetModel()
+
+    @property
+    def events(self) -> Sequence[SubtitleEvent]:
+        return self._events
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._events)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def cell_text(self, row: int, column: int) -> str:
+        events = self._events
+        if isinstance(events, SubtitleTrack):
+            if column == 0:
+                return str(int(events.index[row]))
+            if column == 1:
+                return f"{int(events.start_ms[row]) / 1000:.3f} → {int(events.end_ms[row]) / 1000:.3f}"
+            return events.text(row)
+        ev = events[row]
+        if column == 0:
+            return str(ev.index)
+        if column == 1:
+            return f"{ev.start:.3f} → {ev.end:.3f}"
+        return ev.text
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            text = self.cell_text(index.row(), index.column())
+            # Rows keep a uniform height, so line breaks are shown inline.
+            return text.replace("\n", " / ") if index.column() == 2 else text
+        if role == Qt.ToolTipRole and index.column() == 2:
+            return self.cell_text(index.row(), 2)
+        return None
+
+
+def configure_table_view(view: QTableView) -> None:
+    """Uniform row heights and no per-row measuring, so any number of rows opens instantly."""
+    view.setEditTriggers(QTableView.NoEditTriggers)
+    view.setSelectionBehavior(QTableView.SelectRows)
+    view.setSelectionMode(QTableView.SingleSelection)
+    view.setWordWrap(False)
+    rows = view.verticalHeader()
+    rows.setSectionResizeMode(QHeaderView.Fixed)
+    rows.setDefaultSectionSize(view.fontMetrics().height() + 6)
+    view.horizontalHeader().setStretchLastSection(True)
+
+
+def size_columns_from_sample(view: QTableView, sample: int = SAMPLE_ROWS) -> None:
+    """Size the # and Time columns from the first and last rows instead of scanning all of them."""
+    model = view.model()
+    n = model.rowCount()
+    rows = list(range(min(n, sample // 2))) + list(range(max(n - sample // 2, sample // 2), n))
+    metrics = view.fontMetrics()
+    padding = 2 * metrics.averageCharWidth() + 8
+    for column in range(model.columnCount() - 1):
+        header = model.headerData(column, Qt.Horizontal)
+        widest = max([metrics.horizontalAdvance(str(header))]
+                     + [metrics.horizontalAdvance(model.cell_text(row, column)) for row in rows])
+        view.setColumnWidth(column, widest + padding)
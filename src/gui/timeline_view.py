@@ -0,0 +1,228 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QRectF, QLineF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QPen
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack, as_track
+
+
+UNMATCHED, MATCHED, ANCHORED = 0, 1, 2
+STATE_COLOURS = {
+    UNMATCHED: QColor(200, 80, 80),
+    MATCHED: QColor(90, 160, 90),
+    ANCHORED: QColor(230, 150, 30),
+}
+LINK_COLOUR = QColor(120, 120, 120, 140)
+
+
+class AlignmentIndex:
+    """
+    Lookups precomputed from an alignment so views never scan it: the state of every
+    cue (unmatched, matched, anchored), the counterpart row for every row on either
+    side (the nearest match at or before it) and the pairs ordered by either side.
+    """
+
+    def __init__(self, n_ai: int, n_human: int, alignment: Sequence[Tuple[int, int]] = (),
+                 anchors: Sequence[Tuple[int, int]] = ()):
+        pairs = np.asarray(alignment, dtype=np.int64).reshape(-1, 2)
+        anchor_pairs = np.asarray(anchors, dtype=np.int64).reshape(-1, 2)
+        self.pairs_by_ai = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        self.pairs_by_human = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+        self.ai_state = np.zeros(n_ai, dtype=np.int8)
+        self.human_state = np.zeros(n_human, dtype=np.int8)
+        self.ai_state[pairs[:, 0]] = MATCHED
+        self.human_state[pairs[:, 1]] = MATCHED
+        self.ai_state[anchor_pairs[:, 0]] = ANCHORED
+        self.human_state[anchor_pairs[:, 1]] = ANCHORED
+        self.ai_to_human = self._counterpart(self.pairs_by_ai, n_ai, n_human)
+        self.human_to_ai = self._counterpart(self.pairs_by_human[:, ::-1], n_human, n_ai)
+
+    @staticmethod
+    def _counterpart(pairs: np.ndarray, n_from: int, n_to: int) -> np.ndarray:
+        rows = np.arange(n_from, dtype=np.int64)
+        if not len(pairs):
+            return rows * max(n_to - 1, 0) // max(n_from - 1, 1)
+        first = pairs[np.r_[True, pairs[1:, 0] != pairs[:-1, 0]]]
+        at = np.searchsorted(first[:, 0], rows, side="right") - 1
+        return first[np.maximum(at, 0), 1]
+
+    def pairs_touching(self, ai_rows: np.ndarray, human_rows: np.ndarray) -> np.ndarray:
+        """Pairs with an AI row within the span of ai_rows or a human row within human_rows (sorted)."""
+        by_ai, by_human = self.pairs_by_ai, self.pairs_by_human
+        parts = [np.zeros((0, 2), dtype=np.int64)]
+        ai_lo = ai_hi = 0
+        if len(ai_rows):
+            ai_lo = np.searchsorted(by_ai[:, 0], ai_rows[0], side="left")
+            ai_hi = np.searchsorted(by_ai[:, 0], ai_rows[-1], side="right")
+            parts.append(by_ai[ai_lo:ai_hi])
+        if len(human_rows):
+            lo = np.searchsorted(by_human[:, 1], human_rows[0], side="left")
+            hi = np.searchsorted(by_human[:, 1], human_rows[-1], side="right")
+            extra = by_human[lo:hi]
+            if ai_hi > ai_lo:
+                # Leave out the pairs already taken from the AI side
+                extra = extra[(extra[:, 0] < ai_rows[0]) | (extra[:, 0] > ai_rows[-1])]
+            parts.append(extra)
+        return np.concatenate(parts)
+
+
+class _Lane:
+    """A track's intervals in start order with a running maximum of ends, for window queries."""
+
+    def __init__(self, track: SubtitleTrack):
+        self.order = np.argsort(track.start_ms, kind="stable")
+        self.starts = track.start_ms[self.order]
+        self.ends = track.end_ms[self.order]
+        self.reach = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def visible(self, t0: int, t1: int) -> np.ndarray:
+        """Positions (in start order) of intervals overlapping [t0, t1)."""
+        lo = np.searchsorted(self.reach, t0, side="right")
+        hi = np.searchsorted(self.starts, t1, side="left")
+        if hi <= lo:
+            return np.zeros(0, dtype=np.int64)
+        pos = np.arange(lo, hi)
+        return pos[self.ends[pos] > t0]
+
+
+class AlignmentTimeline(QWidget):
+    """
+    Two interval lanes (AI on top, human below) over a scrollable time window with
+    a line for every matched pair, coloured by cue state.
+
+    Only cues overlapping the visible window are looked up (binary search on start
+    order and running end maxima), and when zoomed out they are collapsed to one
+    rectangle per pixel column and state, so painting cost depends on the widget
+    width rather than the track length. Wheel scrolls, Ctrl+wheel zooms.
+    """
+
+    cueClicked = pyqtSignal(str, int)  # "ai" or "human", row
+    windowChanged = pyqtSignal(int, int)  # start_ms, end_ms
+
+    MIN_SPAN_MS = 1000
+    LANE_HEIGHT = 22
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setMinimumHeight(3 * self.LANE_HEIGHT + 20)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.start_ms = 0
+        self.span_ms = 60000
+        self._ai: Optional[SubtitleTrack] = None
+        self._human: Optional[SubtitleTrack] = None
+        self._lanes: List[Optional[_Lane]] = [None, None]
+        self.index: Optional[AlignmentIndex] = None
+
+    def set_tracks(self, ai: Sequence[SubtitleEvent], human: Sequence[SubtitleEvent]) -> None:
+        self._ai = as_track(ai) if len(ai) else None
+        self._human = as_track(human) if len(human) else None
+        self._lanes = [_Lane(t) if t is not None else None for t in (self._ai, self._human)]
+        self.set_alignment([], [])
+
+    def set_alignment(self, alignment: Sequence[Tuple[int, int]], anchors: Sequence[Tuple[int, int]]) -> None:
+        n_ai = len(self._ai) if self._ai is not None else 0
+        n_human = len(self._human) if self._human is not None else 0
+        self.index = AlignmentIndex(n_ai, n_human, alignment, anchors)
+        self.update()
+
+    def scroll_to(self, ms: int) -> None:
+        """Put ms a fifth of the way into the window."""
+        start = max(int(ms) - self.span_ms // 5, 0)
+        if start != self.start_ms:
+            self.start_ms = start
+            self.windowChanged.emit(self.start_ms, self.start_ms + self.span_ms)
+            self.update()
+
+    def zoom(self, factor: float, at_ms: Optional[int] = None) -> None:
+        at_ms = self.start_ms + self.span_ms // 2 if at_ms is None else at_ms
+        span = max(int(self.span_ms * factor), self.MIN_SPAN_MS)
+        self.start_ms = max(int(at_ms - (at_ms - self.start_ms) * span / self.span_ms), 0)
+        self.span_ms = span
+        self.windowChanged.emit(self.start_ms, self.start_ms + self.span_ms)
+        self.update()
+
+    def _x(self, ms: np.ndarray) -> np.ndarray:
+        return (ms - self.start_ms) * (self.width() / self.span_ms)
+
+    def _lane_rows(self, side: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, x0, x1, state) of the visible cues of one lane, merged per pixel column."""
+        lane = self._lanes[side]
+        if lane is None or self.index is None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        pos = lane.visible(self.start_ms, self.start_ms + self.span_ms)
+        rows = lane.order[pos]
+        state = (self.index.ai_state, self.index.human_state)[side][rows]
+        x0 = np.floor(self._x(lane.starts[pos])).astype(np.int64)
+        x1 = np.maximum(np.ceil(self._x(lane.ends[pos])).astype(np.int64), x0 + 1)
+        if len(rows) > self.width():
+            # More cues than pixels: merge per state into runs of covered pixel columns.
+            # Positions are in start order, so x0 is already sorted within each state.
+            parts = []
+            for code in STATE_COLOURS:
+                sel = np.flatnonzero(state == code)
+                if len(sel):
+                    # Runs of touching columns become one rectangle
+                    xs, reach = x0[sel], np.maximum.accumulate(x1[sel])
+                    first = np.flatnonzero(np.r_[True, xs[1:] > reach[:-1]])
+                    parts.append((rows[sel][first], xs[first], np.maximum.reduceat(x1[sel], first), state[sel][first]))
+            rows, x0, x1, state = (np.concatenate(col) for col in zip(*parts))
+        return rows, x0, x1, state
+
+    def _lane_top(self, side: int) -> float:
+        return 10 + side * 2 * self.LANE_HEIGHT
+
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        lanes = [self._lane_rows(side) for side in (0, 1)]
+        if self.index is not None and len(self.index.pairs_by_ai):
+            self._paint_links(painter, np.sort(lanes[0][0]), np.sort(lanes[1][0]))
+        for side, (rows, x0, x1, state) in enumerate(lanes):
+            top = self._lane_top(side)
+            for code, colour in STATE_COLOURS.items():
+                sel = state == code
+                if not sel.any():
+                    continue
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(colour)
+                height = self.LANE_HEIGHT
+                painter.drawRects([QRectF(a, top, max(b - a - 1, 1), height)
+                                   for a, b in zip(x0[sel].tolist(), x1[sel].tolist())])
+        painter.end()
+
+    def _paint_links(self, painter: QPainter, ai_rows: np.ndarray, human_rows: np.ndarray) -> None:
+        pairs = self.index.pairs_touching(ai_rows, human_rows)
+        if len(pairs) > self.width():
+            pairs = pairs[:: len(pairs) // self.width() + 1]
+        if not len(pairs):
+            return
+        ai_mid = self._x((self._ai.start_ms[pairs[:, 0]] + self._ai.end_ms[pairs[:, 0]]) / 2)
+        human_mid = self._x((self._human.start_ms[pairs[:, 1]] + self._human.end_ms[pairs[:, 1]]) / 2)
+        y0 = self._lane_top(0) + self.LANE_HEIGHT
+        y1 = self._lane_top(1)
+        painter.setPen(QPen(LINK_COLOUR, 1))
+        painter.drawLines([QLineF(a, y0, b, y1) for a, b in zip(ai_mid.tolist(), human_mid.tolist())])
+
+    def wheelEvent(self, event) -> None:
+        steps = event.angleDelta().y() / 120
+        if event.modifiers() & Qt.ControlModifier:
+            at = self.start_ms + int(event.pos().x() / max(self.width(), 1) * self.span_ms)
+            self.zoom(0.8 ** steps, at)
+        else:
+            self.scroll_to(self.start_ms + self.span_ms // 5 - int(steps * self.span_ms / 10))
+        event.accept()
+
+    def mousePressEvent(self, event) -> None:
+        y = event.pos().y()
+        for side, name in ((0, "ai"), (1, "human")):
+            top = self._lane_top(side)
+            if top <= y < top + self.LANE_HEIGHT and self._lanes[side] is not None:
+                ms = self.start_ms + event.pos().x() / max(self.width(), 1) * self.span_ms
+                hits = self._lanes[side].visible(int(ms), int(ms) + 1)
+                if len(hits):
+                    self.cueClicked.emit(name, int(self._lanes[side].order[hits[-1]]))
+                return
@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class Cancelled(Exception):
+    """Raised inside a job by Worker.check() once the job has been cancelled."""
+
+
+class WorkerSignals(QObject):
+    # Each signal carries the worker so one slot can serve every job.
+    progress = pyqtSignal(object, int, str)  # worker, percent (-1 if unknown), message
+    finished = pyqtSignal(object, object)  # worker, result
+    failed = pyqtSignal(object, str)  # worker, error message
+    stopped = pyqtSignal(object)  # worker; always last, also after a cancel
+
+
+class Worker(QRunnable):
+    """
+    Run fn(worker, *args) on a QThreadPool thread and report back through signals,
+    which Qt delivers on the thread that created the worker (the GUI thread).
+
+    Cancelling is cooperative: the job may call check() between steps to stop early,
+    and anything it returns after cancel() is never emitted. `kind` and `version`
+    are free for the owner to tag the job with, e.g. to drop results computed for
+    data that has since been replaced.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, kind: str = "", version: int = 0):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kind = kind
+        self.version = version
+        self.on_done: Optional[Callable[[Any], None]] = None
+        self.signals = WorkerSignals()
+        # The owner keeps a reference until `stopped`; Qt must not delete it under us.
+        self.setAutoDelete(False)
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def progress(self, percent: int, message: str = "") -> None:
+        if not self._cancelled.is_set():
+            self.signals.progress.emit(self, percent, message)
+
+    def run(self) -> None:
+        try:
+            result = self.fn(self, *self.args)
+        except Cancelled:
+            pass
+        except Exception as exc:
+            if not self.cancelled:
+                self.signals.failed.emit(self, str(exc) or type(exc).__name__)
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(self, result)
+        finally:
+            self.signals.stopped.emit(self)
@@ -0,0 +1,208 @@
+import mmap
+import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from parser.subtitle_parser import _guess_format, _parse_timing_line
+from parser.subtitle_track import _TIMING_WIDTH, SubtitleTrack, _parse_timing_matrix, load_track
+
+
+# Bytes per chunk; chunks are cut at blank lines so no cue straddles two of them.
+CHUNK_SIZE = 16 << 20
+_BOM = b"\xef\xbb\xbf"
+# ASCII whitespace as str.strip() sees it (including the \x1c-\x1f separators).
+_ASCII_SPACE = b" \t\n\r\f\v\x1c\x1d\x1e\x1f"
+_BLANK_LINE_RE = re.compile(rb"\n[ \t\r\f\v\x1c-\x1f]*\n")
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(_ASCII_SPACE)] = True
+# UTF-8 encodings of the other characters str.strip() removes (U+0085, U+00A0, U+2000...),
+# as big-endian integers by encoded width.
+_UNICODE_SPACES = [chr(c).encode("utf-8") for c in range(0x80, 0x3001) if chr(c).isspace()]
+_UNICODE_SPACE_CODES = {
+    width: np.array([int.from_bytes(e, "big") for e in _UNICODE_SPACES if len(e) == width], dtype=np.int64)
+    for width in (2, 3)
+}
+
+
+class _UnicodeSpaceEdge(Exception):
+    """A line starts or ends with non-ASCII whitespace; the line parser handles the file."""
+
+
+# Longest line still checked for being an all-digit SRT index line.
+_MAX_INDEX_WIDTH = 12
+
+
+def _strip_spans(ws: np.ndarray, line_start: np.ndarray, line_end: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Strip whitespace from every [line_start, line_end) span. Only lines that actually
+    start or end with whitespace take part in each step, so the usual cost is a couple
+    of gathers; blank lines come out with cs == ce.
+    """
+    cs, ce = line_start.copy(), line_end.copy()
+    active = np.flatnonzero(cs < ce)
+    active = active[ws[cs[active]]]
+    while len(active):
+        cs[active] += 1
+        active = active[cs[active] < ce[active]]
+        active = active[ws[cs[active]]]
+    active = np.flatnonzero(cs < ce)
+    active = active[ws[ce[active] - 1]]
+    while len(active):
+        ce[active] -= 1
+        active = active[cs[active] < ce[active]]
+        active = active[ws[ce[active] - 1]]
+    return cs, ce
+
+
+def _unicode_space_edge(buf: np.ndarray, cs: np.ndarray, ce: np.ndarray) -> bool:
+    """Whether any non-empty [cs, ce) span starts or ends with non-ASCII whitespace."""
+    for width, codes in _UNICODE_SPACE_CODES.items():
+        wide = ce - cs >= width
+        for at in (cs[wide], ce[wide] - width):
+            # Only spans starting with a lead byte of one of the codes can match
+            at = at[np.isin(buf[at], codes >> (8 * (width - 1)))]
+            value = np.zeros(len(at), dtype=np.int64)
+            for k in range(width):
+                value = (value << 8) | buf[at + k]
+            if np.isin(value, codes).any():
+                return True
+    return False
+
+
+def _all_digits(buf: np.ndarray, cs: np.ndarray, ce: np.ndarray) -> np.ndarray:
+    width = ce - cs
+    result = np.zeros(len(cs), dtype=bool)
+    rows = np.flatnonzero((width > 0) & (width <= _MAX_INDEX_WIDTH))
+    cols = np.arange(_MAX_INDEX_WIDTH)
+    inside = cols < width[rows, None]
+    chars = buf[np.minimum(cs[rows, None] + cols, len(buf) - 1)]
+    result[rows] = np.all(~inside | ((chars >= 48) & (chars <= 57)), axis=1)
+    return result
+
+
+def _parse_chunk(buf: np.ndarray, is_srt: bool, final: bool) -> Tuple[np.ndarray, np.ndarray, bytes, np.ndarray]:
+    """
+    Parse whole cue blocks from a uint8 buffer. Returns (starts, ends, text_blob,
+    text_lengths); text is stripped per line and joined with "\\n" but left undecoded.
+    """
+    n = len(buf)
+    newlines = np.flatnonzero(buf == 10)
+    line_start = np.concatenate(([0], newlines + 1))
+    line_end = np.concatenate((newlines, [n]))
+    cs, ce = _strip_spans(_WHITESPACE[buf], line_start, line_end)
+    if _unicode_space_edge(buf, cs, ce):
+        raise _UnicodeSpaceEdge()
+    lines = np.flatnonzero(ce > cs)  # non-blank lines
+    if not len(lines):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, b"", empty
+    # Stripped [cs, ce) span and raw terminator position of every non-blank line.
+    cs, ce, le = cs[lines], ce[lines], line_end[lines]
+    gap = np.diff(lines) > 1
+    block_head = np.flatnonzero(np.concatenate(([True], gap)))
+    block_tail = np.concatenate((block_head[1:] - 1, [len(lines) - 1]))
+
+    timing = block_head.copy()
+    if is_srt:
+        timing += _all_digits(buf, cs[block_head], ce[block_head])
+        lone = timing > block_tail
+        if lone.any():
+            # A trailing index with nothing after it ends the file, as in the line parser.
+            if not (final and lone[-1] and lone.sum() == 1):
+                raise ValueError("Invalid timestamp line: ")
+            block_head, block_tail, timing = block_head[:-1], block_tail[:-1], timing[:-1]
+
+    # Timing lines: canonical ones straight from the buffer, the rest through the regex.
+    t_cs, t_ce = cs[timing], ce[timing]
+    starts = np.empty(len(timing), dtype=np.int64)
+    ends = np.empty(len(timing), dtype=np.int64)
+    parsed = np.zeros(len(timing), dtype=bool)
+    rows = np.flatnonzero(t_ce - t_cs == _TIMING_WIDTH)
+    if len(rows):
+        chars = buf[t_cs[rows, None] + np.arange(_TIMING_WIDTH)]
+        valid, row_starts, row_ends = _parse_timing_matrix(chars)
+        starts[rows[valid]] = row_starts[valid]
+        ends[rows[valid]] = row_ends[valid]
+        parsed[rows[valid]] = True
+    for i in np.flatnonzero(~parsed):
+        line = buf[t_cs[i]:t_ce[i]].tobytes().decode("utf-8")
+        starts[i], ends[i] = _parse_timing_line(line)
+
+    # Text lines: everything in a block after its timing line.
+    block_of = np.repeat(np.arange(len(block_head)), block_tail - block_head + 1)
+    line_pos = np.arange(len(lines))[: len(block_of)]
+    is_text = line_pos > timing[block_of]
+    text_cs, text_ce, text_le = cs[line_pos[is_text]], ce[line_pos[is_text]], le[line_pos[is_text]]
+    text_block = block_of[is_text]
+    last_in_block = np.ones(len(text_block), dtype=bool)
+    last_in_block[:-1] = text_block[1:] != text_block[:-1]
+    edges = np.zeros(n + 1, dtype=np.int32)
+    edges[text_cs] += 1
+    edges[text_ce] -= 1
+    mask = np.cumsum(edges[:n], dtype=np.int32) > 0
+    mask[text_le[~last_in_block]] = True
+    lengths = np.bincount(text_block, weights=text_ce - text_cs, minlength=len(timing)).astype(np.int64)
+    lengths += np.maximum(np.bincount(text_block, minlength=len(timing)) - 1, 0)
+    return starts, ends, buf[mask].tobytes(), lengths
+
+
+def _chunk_end(mm: mmap.mmap, end: int, size: int) -> int:
+    """First line boundary before a blank line at or after end (or the end of the file)."""
+    if end >= size:
+        return size
+    match = _BLANK_LINE_RE.search(mm, end, size)
+    return match.start() + 1 if match else size
+
+
+def read_track(path: str, fmt: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> SubtitleTrack:
+    """
+    Parse a subtitle file into a SubtitleTrack by memory-mapping it and working on raw
+    bytes: lines, blank-line cue boundaries and timing fields are found with vectorized
+    scans, timing lines are decoded straight from the buffer, and cue texts are copied
+    into the track's UTF-8 buffer undecoded (they are decoded only when accessed).
+    Handles a UTF-8 BOM and CRLF line endings like load_subtitles. Files with lines
+    that start or end with non-ASCII whitespace (e.g. a "blank" line holding U+00A0),
+    which only str.strip() recognises, are parsed by the line parser instead.
+    """
+    ext = _guess_format(path, fmt)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return SubtitleTrack.from_texts(np.zeros(0), np.zeros(0), [])
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = len(_BOM) if mm[:len(_BOM)] == _BOM else 0
+            is_vtt_header = mm[pos:pos + 6] == b"WEBVTT"
+            if not ext:
+                ext = ".vtt" if is_vtt_header else ".srt"
+            if ext == ".vtt" and is_vtt_header:
+                eol = mm.find(b"\n", pos)
+                pos = size if eol < 0 else eol + 1
+            # Trailing whitespace is left out, so the last chunk with data is the final one
+            while size > pos and mm[size - 1] in _ASCII_SPACE:
+                size -= 1
+            parts: List[Tuple[np.ndarray, np.ndarray, bytes, np.ndarray]] = []
+            error = None
+            while pos < size and error is None:
+                end = _chunk_end(mm, pos + chunk_size, size)
+                buf = np.frombuffer(mm, dtype=np.uint8, count=end - pos, offset=pos)
+                try:
+                    parts.append(_parse_chunk(buf, ext == ".srt", end == size))
+                except Exception as exc:
+                    # Re-raised once the map is closed; the traceback pins views of it.
+                    error = exc.with_traceback(None)
+                del buf
+                pos = end
+    if isinstance(error, _UnicodeSpaceEdge):
+        with open(path, "rb") as f:
+            return load_track(f, ext)
+    if error is not None:
+        raise error
+    if not parts:
+        return SubtitleTrack.from_texts(np.zeros(0), np.zeros(0), [])
+    starts, ends, blobs, lengths = zip(*parts)
+    lengths = np.concatenate(lengths)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return SubtitleTrack(np.concatenate(starts), np.concatenate(ends), offsets, b"".join(blobs))
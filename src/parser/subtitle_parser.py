@@ -1,6 +1,9 @@
 from dataclasses import dataclass
-from typing import List
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+import io
 import os
+import re
 
 
 @dataclass
@@ -11,81 +14,170 @@ class SubtitleEvent:
     text: str
 
 
+# A filesystem path or an already opened (text or binary) file object.
+PathOrFile = Union[str, os.PathLike, IO]
+
+
+_TS = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[.,](\d+))?"
+_TIMESTAMP_RE = re.compile(rf"\s*{_TS}\s*$")
+# Whole "start --> end" line in one match; VTT cue settings after the end time are ignored.
+_TIMING_RE = re.compile(rf"\s*{_TS}\s*-->\s*{_TS}")
+
+
+def _groups_to_ms(h: Optional[str], m: str, s: str, frac: Optional[str]) -> int:
+    ms = ((int(h) * 60 if h else 0) + int(m)) * 60000 + int(s) * 1000
+    if frac:
+        # Fractions are decimal: ".5" is 500 ms, digits past milliseconds are dropped.
+        ms += int((frac + "00")[:3])
+    return ms
+
+
+def _parse_timestamp_ms(ts: str) -> int:
+    match = _TIMESTAMP_RE.match(ts)
+    if match is None:
+        raise ValueError(f"Invalid timestamp: {ts}")
+    return _groups_to_ms(*match.groups())
+
 
 def _parse_timestamp(ts: str) -> float:
-    ts = ts.replace(',', '.')
-    hms, ms = ts.split('.') if '.' in ts else (ts, '0')
-    h, m, s = [int(x) for x in hms.split(':')]
-    return h * 3600 + m * 60 + s + int(ms) / (1000 if len(ms) > 2 else 1)
+    return _parse_timestamp_ms(ts) / 1000
+
+
+def _parse_timing_line(line: str) -> Tuple[int, int]:
+    """Parse "start --> end" into integer milliseconds with a single regex match."""
+    match = _TIMING_RE.match(line)
+    if match is None:
+        raise ValueError(f"Invalid timestamp line: {line}")
+    h1, m1, s1, f1, h2, m2, s2, f2 = match.groups()
+    return _groups_to_ms(h1, m1, s1, f1), _groups_to_ms(h2, m2, s2, f2)
+
+
+def _format_ms(ms: int, sep: str = ',') -> str:
+    """Format integer milliseconds as HH:MM:SS,mmm; negative times are clamped to zero."""
+    if ms < 0:
+        ms = 0
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return "%02d:%02d:%02d%s%03d" % (h, m, s, sep, ms)
 
 
 def _format_timestamp(seconds: float, as_vtt: bool = False) -> str:
-    ms = int(round((seconds - int(seconds)) * 1000))
-    h = int(seconds) // 3600
-    m = (int(seconds) % 3600) // 60
-    s = int(seconds) % 60
-    sep = '.' if as_vtt else ','
-    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
-
-
-def load_subtitles(path: str) -> List[SubtitleEvent]:
-    ext = os.path.splitext(path)[1].lower()
-    events: List[SubtitleEvent] = []
-    # Handle optional UTF-8 BOM by using utf-8-sig so that BOM is stripped if present
-    with open(path, encoding='utf-8-sig') as f:
-        raw_lines = [line.rstrip('\n') for line in f]
-
-    i = 0
-    idx = 1
-    if ext == '.vtt' and raw_lines and raw_lines[0].startswith('WEBVTT'):
-        i = 1
-
-    while i < len(raw_lines):
-        line = raw_lines[i].strip()
+    # Round once to whole milliseconds so e.g. 1.9996 s becomes 00:00:02,000, never ",1000".
+    return _format_ms(int(round(seconds * 1000)), '.' if as_vtt else ',')
+
+
+def _guess_format(source: PathOrFile, fmt: Optional[str] = None) -> str:
+    """Return '.srt' or '.vtt' from an explicit fmt, a path or a file object's name."""
+    if fmt:
+        fmt = fmt.lower()
+        return fmt if fmt.startswith('.') else '.' + fmt
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    if isinstance(name, (str, os.PathLike)):
+        return os.path.splitext(os.fspath(name))[1].lower()
+    return ''
+
+
+@contextmanager
+def _open_text(source: PathOrFile, mode: str = 'r') -> Iterator[IO[str]]:
+    """Yield a text stream for a path or a file object; only paths are closed on exit."""
+    if isinstance(source, (str, os.PathLike)):
+        # Handle optional UTF-8 BOM by using utf-8-sig so that BOM is stripped if present
+        encoding = 'utf-8-sig' if 'r' in mode else 'utf-8'
+        with open(source, mode, encoding=encoding) as f:
+            yield f
+    elif isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+        encoding = 'utf-8-sig' if 'r' in mode else 'utf-8'
+        wrapper = io.TextIOWrapper(source, encoding=encoding)
+        try:
+            yield wrapper
+        finally:
+            if 'w' in mode:
+                wrapper.flush()
+            wrapper.detach()
+    else:
+        yield source
+
+
+def _scan_cues(lines: Iterable[str], ext: str) -> Iterator[Tuple[str, str]]:
+    """
+    Split an iterable of lines into (timing_line, text) cue blocks, holding only the
+    current cue in memory. Timing lines are returned unparsed.
+    """
+    lines = iter(lines)
+    first = True
+    for raw in lines:
+        if first:
+            first = False
+            raw = raw.lstrip('\ufeff')
+            if not ext:
+                ext = '.vtt' if raw.startswith('WEBVTT') else '.srt'
+            if ext == '.vtt' and raw.startswith('WEBVTT'):
+                continue
+
+        line = raw.strip()
         if not line:
-            i += 1
             continue
 
         if ext == '.srt' and line.isdigit():
-            i += 1
-            if i >= len(raw_lines):
+            raw = next(lines, None)
+            if raw is not None and not raw.strip():
+                # An index with nothing but blank lines after it ends the file
+                if any(rest.strip() for rest in lines):
+                    raise ValueError("Invalid timestamp line: ")
+                raw = None
+            if raw is None:
                 break
-            line = raw_lines[i].strip()
-
-        times = line
-        parts = times.split('-->')
-        if len(parts) != 2:
-            raise ValueError(f"Invalid timestamp line: {times}")
-        start_ts, end_ts = [t.strip() for t in parts]
-        i += 1
+            line = raw.strip()
+
         text_lines = []
-        while i < len(raw_lines) and raw_lines[i].strip() != '':
-            text_lines.append(raw_lines[i].rstrip('\n').strip())
-            i += 1
-        text = '\n'.join(text_lines)
-        start = _parse_timestamp(start_ts)
-        end = _parse_timestamp(end_ts)
-        events.append(SubtitleEvent(idx, start, end, text))
-        idx += 1
-        while i < len(raw_lines) and raw_lines[i].strip() == '':
-            i += 1
-    return events
-
-
-def save_subtitles(events: List[SubtitleEvent], path: str) -> None:
-    ext = os.path.splitext(path)[1].lower()
-    as_vtt = ext == '.vtt'
-    lines = []
-    if as_vtt:
-        lines.append('WEBVTT')
-    for ev in events:
-        if not as_vtt:
-            lines.append(str(ev.index))
-        start = _format_timestamp(ev.start, as_vtt)
-        end = _format_timestamp(ev.end, as_vtt)
-        lines.append(f"{start} --> {end}")
-        lines.append(ev.text)
-        lines.append('')
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
+        for raw in lines:
+            stripped = raw.strip()
+            if stripped == '':
+                break
+            text_lines.append(stripped)
+        yield line, '\n'.join(text_lines)
+
+
+def _iter_cues(lines: Iterable[str], ext: str) -> Iterator[Tuple[int, int, str]]:
+    """Parse cue blocks into (start_ms, end_ms, text)."""
+    for timing, text in _scan_cues(lines, ext):
+        start, end = _parse_timing_line(timing)
+        yield start, end, text
+
+
+def _iter_events(lines: Iterable[str], ext: str) -> Iterator[SubtitleEvent]:
+    for idx, (start, end, text) in enumerate(_iter_cues(lines, ext), start=1):
+        yield SubtitleEvent(idx, start / 1000, end / 1000, text)
+
+
+def iter_subtitles(source: PathOrFile, fmt: Optional[str] = None) -> Iterator[SubtitleEvent]:
+    """
+    Lazily parse an .srt/.vtt path or file object, yielding one SubtitleEvent at a time.
+    The format comes from fmt, then the file extension, then the first line ("WEBVTT").
+    """
+    ext = _guess_format(source, fmt)
+    with _open_text(source) as f:
+        yield from _iter_events(f, ext)
+
+
+def iter_cues(source: PathOrFile, fmt: Optional[str] = None) -> Iterator[Tuple[int, int, str]]:
+    """Like iter_subtitles, but yield bare (start_ms, end_ms, text) tuples."""
+    ext = _guess_format(source, fmt)
+    with _open_text(source) as f:
+        yield from _iter_cues(f, ext)
+
+
+def load_subtitles(path: PathOrFile, fmt: Optional[str] = None) -> List[SubtitleEvent]:
+    return list(iter_subtitles(path, fmt))
+
+
+def save_subtitles(events: Iterable[SubtitleEvent], path: PathOrFile, fmt: Optional[str] = None) -> None:
+    """
+    Write events (any iterable, consumed once) cue by cue to a path, a text/binary stream
+    or "-" for stdout. See SubtitleWriter for buffering, compression and atomic renames.
+    """
+    from parser.subtitle_writer import SubtitleWriter
 
+    with SubtitleWriter(path, fmt) as writer:
+        writer.write_events(events)
@@ -0,0 +1,254 @@
+import os
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from parser.subtitle_parser import (
+    PathOrFile, SubtitleEvent, _format_ms, _guess_format, _open_text, _parse_timing_line, _scan_cues,
+)
+
+
+# Canonical "HH:MM:SS,mmm --> HH:MM:SS,mmm" timing line layout used by the bulk parser.
+_TIMING_WIDTH = 29
+_DIGIT_COLUMNS = np.array([0, 1, 3, 4, 6, 7, 9, 10, 11])
+_DIGIT_WEIGHTS = np.array([36000000, 3600000, 600000, 60000, 10000, 1000, 100, 10, 1], dtype=np.int64)
+_LITERALS = {2: b":", 5: b":", 12: b" ", 13: b"-", 14: b"-", 15: b">", 16: b" ", 19: b":", 22: b":"}
+
+
+def _parse_timing_matrix(chars: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode a (rows, 29) uint8 matrix of canonical timing lines.
+    Returns (valid, starts, ends); starts/ends are only meaningful where valid.
+    """
+    digits = chars[:, np.concatenate((_DIGIT_COLUMNS, _DIGIT_COLUMNS + 17))].astype(np.int64) - 48
+    valid = np.all((digits >= 0) & (digits <= 9), axis=1)
+    for col, lit in _LITERALS.items():
+        valid &= chars[:, col] == lit[0]
+    for col in (8, 25):
+        valid &= (chars[:, col] == ord(",")) | (chars[:, col] == ord("."))
+    return valid, digits[:, :9] @ _DIGIT_WEIGHTS, digits[:, 9:] @ _DIGIT_WEIGHTS
+
+
+def parse_timing_lines(lines: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse many "start --> end" lines into int64 millisecond arrays at once.
+
+    Lines in the canonical fixed-width SRT/VTT layout are decoded as one uint8 matrix
+    (digit columns times place weights); anything else falls back to the regex parser.
+    """
+    n = len(lines)
+    starts = np.empty(n, dtype=np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    lengths = np.fromiter(map(len, lines), dtype=np.int64, count=n)
+    rows = np.nonzero(lengths == _TIMING_WIDTH)[0]
+    ok = np.zeros(n, dtype=bool)
+    if len(rows):
+        picked = lines if len(rows) == n else [lines[i] for i in rows]
+        try:
+            buf = "".join(picked).encode("ascii")
+        except UnicodeEncodeError:
+            buf = None
+        if buf is not None:
+            chars = np.frombuffer(buf, dtype=np.uint8).reshape(-1, _TIMING_WIDTH)
+            valid, matrix_starts, matrix_ends = _parse_timing_matrix(chars)
+            good = rows[valid]
+            starts[good] = matrix_starts[valid]
+            ends[good] = matrix_ends[valid]
+            ok[good] = True
+    for i in np.nonzero(~ok)[0]:
+        starts[i], ends[i] = _parse_timing_line(lines[i])
+    return starts, ends
+
+
+def format_timestamps(ms: np.ndarray, sep: str = ",") -> List[bytes]:
+    """
+    Format int64 milliseconds as HH:MM:SS,mmm byte strings in bulk, the inverse of
+    parse_timing_lines. Times of 100 hours or more go through _format_ms.
+    """
+    ms = np.maximum(np.asarray(ms, dtype=np.int64), 0)
+    h, rem = np.divmod(ms, 3600000)
+    m, rem = np.divmod(rem, 60000)
+    s, f = np.divmod(rem, 1000)
+    chars = np.empty((len(ms), 12), dtype=np.uint8)
+    for col, value in ((0, h // 10), (1, h % 10), (3, m // 10), (4, m % 10), (6, s // 10),
+                       (7, s % 10), (9, f // 100), (10, f // 10 % 10), (11, f % 10)):
+        chars[:, col] = value + 48
+    chars[:, [2, 5]] = ord(":")
+    chars[:, 8] = ord(sep)
+    out = chars.view("S12").ravel().tolist()
+    for i in np.flatnonzero(h >= 100):
+        out[i] = _format_ms(int(ms[i]), sep).encode("ascii")
+    return out
+
+
+class SubtitleTrack(Sequence[SubtitleEvent]):
+    """
+    Columnar subtitle track.
+
+    Timings live in contiguous int64 millisecond arrays (start_ms, end_ms) and all cue
+    texts share one UTF-8 buffer addressed by an offsets array, so a cue costs a few
+    dozen bytes instead of a dataclass instance plus two floats and a str.
+    Indexing returns SubtitleEvent views, so a track can be used wherever a list of
+    events is expected (GUI tables, save_subtitles, tests).
+    """
+
+    __slots__ = ("index", "start_ms", "end_ms", "_offsets", "_blob", "__weakref__")
+
+    def __init__(
+        self,
+        start_ms: np.ndarray,
+        end_ms: np.ndarray,
+        offsets: np.ndarray,
+        blob: bytes,
+        index: Optional[np.ndarray] = None,
+    ):
+        self.start_ms = np.ascontiguousarray(start_ms, dtype=np.int64)
+        self.end_ms = np.ascontiguousarray(end_ms, dtype=np.int64)
+        self._offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self._blob = blob
+        if index is None:
+            index = np.arange(1, len(self.start_ms) + 1, dtype=np.int64)
+        self.index = np.ascontiguousarray(index, dtype=np.int64)
+        if not (len(self.start_ms) == len(self.end_ms) == len(self.index) == len(self._offsets) - 1):
+            raise ValueError("SubtitleTrack columns have mismatched lengths")
+
+    @classmethod
+    def from_events(cls, events: Iterable[SubtitleEvent]) -> "SubtitleTrack":
+        """Build a track in one pass over any iterable of events (e.g. iter_subtitles)."""
+        if isinstance(events, SubtitleTrack):
+            return events
+        index, starts, ends = array("q"), array("q"), array("q")
+        offsets = array("q", [0])
+        blob = bytearray()
+        for ev in events:
+            index.append(ev.index)
+            starts.append(round(ev.start * 1000))
+            ends.append(round(ev.end * 1000))
+            blob += ev.text.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(
+            np.frombuffer(starts, dtype=np.int64),
+            np.frombuffer(ends, dtype=np.int64),
+            np.frombuffer(offsets, dtype=np.int64),
+            bytes(blob),
+            np.frombuffer(index, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_texts(cls, start_ms: np.ndarray, end_ms: np.ndarray, texts: Iterable[str], index: Optional[np.ndarray] = None) -> "SubtitleTrack":
+        encoded = [t.encode("utf-8") for t in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(start_ms, end_ms, offsets, b"".join(encoded), index)
+
+    def __len__(self) -> int:
+        return len(self.start_ms)
+
+    @overload
+    def __getitem__(self, i: int) -> SubtitleEvent: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> "SubtitleTrack": ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[SubtitleEvent, "SubtitleTrack"]:
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("SubtitleTrack index out of range")
+        return SubtitleEvent(
+            int(self.index[i]),
+            int(self.start_ms[i]) / 1000,
+            int(self.end_ms[i]) / 1000,
+            self.text(i),
+        )
+
+    def __iter__(self) -> Iterator[SubtitleEvent]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"SubtitleTrack({len(self)} cues)"
+
+    @property
+    def starts(self) -> np.ndarray:
+        """Start times in seconds (float64)."""
+        return self.start_ms / 1000
+
+    @property
+    def ends(self) -> np.ndarray:
+        """End times in seconds (float64)."""
+        return self.end_ms / 1000
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.start_ms.nbytes + self.end_ms.nbytes + self.index.nbytes
+            + self._offsets.nbytes + len(self._blob)
+        )
+
+    def text(self, i: int) -> str:
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def texts(self) -> List[str]:
+        return [self.text(i) for i in range(len(self))]
+
+    def encoded_texts(self, start: int = 0, stop: Optional[int] = None) -> List[bytes]:
+        """UTF-8 texts of cues [start, stop) as bytes, sliced from the buffer without decoding."""
+        bounds = self._offsets[start:(len(self) if stop is None else stop) + 1].tolist()
+        blob = self._blob
+        return [blob[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    def text_lengths(self) -> np.ndarray:
+        """Length of every cue text in UTF-8 bytes, without decoding."""
+        return np.diff(self._offsets)
+
+    def char_counts(self) -> np.ndarray:
+        """Characters per cue text, line breaks excluded, counted on the UTF-8 buffer."""
+        data = np.frombuffer(self._blob, dtype=np.uint8)
+        counted = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum(((data & 0xC0) != 0x80) & (data != 10), out=counted[1:])
+        return counted[self._offsets[1:]] - counted[self._offsets[:-1]]
+
+    def take(self, indices: Sequence[int]) -> "SubtitleTrack":
+        """Return a new track holding the cues at the given positions, in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = self.text_lengths()[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        blob = b"".join(self._blob[s:e] for s, e in zip(self._offsets[indices], self._offsets[indices + 1]))
+        return SubtitleTrack(self.start_ms[indices], self.end_ms[indices], offsets, blob, self.index[indices])
+
+    def retimed(self, start_ms: np.ndarray, end_ms: np.ndarray, index: Optional[np.ndarray] = None) -> "SubtitleTrack":
+        """Return a track with new timings that shares this track's text buffer."""
+        return SubtitleTrack(start_ms, end_ms, self._offsets, self._blob, self.index if index is None else index)
+
+    def to_events(self) -> List[SubtitleEvent]:
+        return list(self)
+
+
+def as_track(events: Iterable[SubtitleEvent]) -> SubtitleTrack:
+    """Return events as a SubtitleTrack, converting lists of SubtitleEvent if needed."""
+    return SubtitleTrack.from_events(events)
+
+
+def load_track(path: PathOrFile, fmt: Optional[str] = None) -> SubtitleTrack:
+    """
+    Parse a subtitle file straight into a SubtitleTrack, without SubtitleEvent objects.
+    Files on disk go through the memory-mapped bytes reader; for file objects timing
+    lines are collected and parsed in bulk with parse_timing_lines.
+    """
+    if isinstance(path, (str, os.PathLike)):
+        from parser.mmap_reader import read_track
+        return read_track(path, fmt)
+    timings: List[str] = []
+    texts: List[str] = []
+    with _open_text(path) as f:
+        for timing, text in _scan_cues(f, _guess_format(path, fmt)):
+            timings.append(timing)
+            texts.append(text)
+    starts, ends = parse_timing_lines(timings)
+    return SubtitleTrack.from_texts(starts, ends, texts)
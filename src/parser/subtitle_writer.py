@@ -0,0 +1,213 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+from typing import IO, Callable, Dict, Iterable, List, Optional
+
+from parser.subtitle_parser import PathOrFile, SubtitleEvent, _format_ms, _guess_format
+
+try:  # Python 3.14+
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+
+# Bytes collected before a write hits the underlying stream.
+BUFFER_SIZE = 1 << 20
+# Cues formatted per step by write_track.
+TRACK_BATCH = 8192
+
+_COMPRESSORS: Dict[str, Callable[[IO[bytes]], IO[bytes]]] = {
+    "gzip": lambda f: gzip.GzipFile(fileobj=f, mode="wb"),
+    "bz2": lambda f: bz2.BZ2File(f, "wb"),
+    "xz": lambda f: lzma.LZMAFile(f, "wb"),
+}
+if zstd is not None:
+    _COMPRESSORS["zstd"] = lambda f: zstd.ZstdFile(f, "wb")
+_COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+
+def _split_compression(name: str) -> Optional[str]:
+    return _COMPRESSION_SUFFIXES.get(os.path.splitext(name)[1].lower())
+
+
+class SubtitleWriter:
+    """
+    Write cues incrementally to a path, a text/binary stream or "-" (stdout).
+
+    Formatted cues are collected up to buffer_size bytes before each write. Paths are
+    written to a temporary file next to the target and renamed over it on close, so an
+    interrupted job never leaves a half-written output; leaving the with-block on an
+    exception discards the temporary file instead. Compression ("gzip", "bz2", "xz",
+    and "zstd" where the standard library has it) is picked from the path suffix
+    (".srt.gz") or the compression argument.
+    """
+
+    def __init__(
+        self,
+        target: PathOrFile,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None,
+        atomic: bool = True,
+        buffer_size: int = BUFFER_SIZE,
+    ):
+        name = target if isinstance(target, (str, os.PathLike)) else getattr(target, "name", "")
+        name = os.fspath(name) if isinstance(name, (str, os.PathLike)) else ""
+        if compression is None and name and name != "-":
+            compression = _split_compression(name)
+            if compression:
+                name = os.path.splitext(name)[0]
+        if compression and compression not in _COMPRESSORS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.as_vtt = _guess_format(name, fmt) == ".vtt"
+        self.sep = "." if self.as_vtt else ","
+        self.count = 0
+        self.buffer_size = buffer_size
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._path: Optional[str] = None
+        self._tmp_path: Optional[str] = None
+        self._file: Optional[IO] = None
+        self._owns_file = False
+        self._closed = False
+
+        if target == "-":
+            target = getattr(sys.stdout, "buffer", sys.stdout)
+        if isinstance(target, (str, os.PathLike)):
+            self._path = os.fspath(target)
+            if atomic:
+                head, tail = os.path.split(self._path)
+                self._tmp_path = os.path.join(head, f".{tail}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+                fd = os.open(self._tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+                self._file = os.fdopen(fd, "wb")
+            else:
+                self._file = open(self._path, "wb")
+            self._owns_file = True
+            self._binary = True
+        else:
+            self._file = target
+            self._binary = not isinstance(target, io.TextIOBase) and isinstance(
+                target, (io.RawIOBase, io.BufferedIOBase)
+            )
+        self._sink = self._file
+        if compression:
+            if not self._binary:
+                self._discard()
+                raise ValueError("Compressed output needs a path or a binary stream")
+            self._sink = _COMPRESSORS[compression](self._file)
+        # Every cue after the first is preceded by a blank line; VTT starts with its header.
+        self._lead = b"WEBVTT\n" if self.as_vtt else b""
+
+    def __enter__(self) -> "SubtitleWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _emit(self, data: bytes) -> None:
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything buffered so far to the underlying stream."""
+        if not self._pending:
+            return
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        self._sink.write(data if self._binary else data.decode("utf-8"))
+
+    def write_cue(self, start_ms: int, end_ms: int, text: str, index: Optional[int] = None) -> None:
+        start = _format_ms(start_ms, self.sep)
+        end = _format_ms(end_ms, self.sep)
+        if self.as_vtt:
+            cue = f"{start} --> {end}\n{text}\n"
+        else:
+            cue = f"{self.count + 1 if index is None else index}\n{start} --> {end}\n{text}\n"
+        self._emit(self._lead + cue.encode("utf-8"))
+        self._lead = b"\n"
+        self.count += 1
+
+    def write(self, event: SubtitleEvent) -> None:
+        self.write_cue(int(round(event.start * 1000)), int(round(event.end * 1000)), event.text, event.index)
+
+    def write_events(self, events: Iterable[SubtitleEvent]) -> None:
+        """Write events from any iterable, consumed once."""
+        from parser.subtitle_track import SubtitleTrack
+
+        if isinstance(events, SubtitleTrack):
+            self.write_track(events)
+            return
+        for ev in events:
+            self.write(ev)
+
+    def write_track(self, track, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Write a SubtitleTrack straight from its columns: timestamps are formatted in bulk
+        from the millisecond arrays and texts are copied as UTF-8 bytes, never decoded.
+        progress(done, total) is called after each batch of cues; an exception raised
+        from it stops the write.
+        """
+        from parser.subtitle_track import format_timestamps
+
+        sep = self.sep
+        for lo in range(0, len(track), TRACK_BATCH):
+            hi = min(lo + TRACK_BATCH, len(track))
+            starts = format_timestamps(track.start_ms[lo:hi], sep)
+            ends = format_timestamps(track.end_ms[lo:hi], sep)
+            texts = track.encoded_texts(lo, hi)
+            if self.as_vtt:
+                cues = [b"\n%b --> %b\n%b\n" % row for row in zip(starts, ends, texts)]
+            else:
+                indices = track.index[lo:hi].tolist()
+                cues = [b"\n%d\n%b --> %b\n%b\n" % row for row in zip(indices, starts, ends, texts)]
+            cues[0] = self._lead + cues[0][1:]
+            self._lead = b"\n"
+            self.count += len(cues)
+            self._emit(b"".join(cues))
+            if progress is not None:
+                progress(hi, len(track))
+
+    def close(self) -> None:
+        """Flush, close what this writer opened and move a temporary file into place."""
+        if self._closed:
+            return
+        try:
+            if self._lead == b"WEBVTT\n":
+                self._emit(b"WEBVTT")
+            self.flush()
+            if self._sink is not self._file:
+                self._sink.close()
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.flush()
+        except BaseException:
+            self._discard()
+            raise
+        self._closed = True
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        """Stop writing; a temporary file is removed and the target is left untouched."""
+        if not self._closed:
+            self._discard()
+
+    def _discard(self) -> None:
+        self._closed = True
+        self._pending.clear()
+        if self._owns_file:
+            self._file.close()
+            if self._tmp_path is not None:
+                try:
+                    os.unlink(self._tmp_path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from parser.subtitle_parser import PathOrFile, _guess_format
+from parser.subtitle_track import SubtitleTrack, load_track
+
+
+# Bump when a parser change makes cached tracks stale.
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 1 << 30
+# Cache directory override; set it to an empty string to turn the cache off.
+CACHE_DIR_ENV = "SUBTITLE_ALIGNER_CACHE_DIR"
+# Hits refresh an entry's LRU time at most this often (seconds), so most hits do not write the index.
+_TOUCH_INTERVAL = 60.0
+# Remembered file hashes beyond which those of deleted files, and then the oldest, are forgotten.
+_MAX_FILES = 100000
+# Cache failures that are logged and answered by parsing the file instead.
+_CACHE_ERRORS = (OSError, sqlite3.Error)
+
+log = logging.getLogger(__name__)
+
+# Table of content hashes by (path, mtime, size); see cached_digest. Also used by batch.manifest.
+DIGEST_TABLE = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT
+);
+"""
+_SCHEMA = DIGEST_TABLE + """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY, nbytes INTEGER, last_used REAL
+);
+"""
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached_digest(db: sqlite3.Connection, path: str) -> str:
+    """file_digest of path, remembered in db's DIGEST_TABLE so an unchanged file is only stat-ed."""
+    st = os.stat(path)
+    abspath = os.path.abspath(path)
+    row = db.execute(
+        "SELECT digest FROM files WHERE path = ? AND mtime_ns = ? AND size = ?",
+        (abspath, st.st_mtime_ns, st.st_size),
+    ).fetchone()
+    if row:
+        return row[0]
+    digest = file_digest(path)
+    with db:
+        db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (abspath, st.st_mtime_ns, st.st_size, digest))
+    return digest
+
+
+def prune_digests(db: sqlite3.Connection) -> None:
+    """Past _MAX_FILES remembered hashes, forget those of deleted files, then all but the newest half."""
+    if db.execute("SELECT COUNT(*) FROM files").fetchone()[0] <= _MAX_FILES:
+        return
+    # A hash is rewritten (with a new rowid) whenever its file changes, so rowid order is age order
+    gone = [(rowid,) for rowid, path in db.execute("SELECT rowid, path FROM files") if not os.path.exists(path)]
+    with db:
+        db.executemany("DELETE FROM files WHERE rowid = ?", gone)
+        db.execute(
+            "DELETE FROM files WHERE rowid NOT IN (SELECT rowid FROM files ORDER BY rowid DESC LIMIT ?)",
+            (_MAX_FILES // 2,),
+        )
+
+
+def default_cache_dir() -> Optional[str]:
+    """$SUBTITLE_ALIGNER_CACHE_DIR if set (None if empty), else the user cache directory."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured is not None:
+        return configured or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "subtitle-aligner", "tracks")
+
+
+class TrackCache:
+    """
+    On-disk cache of parsed tracks keyed by file content, shared by every process
+    pointing at the same directory.
+
+    A file's content hash is remembered by (path, mtime, size), so an unchanged file
+    is only stat-ed. Tracks are stored as uncompressed .npz files (timing, index and
+    offset arrays plus the UTF-8 text blob) named after a hash of the content hash,
+    format and CACHE_VERSION; identical files anywhere share one entry. Entries are
+    written to a temporary file and renamed into place, and the SQLite index only
+    does the LRU bookkeeping, so concurrent readers and writers never see partial
+    entries. Once the entries exceed max_bytes the least recently used are deleted;
+    a reader that loses an entry to eviction just parses the file again. A cache
+    that cannot be read or written (full disk, read-only or deleted directory) is
+    logged and skipped, never a reason to fail a load.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._db_path = os.path.join(root, "index.sqlite")
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call: the cache is used from GUI worker threads and forked processes.
+        return sqlite3.connect(self._db_path, timeout=30)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".npz")
+
+    def key(self, path: str, fmt: Optional[str] = None) -> str:
+        """Cache key of a file: its content hash, looked up by (path, mtime, size) first."""
+        with closing(self._connect()) as db:
+            digest = cached_digest(db, path)
+        material = f"{CACHE_VERSION}:{_guess_format(path, fmt)}:{digest}"
+        return hashlib.blake2b(material.encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[SubtitleTrack]:
+        entry = self._entry_path(key)
+        try:
+            with np.load(entry) as data:
+                track = SubtitleTrack(
+                    data["start_ms"], data["end_ms"], data["offsets"], data["blob"].tobytes(), data["index"],
+                )
+            nbytes = os.path.getsize(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Truncated or foreign file: drop it and parse again
+            self._remove(key)
+            return None
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            row = db.execute("SELECT last_used FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[0] > _TOUCH_INTERVAL:
+                db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, nbytes, now))
+        return track
+
+    def put(self, key: str, track: SubtitleTrack) -> None:
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f, start_ms=track.start_ms, end_ms=track.end_ms, offsets=track._offsets,
+                    blob=np.frombuffer(track._blob, dtype=np.uint8), index=track.index,
+                )
+            os.replace(tmp, entry)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with closing(self._connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, os.path.getsize(entry), time.time()))
+        self.evict()
+
+    def load(self, path: PathOrFile, fmt: Optional[str] = None) -> SubtitleTrack:
+        """load_track through the cache; file objects and unreadable cache state fall back to parsing."""
+        if not isinstance(path, (str, os.PathLike)):
+            return load_track(path, fmt)
+        path = os.fspath(path)
+        before = os.stat(path)
+        try:
+            key = self.key(path, fmt)
+            track = self.get(key)
+        except _CACHE_ERRORS as e:
+            # Errors reading path itself are raised again by load_track
+            log.warning("Track cache in %s unusable, parsing %s: %s", self.root, path, e)
+            return load_track(path, fmt)
+        if track is not None:
+            return track
+        track = load_track(path, fmt)
+        after = os.stat(path)
+        # Only store what was parsed from the content that was hashed
+        if (before.st_mtime_ns, before.st_size) == (after.st_mtime_ns, after.st_size):
+            try:
+                self.put(key, track)
+            except _CACHE_ERRORS as e:
+                log.warning("Could not cache %s in %s: %s", path, self.root, e)
+        return track
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the total is within max_bytes; returns how
+        many. Remembered file hashes are pruned too (see prune_digests).
+        """
+        with closing(self._connect()) as db:
+            prune_digests(db)
+            total = db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            victims = []
+            for key, nbytes in db.execute("SELECT key, nbytes FROM entries ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= nbytes
+        for key in victims:
+            self._remove(key)
+        return len(victims)
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, int]:
+        with closing(self._connect()) as db:
+            count, nbytes = db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": nbytes}
+
+
+# One TrackCache per (process, directory), so forked workers never share a parent's instance.
+_OPEN: Dict[Tuple[int, str, int], TrackCache] = {}
+
+
+def open_cache(root: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[TrackCache]:
+    """The TrackCache for root in this process, or None if root is None or empty or cannot be opened."""
+    if not root:
+        return None
+    key = (os.getpid(), os.path.abspath(root), max_bytes)
+    cache = _OPEN.get(key)
+    if cache is None:
+        try:
+            cache = _OPEN[key] = TrackCache(root, max_bytes)
+        except _CACHE_ERRORS as e:
+            log.warning("Track cache in %s unusable: %s", root, e)
+            return None
+    return cache
+
+
+def load_track_cached(path: PathOrFile, fmt: Optional[str] = None, cache_dir: Optional[str] = None) -> SubtitleTrack:
+    """load_track through the cache in cache_dir; without a usable cache the file is just parsed."""
+    cache = open_cache(cache_dir)
+    if cache is None:
+        return load_track(path, fmt)
+    return cache.load(path, fmt)
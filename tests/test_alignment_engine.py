@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from parser.subtitle_parser import SubtitleEvent
+import pytest
+
+from aligner.alignment_engine import PiecewiseAligner, ReferenceIndex, auto_align, estimate_offset, refine_alignment_with_anchors
+
+
+def make_events(spans, offset=0.0):
+    return [
+        SubtitleEvent(i, start + offset, end + offset, f"line {i}")
+        for i, (start, end) in enumerate(spans, start=1)
+    ]
+
+
+SPANS = [(1.0, 2.0), (3.0, 4.5), (5.0, 6.0), (7.0, 9.0), (10.0, 11.0)]
+
+
+def test_auto_align_identical_tracks():
+    assert auto_align(make_events(SPANS), make_events(SPANS)) == [(i, i) for i in range(5)]
+
+
+def test_auto_align_constant_offset():
+    ai = make_events(SPANS, offset=0.7)
+    human = make_events(SPANS)
+    assert estimate_offset(ai, human) == -700
+    assert auto_align(ai, human) == [(i, i) for i in range(5)]
+
+
+def test_auto_align_split_and_merge():
+    # AI cue 1 is split into two human cues; AI cues 3 and 4 are merged into one.
+    ai = make_events([(1.0, 2.0), (3.0, 5.0), (6.0, 7.0), (8.0, 9.0), (9.2, 10.0), (11.0, 12.0)])
+    human = make_events([(1.0, 2.0), (3.0, 3.9), (4.0, 5.0), (6.0, 7.0), (8.0, 10.0), (11.0, 12.0)])
+    assert auto_align(ai, human) == [(0, 0), (1, 1), (1, 2), (2, 3), (3, 4), (4, 4), (5, 5)]
+
+
+def test_auto_align_leaves_unmatched_cues_out():
+    ai = make_events([(1.0, 2.0), (3.0, 4.0), (20.0, 21.0)])
+    human = make_events([(1.0, 2.0), (40.0, 41.0), (3.0, 4.0)])
+    assert auto_align(ai, human) == [(0, 0), (1, 2)]
+    assert auto_align([], human) == []
+
+
+def test_refine_with_anchors_keeps_unanchored_cues():
+    ai = make_events(SPANS, offset=0.3)
+    human = make_events(SPANS)
+    assert refine_alignment_with_anchors(ai, human, [(2, 2)]) == [(i, i) for i in range(5)]
+    assert refine_alignment_with_anchors(ai, human, []) == [(i, i) for i in range(5)]
+
+
+def test_anchors_warp_segments_between_them():
+    # The AI track drifts by +3 s over the file; anchors pin both ends of the drift.
+    ai = make_events([(1.0, 2.0), (3.8, 5.3), (6.5, 7.5), (9.0, 11.0), (13.0, 14.0)])
+    human = make_events(SPANS)
+    aligned = refine_alignment_with_anchors(ai, human, [(0, 0), (4, 4)])
+    assert aligned == [(i, i) for i in range(5)]
+
+
+def test_piecewise_aligner_reuses_segments():
+    ai, human = make_events(SPANS), make_events(SPANS)
+    aligner = PiecewiseAligner(ai, human)
+    aligner.align([(1, 1), (3, 3)])
+    cached = dict(aligner._segments)
+    aligner.align([(1, 1), (2, 2), (3, 3)])
+    assert (0, 1, 0, 1) in cached and aligner._segments[(0, 1, 0, 1)] is cached[(0, 1, 0, 1)]
+    assert (4, 5, 4, 5) in cached and aligner._segments[(4, 5, 4, 5)] is cached[(4, 5, 4, 5)]
+
+
+def test_crossing_anchors_are_rejected():
+    ai, human = make_events(SPANS), make_events(SPANS)
+    with pytest.raises(ValueError):
+        refine_alignment_with_anchors(ai, human, [(0, 3), (2, 1)])
+
+
+def test_reference_index_matches_plain_alignment():
+    import pickle
+    human = make_events(SPANS)
+    reference = pickle.loads(pickle.dumps(ReferenceIndex(human)))
+    for offset in (0.0, 0.7):
+        ai = make_events(SPANS, offset=offset)
+        assert auto_align(ai, reference) == auto_align(ai, human)
+        assert auto_align(ai, reference, mode="text") == auto_align(ai, human, mode="text")
+        assert estimate_offset(ai, reference) == estimate_offset(ai, human)
+
+
+def test_match_intervals_with_one_long_human_cue():
+    import time
+    import numpy as np
+    from aligner.alignment_engine import match_intervals
+    n = 50000
+    starts = np.arange(n, dtype=np.int64) * 3000
+    ends = starts + 2000
+    # A "[music]" cue over the whole file sorts first on the human side
+    human_starts, human_ends = np.r_[0, starts], np.r_[n * 3000, ends]
+    t0 = time.perf_counter()
+    ai_pos, human_pos = match_intervals(starts, ends, human_starts, human_ends)
+    assert time.perf_counter() - t0 < 2.0
+    assert len(ai_pos) == 2 * n
+    assert ai_pos[:4].tolist() == [0, 0, 1, 1] and human_pos[:4].tolist() == [0, 1, 0, 2]
+
+    # Long cues on either side still match like every other cue
+    ai = make_events([(0.0, 2.0), (3.0, 100.0), (101.0, 102.0)])
+    human = make_events([(0.0, 200.0), (0.1, 2.0), (3.0, 99.0), (101.0, 102.5)])
+    assert auto_align(ai, human, drift=False) == [(0, 0), (0, 1), (1, 0), (1, 2), (2, 0), (2, 3)]
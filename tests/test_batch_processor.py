@@ -1,9 +1,18 @@
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import io
+import json
 import os
 import tempfile
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 from parser.subtitle_parser import SubtitleEvent, save_subtitles, load_subtitles
-from batch.batch_processor import process_batch
+import batch.batch_processor as batch_processor
+from batch.batch_processor import process_batch, process_pair
 
 
 def create_sub_file(path, texts):
@@ -26,8 +35,284 @@ def test_process_batch():
             create_sub_file(human_path, [f"h{idx}1", f"h{idx}2"])
             pair_configs.append({"ai_path": ai_path, "human_path": human_path, "output_path": output_path})
         results = process_batch(pair_configs)
-        assert results == [True, True, True]
+        assert [r.ok for r in results] == [True, True, True]
         for cfg in pair_configs:
             assert os.path.exists(cfg["output_path"])
             events = load_subtitles(cfg["output_path"])
             assert len(events) == 2
+
+
+def test_process_pair_streams():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_path = os.path.join(tmpdir, "ai.srt")
+        human_path = os.path.join(tmpdir, "human.srt")
+        create_sub_file(ai_path, ["a1", "a2"])
+        create_sub_file(human_path, ["h1", "h2"])
+        out = io.StringIO()
+        with open(ai_path, encoding="utf-8") as ai_f, open(human_path, "rb") as human_f:
+            assert process_pair(ai_f, human_f, out)
+        out.seek(0)
+        events = load_subtitles(out, fmt="srt")
+        assert [ev.text for ev in events] == ["a1", "a2"]
+
+
+def make_configs(tmpdir, count):
+    configs = []
+    for idx in range(count):
+        ai_path = os.path.join(tmpdir, f"ai{idx}.srt")
+        human_path = os.path.join(tmpdir, f"human{idx}.srt")
+        create_sub_file(ai_path, [f"a{idx}1", f"a{idx}2"])
+        create_sub_file(human_path, [f"h{idx}1", f"h{idx}2"])
+        configs.append({"ai_path": ai_path, "human_path": human_path,
+                        "output_path": os.path.join(tmpdir, "out", f"out{idx}.srt")})
+    return configs
+
+
+def test_process_batch_parallel_keeps_input_order():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 6)
+        configs[2]["ai_path"] = os.path.join(tmpdir, "missing.srt")
+        expected = [True, True, False, True, True, True]
+        assert [bool(r) for r in process_batch(configs, workers=2)] == expected
+        results = process_batch(iter(configs), workers=3, executor="thread", max_in_flight=2)
+        assert [r.ok for r in results] == expected
+        assert [r.index for r in results] == list(range(6))
+        assert [ev.text for ev in load_subtitles(configs[5]["output_path"])] == ["a51", "a52"]
+
+
+def test_process_batch_timeout(monkeypatch):
+    real_load_track = batch_processor.load_track
+
+    def slow_load_track(path):
+        if "ai1" in path:
+            time.sleep(2)
+        return real_load_track(path)
+
+    monkeypatch.setattr(batch_processor, "load_track", slow_load_track)
+    monkeypatch.setattr(batch_processor, "_TIMEOUT_GRACE", 0.0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 3)
+        # Serial runs are interrupted in place, thread runs are abandoned by the coordinator.
+        for kwargs in ({}, {"workers": 2, "executor": "thread"}):
+            results = process_batch(configs, timeout=0.2, **kwargs)
+            assert [r.status for r in results] == ["ok", "timeout", "ok"]
+            assert results[1].error_type == "TimeoutError"
+
+
+def test_process_batch_diagnostics_and_report():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 2)
+        with open(configs[1]["human_path"], "w", encoding="utf-8") as f:
+            f.write("1\nnot a timestamp\nhello\n")
+        report_path = os.path.join(tmpdir, "report.jsonl")
+        ok, failed = process_batch(configs, report_path=report_path)
+        assert (ok.ai_cues, ok.human_cues, ok.matched, ok.unmatched_ai, ok.unmatched_human) == (2, 2, 2, 0, 0)
+        assert set(ok.timings) == {"parse", "align", "write"}
+        assert failed.status == "error" and failed.error_type == "ValueError"
+        assert "Invalid timestamp line" in failed.error_message
+        with open(report_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [(r["index"], r["status"]) for r in records] == [(0, "ok"), (1, "error")]
+
+
+def test_process_batch_normalize_reports_rule_counts():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 1)
+        configs[0]["normalize"] = {"min_gap_ms": 100, "max_cps": None}
+        (result,) = process_batch(configs)
+        assert result.ok
+        assert result.normalized["min_gap"] == 1
+        events = load_subtitles(configs[0]["output_path"])
+        assert events[0].end == 0.9 and events[1].start == 1.0
+
+
+def test_process_batch_manifest_skips_unchanged_pairs():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 3)
+        configs[2]["ai_path"] = os.path.join(tmpdir, "missing.srt")
+        manifest_path = os.path.join(tmpdir, "manifest.sqlite")
+        first = process_batch(configs, manifest_path=manifest_path)
+        assert [(r.ok, r.cached) for r in first] == [(True, False), (True, False), (False, False)]
+
+        second = process_batch(configs, manifest_path=manifest_path)
+        assert [(r.ok, r.cached) for r in second] == [(True, True), (True, True), (False, False)]
+        assert second[0].matched == first[0].matched
+
+        create_sub_file(configs[1]["human_path"], ["changed"])
+        configs[0]["align_options"] = {"mode": "text"}
+        third = process_batch(configs, manifest_path=manifest_path, workers=2, executor="thread")
+        assert [(r.ok, r.cached) for r in third] == [(True, False), (True, False), (False, False)]
+        assert process_batch(configs, manifest_path=manifest_path)[1].cached
+
+
+def test_process_batch_shares_track_cache():
+    from parser.track_cache import TrackCache
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 3)
+        for cfg in configs:
+            cfg["human_path"] = configs[0]["human_path"]
+        cache_dir = os.path.join(tmpdir, "cache")
+        first = process_batch(configs, workers=2, cache_dir=cache_dir)
+        assert all(first)
+        # Three AI files and the one shared reference
+        assert TrackCache(cache_dir).stats()["entries"] == 4
+        second = process_batch(configs, cache_dir=cache_dir)
+        assert [r.matched for r in second] == [r.matched for r in first]
+
+
+def test_process_batch_fans_out_one_reference(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 3)
+        fanout = {
+            "human_path": configs[0]["human_path"],
+            "align_options": {"mode": "text"},
+            "targets": [{"ai_path": c["ai_path"], "output_path": c["output_path"]} for c in configs],
+        }
+        fanout["targets"][2]["align_options"] = {}
+        loaded = []
+        real_load = batch_processor.load_track
+        monkeypatch.setattr(batch_processor, "load_track", lambda path, *a: loaded.append(path) or real_load(path, *a))
+        results = process_batch([configs[0], fanout])
+        assert [r.ok for r in results] == [True] * 4
+        assert [r.ai_path for r in results[1:]] == [c["ai_path"] for c in configs]
+        assert [r.human_path for r in results[1:]] == [configs[0]["human_path"]] * 3
+        # The plain pair loads its own two files; the fan-out loads the reference once
+        assert loaded.count(configs[0]["human_path"]) == 2
+
+        for executor in ("thread", "process"):
+            parallel = batch_processor.run_fanout(
+                fanout["human_path"], batch_processor.fanout_configs(fanout), workers=2, executor=executor,
+            )
+            assert [r.matched for r in parallel] == [r.matched for r in results[1:]]
+
+        manifest_path = os.path.join(tmpdir, "manifest.sqlite")
+        process_batch([fanout], manifest_path=manifest_path)
+        create_sub_file(configs[1]["ai_path"], ["changed"])
+        again = process_batch([fanout], manifest_path=manifest_path)
+        assert [r.cached for r in again] == [True, False, True]
+
+        fanout["human_path"] = os.path.join(tmpdir, "missing.srt")
+        failed = process_batch([fanout, configs[0]])
+        assert [r.ok for r in failed] == [False, False, False, True]
+        assert failed[0].error_type == "FileNotFoundError"
+
+
+def test_process_batch_aligns_long_pair_in_chunks():
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+    from synthetic import write_pair
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_path, human_path = write_pair(tmpdir, 2500, seed=6)
+        cfg = {"ai_path": ai_path, "human_path": human_path, "output_path": os.path.join(tmpdir, "out.srt"),
+               "align_options": {"mode": "text"}}
+        serial, = process_batch([cfg])
+        chunked, = process_batch([{**cfg, "align_workers": 2}])
+        assert chunked.ok and chunked.matched == serial.matched
+
+
+def _slow_pair(cfg, timeout=None, tag=None):
+    time.sleep(1.0)
+    return batch_processor._config_result(cfg)
+
+
+def test_process_pool_does_not_time_out_queued_pairs(monkeypatch):
+    # A queued future already counts as running in a process pool; only the worker's
+    # own clock may decide that a pair timed out.
+    monkeypatch.setattr(batch_processor, "_run_config", _slow_pair)
+    monkeypatch.setattr(batch_processor, "_TIMEOUT_GRACE", 0.0)
+    from concurrent.futures import ProcessPoolExecutor
+    with tempfile.TemporaryDirectory() as tmpdir, ProcessPoolExecutor(max_workers=1) as pool:
+        results = process_batch(make_configs(tmpdir, 2), workers=2, executor=pool, timeout=1.5)
+        assert [r.status for r in results] == ["ok", "ok"]
+
+
+def _stuck_pair(ai_path, *args):
+    # Like a long C call: SIGALRM cannot interrupt it
+    if "ai1" in ai_path:
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+        time.sleep(60)
+    return _real_run_pair(ai_path, *args)
+
+
+_real_run_pair = batch_processor.run_pair
+
+
+@pytest.mark.skipif(not hasattr(signal, "pthread_sigmask"), reason="needs POSIX signals")
+def test_process_pool_kills_workers_stuck_past_the_limit(monkeypatch):
+    monkeypatch.setattr(batch_processor, "run_pair", _stuck_pair)
+    monkeypatch.setattr(batch_processor, "_TIMEOUT_GRACE", 0.0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start = time.monotonic()
+        results = process_batch(make_configs(tmpdir, 4), workers=2, timeout=1.0)
+        assert [r.status for r in results] == ["ok", "timeout", "ok", "ok"]
+        assert time.monotonic() - start < 10
+
+
+def test_thread_pool_does_not_stall_behind_abandoned_pairs(monkeypatch):
+    release = threading.Event()
+    real_load_track = batch_processor.load_track
+
+    def hanging_load_track(path):
+        if "ai0" in path or "ai1" in path:
+            # Abandoned pairs end without writing, so the temporary directory can go
+            release.wait(30)
+            raise RuntimeError("released")
+        return real_load_track(path)
+
+    monkeypatch.setattr(batch_processor, "load_track", hanging_load_track)
+    monkeypatch.setattr(batch_processor, "_TIMEOUT_GRACE", 0.0)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            configs = make_configs(tmpdir, 4)
+            # Both threads of a pool created here are held, so the rest moves to a new pool
+            results = process_batch(configs, workers=2, executor="thread", timeout=1.0)
+            assert [r.status for r in results] == ["timeout", "timeout", "ok", "ok"]
+            # A passed-in pool cannot be replaced: what it can no longer start times out
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                results = process_batch(configs, workers=2, executor=pool, timeout=1.0)
+                assert [r.status for r in results] == ["timeout"] * 4
+                assert "no free worker" in results[3].error_message
+                release.set()
+    finally:
+        release.set()
+
+
+def test_plain_import_skips_cache_manifest_and_chunking_modules():
+    import subprocess
+    code = (
+        "import sys\n"
+        "import batch.batch_processor\n"
+        "loaded = {'sqlite3', 'zipfile', 'aligner.parallel_alignment', 'batch.manifest', 'parser.track_cache'}\n"
+        "assert not loaded & set(sys.modules), loaded & set(sys.modules)\n"
+    )
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_process_workers_load_a_fanout_reference_once():
+    from concurrent.futures import Executor, Future
+
+    class Inline(Executor):
+        # Stands in for a process pool: runs jobs here but is no ThreadPoolExecutor
+        def __init__(self):
+            self.configs = []
+
+        def submit(self, fn, cfg, *args):
+            self.configs.append(cfg)
+            future = Future()
+            future.set_result(fn(cfg, *args))
+            return future
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = make_configs(tmpdir, 3)
+        fanout = {"human_path": configs[0]["human_path"],
+                  "targets": [{"ai_path": c["ai_path"], "output_path": c["output_path"]} for c in configs]}
+        pool = Inline()
+        assert all(process_batch([fanout], executor=pool))
+        paths = {cfg["reference_file"] for cfg in pool.configs}
+        assert len(paths) == 1 and not any("reference" in cfg for cfg in pool.configs)
+        # Loaded once, kept with its drift spectra, and the file is gone after the batch
+        path, = paths
+        reference = batch_processor._SHARED_REFERENCES[path]
+        assert reference._spectra and not os.path.exists(path)
+        assert batch_processor._shared_reference(path) is reference
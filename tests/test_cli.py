@@ -0,0 +1,86 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import pytest
+
+from batch.cli import load_manifest, main, parse_anchors
+from parser.subtitle_parser import SubtitleEvent, load_subtitles, save_subtitles
+
+
+def write_pair(tmp_path, name):
+    ai = tmp_path / f"{name}_ai.srt"
+    human = tmp_path / f"{name}_human.srt"
+    save_subtitles([SubtitleEvent(1, 0.0, 1.0, "a1"), SubtitleEvent(2, 1.0, 2.0, "a2")], str(ai))
+    save_subtitles([SubtitleEvent(1, 0.1, 1.0, "h1"), SubtitleEvent(2, 1.0, 2.2, "h2")], str(human))
+    return ai, human
+
+
+def test_single_pair(tmp_path):
+    ai, human = write_pair(tmp_path, "x")
+    out = tmp_path / "out" / "x.srt"
+    assert main([str(ai), str(human), str(out), "--anchors", "0:0", "-q"]) == 0
+    events = load_subtitles(str(out))
+    assert [(ev.start, ev.text) for ev in events] == [(0.1, "a1"), (1.0, "a2")]
+
+
+def test_manifest_csv_and_json(tmp_path):
+    write_pair(tmp_path, "a")
+    write_pair(tmp_path, "b")
+    with open(tmp_path / "pairs.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ai_path", "human_path", "output_path", "anchors", "mode"])
+        writer.writerow(["a_ai.srt", "a_human.srt", "out/a.srt", "0:0;1:1", ""])
+        writer.writerow(["b_ai.srt", "b_human.srt", "out/b.srt", "", "text"])
+    configs = list(load_manifest(str(tmp_path / "pairs.csv")))
+    assert configs[0]["anchors"] == [(0, 0), (1, 1)]
+    assert configs[1]["align_options"] == {"mode": "text"}
+    assert configs[1]["output_path"] == os.path.join(str(tmp_path), "out/b.srt")
+    assert main(["--manifest", str(tmp_path / "pairs.csv"), "--normalize", "-q"]) == 0
+    assert (tmp_path / "out" / "b.srt").exists()
+
+    (tmp_path / "pairs.json").write_text(json.dumps({"pairs": [
+        {"ai_path": "a_ai.srt", "human_path": "missing.srt", "output_path": "out/c.srt"},
+    ]}))
+    assert main(["-m", str(tmp_path / "pairs.json"), "-q"]) == 1
+
+
+def test_manifest_fanout(tmp_path):
+    write_pair(tmp_path, "a")
+    write_pair(tmp_path, "b")
+    (tmp_path / "fanout.jsonl").write_text(json.dumps({"human_path": "a_human.srt", "targets": [
+        {"ai_path": "a_ai.srt", "output_path": "out/a.srt"},
+        {"ai_path": "b_ai.srt", "output_path": "out/b.srt"},
+    ]}) + "\n")
+    [cfg] = load_manifest(str(tmp_path / "fanout.jsonl"))
+    assert cfg["targets"][1]["ai_path"] == os.path.join(str(tmp_path), "b_ai.srt")
+    assert main(["-m", str(tmp_path / "fanout.jsonl"), "-q"]) == 0
+    assert (tmp_path / "out" / "b.srt").exists()
+
+    (tmp_path / "bad.json").write_text(json.dumps([{"human_path": "a_human.srt", "targets": [{"ai_path": "a_ai.srt"}]}]))
+    with pytest.raises(ValueError, match="output_path"):
+        list(load_manifest(str(tmp_path / "bad.json")))
+
+
+def test_usage_errors():
+    assert parse_anchors("1:2, 3:4;") == [(1, 2), (3, 4)]
+    with pytest.raises(SystemExit) as exc:
+        main(["only-one.srt"])
+    assert exc.value.code == 2
+
+
+def test_cli_does_not_import_qt_or_numpy_for_help():
+    code = (
+        "import sys; sys.argv = ['subtitle-aligner', '--help']\n"
+        "from batch.cli import main\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass\n"
+        "assert 'numpy' not in sys.modules and 'PyQt5' not in sys.modules\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT / "src", capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from batch.discovery import discover_pairs, episode_key, normalized_stem, quick_fingerprint
+from parser.subtitle_parser import SubtitleEvent, save_subtitles
+
+
+def write(path, cues, end):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    step = end / cues
+    save_subtitles([SubtitleEvent(i + 1, i * step, (i + 1) * step, "x") for i in range(cues)], str(path))
+
+
+def test_name_keys():
+    assert normalized_stem("/a/Show.Name.S01E02.en.AI.srt") == "show name s01e02"
+    assert normalized_stem("Show_Name [WEB-DL] S01E02.srt.gz") == "show name s01e02"
+    assert episode_key("show_s1e2.srt") == "show s01e02"
+    assert episode_key("Show 3x07.vtt") == "show s03e07"
+    assert episode_key("Show - Ep 12.srt") == "show e12"
+    assert episode_key("[WEB-DL] Show.S01E02.en.srt") == "show s01e02"
+    assert episode_key("S01E02.srt") == "s01e02"
+    assert episode_key("movie.srt") is None
+
+
+def test_discover_pairs_by_stem_episode_and_fingerprint(tmp_path):
+    ai, human, out = tmp_path / "ai", tmp_path / "human", tmp_path / "out"
+    write(ai / "season1" / "Show.S01E01.ai.srt", 10, 1300)
+    write(human / "Show.S01E01.en.srt", 12, 1310)
+    write(ai / "season1" / "show_s01e02.srt", 10, 1400)
+    write(human / "other" / "Show - 1x02.srt", 9, 1390)
+    write(ai / "film.srt", 100, 5400)
+    write(human / "Feature Final.srt", 90, 5402)
+    write(ai / "lonely.srt", 5, 60)
+    unmatched = []
+    configs = list(discover_pairs(str(ai), str(human), str(out), output_ext=".vtt", unmatched=unmatched))
+    found = {Path(c["ai_path"]).name: (Path(c["human_path"]).name, c["match"]) for c in configs}
+    assert found == {
+        "Show.S01E01.ai.srt": ("Show.S01E01.en.srt", "stem"),
+        "show_s01e02.srt": ("Show - 1x02.srt", "episode"),
+        "film.srt": ("Feature Final.srt", "fingerprint"),
+    }
+    outputs = {c["output_path"] for c in configs}
+    assert str(out / "season1" / "show_s01e02.vtt") in outputs
+    assert [Path(p).name for p in unmatched] == ["lonely.srt"]
+    assert quick_fingerprint(str(ai / "film.srt")) == (100, 5400000)
+
+
+def test_episode_keys_need_the_same_series_and_a_unique_key(tmp_path):
+    ai, human, out = tmp_path / "ai", tmp_path / "human", tmp_path / "out"
+    write(ai / "Alpha.S01E01.srt", 10, 1000)
+    write(human / "Bravo.S01E01.srt", 10, 90000)
+    write(ai / "Alpha.S01E02.srt", 10, 2000)
+    write(human / "Alpha - 1x02 (cut).srt", 10, 50000)
+    write(ai / "x" / "Alpha S01E03 v1.srt", 10, 3000)
+    write(ai / "y" / "Alpha S01E03 v2.srt", 10, 3500)
+    write(human / "Alpha 1x03.srt", 10, 70000)
+    runs = []
+    for workers in (1, 4):
+        unmatched = []
+        runs.append((list(discover_pairs(str(ai), str(human), str(out), workers=workers, unmatched=unmatched)),
+                     unmatched))
+    assert runs[0] == runs[1]
+    configs, unmatched = runs[0]
+    found = [(Path(c["ai_path"]).name, Path(c["human_path"]).name, c["match"]) for c in configs]
+    # Different series, and an episode with two AI files, are not paired by episode
+    assert found == [("Alpha.S01E02.srt", "Alpha - 1x02 (cut).srt", "episode")]
+    assert sorted(Path(p).name for p in unmatched) == [
+        "Alpha 1x03.srt", "Alpha S01E03 v1.srt", "Alpha S01E03 v2.srt", "Alpha.S01E01.srt", "Bravo.S01E01.srt",
+    ]
+
+
+def test_quick_fingerprint_reads_only_head_and_tail(tmp_path, monkeypatch):
+    import io
+    import batch.discovery as discovery
+    path = tmp_path / "long.srt"
+    write(path, 20000, 36000)
+    read = []
+
+    class Counting(io.FileIO):
+        def read(self, size=-1):
+            data = super().read(size)
+            read.append(len(data))
+            return data
+
+    monkeypatch.setattr(discovery, "open", lambda p, mode: Counting(p, "r"), raising=False)
+    cues, end = quick_fingerprint(str(path))
+    assert abs(cues - 20000) < 20000 * 0.05
+    assert end == 36000000
+    assert sum(read) <= discovery._HEAD_BYTES + discovery._TAIL_BYTES < path.stat().st_size / 8
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from parser.subtitle_track import SubtitleTrack
+from aligner.alignment_engine import auto_align
+from aligner.drift import DriftEstimate, estimate_drift, rasterize
+
+
+def make_pair(scale, offset_ms, n=600, seed=0):
+    """Human track plus an AI track such that human ~= scale * ai + offset."""
+    rng = np.random.default_rng(seed)
+    durs = rng.integers(800, 4000, n)
+    starts = np.cumsum(rng.integers(300, 3000, n) + durs) - durs
+    ends = starts + durs
+    human = SubtitleTrack.from_texts(starts, ends, [f"h{i}" for i in range(n)])
+    jitter = rng.integers(-50, 50, n)
+    ai = SubtitleTrack.from_texts(
+        np.rint((starts - offset_ms) / scale) + jitter,
+        np.rint((ends - offset_ms) / scale) + jitter,
+        [f"a{i}" for i in range(n)],
+    )
+    return ai, human
+
+
+def test_rasterize_marks_active_cells():
+    signal = rasterize(np.array([0, 250]), np.array([100, 420]), 100, 6)
+    assert signal.tolist() == [1, 0, 1, 1, 1, 0]
+
+
+def test_estimate_drift_recovers_frame_rate_conversion():
+    ai, human = make_pair(25 / 23.976, 4300)
+    est = estimate_drift(ai, human)
+    assert abs(est.scale - 25 / 23.976) < 1e-4
+    mapped = est.apply(ai)
+    assert np.abs(mapped.start_ms - human.start_ms).max() < 200
+
+
+def test_estimate_drift_identity_and_empty():
+    ai, human = make_pair(1.0, 0)
+    est = estimate_drift(ai, human)
+    assert abs(est.scale - 1.0) < 1e-4 and abs(est.offset_ms) < 50
+    assert estimate_drift([], human) == DriftEstimate()
+
+
+def test_auto_align_handles_drift():
+    ai, human = make_pair(23.976 / 25, -9000)
+    alignment = auto_align(ai, human)
+    assert alignment == [(i, i) for i in range(len(ai))]
+
+
+def test_tiny_tracks_keep_the_coarse_estimate():
+    for n_human in (0, 1, 2):
+        human = SubtitleTrack.from_texts(np.arange(n_human) * 3000, np.arange(n_human) * 3000 + 2000,
+                                         [f"h{i}" for i in range(n_human)])
+        for n_ai in (0, 1, 2):
+            ai = SubtitleTrack.from_texts(np.arange(n_ai) * 3000 + 500, np.arange(n_ai) * 3000 + 2500,
+                                          [f"a{i}" for i in range(n_ai)])
+            est = estimate_drift(ai, human)
+            assert isinstance(est, DriftEstimate)
+            pairs = auto_align(ai, human)
+            assert all(0 <= a < n_ai and 0 <= h < n_human for a, h in pairs)
+            if n_ai == n_human:
+                assert pairs == [(i, i) for i in range(n_ai)]
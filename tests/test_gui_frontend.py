@@ -12,3 +12,221 @@ def test_import_main_window():
     module = importlib.import_module('gui.gui_frontend')
     cls = getattr(module, 'SubtitleRetimerMainWindow')
     assert cls is not None
+
+
+@pytest.fixture(scope="module")
+def qapp(tmp_path_factory):
+    import os
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # Windows created by these tests cache parsed tracks here, not in the user cache
+    os.environ["SUBTITLE_ALIGNER_CACHE_DIR"] = str(tmp_path_factory.mktemp("track-cache"))
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def test_table_model_reads_events_and_tracks_lazily(qapp):
+    import numpy as np
+    from PyQt5.QtCore import Qt
+    from gui.subtitle_table_model import SubtitleTableModel
+    from parser.subtitle_parser import SubtitleEvent
+    from parser.subtitle_track import SubtitleTrack
+
+    events = [SubtitleEvent(1, 1.0, 2.5, "Hello\nthere"), SubtitleEvent(2, 3.0, 4.0, "x")]
+    n = 60000
+    starts = np.arange(n, dtype=np.int64) * 2000
+    track = SubtitleTrack.from_texts(starts, starts + 1500, ["cue"] * n)
+    for source in (events, SubtitleTrack.from_events(events)):
+        model = SubtitleTableModel(source)
+        assert (model.rowCount(), model.columnCount()) == (2, 3)
+        assert model.headerData(1, Qt.Horizontal) == "Time"
+        assert model.data(model.index(0, 1)) == "1.000 → 2.500"
+        assert model.data(model.index(0, 2)) == "Hello / there"
+        assert model.data(model.index(0, 2), Qt.ToolTipRole) == "Hello\nthere"
+    model.set_events(track)
+    assert model.rowCount() == n
+    assert model.data(model.index(n - 1, 0)) == str(n)
+
+
+def test_main_window_populates_views(qapp):
+    from parser.subtitle_parser import SubtitleEvent
+    module = importlib.import_module('gui.gui_frontend')
+    window = module.SubtitleRetimerMainWindow()
+    events = [SubtitleEvent(1, 1.0, 2.0, "a")]
+    window._populate_table(window.ai_table, window.ai_model, events)
+    assert window.ai_table.model().rowCount() == 1
+    assert window.ai_table.columnWidth(0) > 0
+
+
+def wait_for_jobs(app, window, timeout=5.0):
+    import time
+    deadline = time.monotonic() + timeout
+    while window.jobs and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    window.pool.waitForDone(int(timeout * 1000))
+    app.processEvents()
+    assert not window.jobs
+
+
+def test_background_load_align_and_save(qapp, tmp_path, monkeypatch):
+    from parser.subtitle_parser import SubtitleEvent, load_subtitles, save_subtitles
+    module = importlib.import_module('gui.gui_frontend')
+    for name, shift in (("ai.srt", 0.0), ("human.srt", 0.2)):
+        save_subtitles([SubtitleEvent(i + 1, i * 2 + shift, i * 2 + 1 + shift, f"{name}{i}") for i in range(20)],
+                       str(tmp_path / name))
+    window = module.SubtitleRetimerMainWindow()
+    window.open_file("ai", str(tmp_path / "ai.srt"))
+    window.open_file("human", str(tmp_path / "human.srt"))
+    wait_for_jobs(qapp, window)
+    assert window.ai_model.rowCount() == window.human_model.rowCount() == 20
+
+    window.on_auto_align()
+    wait_for_jobs(qapp, window)
+    assert window.alignment[:2] == [(0, 0), (1, 1)]
+
+    out = tmp_path / "out.srt"
+    saved = []
+    monkeypatch.setattr(module.QFileDialog, "getSaveFileName", lambda *a, **k: (str(out), ""))
+    monkeypatch.setattr(module.QMessageBox, "information", lambda *a, **k: saved.append(a[2]))
+    window.on_save_output()
+    wait_for_jobs(qapp, window)
+    assert saved and load_subtitles(str(out))[0].start == 0.2
+
+
+def test_stale_and_cancelled_results_are_dropped(qapp):
+    import threading
+    from parser.subtitle_parser import SubtitleEvent
+    module = importlib.import_module('gui.gui_frontend')
+    window = module.SubtitleRetimerMainWindow()
+    release = threading.Event()
+    results = []
+
+    def slow(worker):
+        release.wait(5)
+        return [(0, 0)]
+
+    window.start_job("align", "Aligning…", slow, on_done=results.append)
+    window._set_events("ai", [SubtitleEvent(1, 0.0, 1.0, "new")])
+    release.set()
+    wait_for_jobs(qapp, window)
+    assert results == [] and window.alignment == []
+
+    release.clear()
+    window.start_job("align", "Aligning…", slow, on_done=results.append)
+    window.on_cancel()
+    assert not window.jobs and window.progress_bar.isHidden()
+    release.set()
+    window.pool.waitForDone(5000)
+    qapp.processEvents()
+    assert results == []
+
+
+def test_alignment_index_lookups():
+    from gui.timeline_view import ANCHORED, MATCHED, UNMATCHED, AlignmentIndex
+    index = AlignmentIndex(5, 4, [(0, 0), (1, 0), (3, 2), (4, 3)], anchors=[(3, 2)])
+    assert index.ai_state.tolist() == [MATCHED, MATCHED, UNMATCHED, ANCHORED, MATCHED]
+    assert index.human_state.tolist() == [MATCHED, UNMATCHED, ANCHORED, MATCHED]
+    assert index.ai_to_human.tolist() == [0, 0, 0, 2, 3]
+    assert index.human_to_ai.tolist() == [0, 0, 3, 4]
+    assert index.pairs_touching([3], []).tolist() == [[3, 2]]
+    assert AlignmentIndex(3, 5).ai_to_human.tolist() == [0, 2, 4]
+
+
+def test_timeline_paints_large_tracks_quickly(qapp):
+    import time
+    import numpy as np
+    from gui.timeline_view import AlignmentTimeline
+    from parser.subtitle_track import SubtitleTrack
+
+    n = 100000
+    starts = np.arange(n, dtype=np.int64) * 1500
+    track = SubtitleTrack.from_texts(starts, starts + 1000, [""] * n)
+    timeline = AlignmentTimeline()
+    timeline.resize(1200, 100)
+    timeline.set_tracks(track, track)
+    timeline.set_alignment([(i, i) for i in range(0, n, 2)], [(10, 10)])
+    for span in (60000, n * 1500):
+        timeline.span_ms = span
+        timeline.scroll_to(n * 700)
+        t = time.perf_counter()
+        timeline.grab()
+        assert time.perf_counter() - t < 0.1
+    rows, x0, x1, state = timeline._lane_rows(0)
+    assert len(rows) <= 2 * timeline.width()
+
+
+def test_tables_scroll_together(qapp):
+    from parser.subtitle_parser import SubtitleEvent
+    module = importlib.import_module('gui.gui_frontend')
+    window = module.SubtitleRetimerMainWindow()
+    window.resize(1000, 600)
+    window.show()
+    window._set_events("ai", [SubtitleEvent(i + 1, i, i + 0.5, "a") for i in range(300)])
+    window._set_events("human", [SubtitleEvent(i + 1, i, i + 0.5, "h") for i in range(320)])
+    window.alignment = [(i, i + 20) for i in range(300)]
+    window.timeline.set_alignment(window.alignment, [])
+    qapp.processEvents()
+    window.ai_table.verticalScrollBar().setValue(100)
+    qapp.processEvents()
+    top = window.ai_table.rowAt(0)
+    assert top > 0
+    assert window.human_table.rowAt(0) == top + 20
+    assert window.timeline.start_ms <= top * 1000 < window.timeline.start_ms + window.timeline.span_ms
+    window.close()
+
+
+def test_link_undo_redo(qapp, monkeypatch):
+    from parser.subtitle_parser import SubtitleEvent
+    module = importlib.import_module('gui.gui_frontend')
+    window = module.SubtitleRetimerMainWindow()
+    window._set_events("ai", [SubtitleEvent(i + 1, i * 2.0, i * 2 + 1.0, "a") for i in range(10)])
+    window._set_events("human", [SubtitleEvent(i + 1, i * 2.0, i * 2 + 1.0, "h") for i in range(10)])
+    window.on_auto_align()
+    wait_for_jobs(qapp, window)
+    assert window.alignment[3] == (3, 3) and not window.undo_action.isEnabled()
+
+    window.ai_table.selectRow(3)
+    window.human_table.selectRow(4)
+    window.on_link_lines()
+    wait_for_jobs(qapp, window)
+    assert window.anchors == [(3, 4)] and (3, 4) in window.alignment
+    assert window.history.labels == ["Auto-align", "Link AI 4 ↔ human 5"]
+
+    window.on_undo()
+    assert window.anchors == [] and window.alignment[3] == (3, 3) and window.redo_action.isEnabled()
+    window.on_redo()
+    assert window.anchors == [(3, 4)]
+    window.restore_history(0)
+    assert window.anchors == [] and window.history.position == 0
+
+    # Crossing links are refused before any re-align starts
+    window.restore_history(1)
+    errors = []
+    monkeypatch.setattr(module.QMessageBox, "critical", lambda *a, **k: errors.append(a[2]))
+    window.ai_table.selectRow(5)
+    window.human_table.selectRow(2)
+    window.on_link_lines()
+    assert errors and "cross" in errors[0] and not window.jobs
+
+
+def test_links_made_during_a_realign_are_kept(qapp):
+    from parser.subtitle_parser import SubtitleEvent
+    module = importlib.import_module('gui.gui_frontend')
+    window = module.SubtitleRetimerMainWindow()
+    window._set_events("ai", [SubtitleEvent(i + 1, i * 2.0, i * 2 + 1.0, "a") for i in range(10)])
+    window._set_events("human", [SubtitleEvent(i + 1, i * 2.0, i * 2 + 1.0, "h") for i in range(10)])
+    # Hold the first re-align so the second link arrives while it is still running
+    window._align_lock.acquire()
+    try:
+        window.ai_table.selectRow(2)
+        window.human_table.selectRow(3)
+        window.on_link_lines()
+        window.ai_table.selectRow(6)
+        window.human_table.selectRow(7)
+        window.on_link_lines()
+    finally:
+        window._align_lock.release()
+    wait_for_jobs(qapp, window)
+    assert window.anchors == [(2, 3), (6, 7)]
+    assert (2, 3) in window.alignment and (6, 7) in window.alignment
+    assert window.history.labels == ["Link AI 3 ↔ human 4, AI 7 ↔ human 8"]
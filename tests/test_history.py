@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from manual.history import EditHistory, PairBlocks
+
+
+def test_pair_blocks_share_unchanged_blocks():
+    pairs = [(i, i) for i in range(10000)]
+    first = PairBlocks.from_pairs(pairs, block_rows=1000)
+    assert len(first.blocks) == 10 and first.to_list() == pairs
+    edited = pairs[:4500] + [(4500, 4501)] + pairs[4501:]
+    second = PairBlocks.from_pairs(edited, previous=first, block_rows=1000)
+    fresh = [b for b, old in zip(second.blocks, first.blocks) if b is not old]
+    assert len(fresh) == 1 and fresh[0][500].tolist() == [4500, 4501]
+    assert second.to_list() == edited and not second.blocks[0].flags.writeable
+    assert PairBlocks.from_pairs(reversed(pairs), block_rows=1000) == first
+
+
+def test_undo_redo_and_goto():
+    history = EditHistory(block_rows=100)
+    assert history.current is None and history.undo() is None
+    alignment = [(i, i) for i in range(1000)]
+    history.commit([], alignment, "Auto-align")
+    history.commit([(500, 501)], alignment[:500] + [(500, 501)] + alignment[501:], "Link")
+    history.commit([(500, 501), (900, 900)], alignment[:500] + [(500, 501)] + alignment[501:], "Link 2")
+    assert history.labels == ["Auto-align", "Link", "Link 2"]
+
+    assert history.undo().label == "Link" and history.can_redo()
+    assert history.goto(0).anchors.to_list() == [] and not history.can_undo()
+    assert history.redo().alignment.to_list()[500] == (500, 501)
+    with pytest.raises(IndexError):
+        history.goto(3)
+
+    history.commit([], alignment, "Reset")
+    assert history.labels == ["Auto-align", "Link", "Reset"] and not history.can_redo()
+
+
+def test_memory_grows_with_the_changed_part_only():
+    history = EditHistory()
+    alignment = [(i, i) for i in range(200000)]
+    history.commit([], alignment)
+    base = history.nbytes()
+    for k in range(20):
+        alignment[k * 9000] = (k * 9000, k * 9000 + 1)
+        history.commit([(k * 9000, k * 9000 + 1)], alignment)
+    assert history.nbytes() - base < 20 * 2 * 1024 * 16
+    history = EditHistory(max_entries=3)
+    for k in range(5):
+        history.commit([], alignment, str(k))
+    assert history.labels == ["2", "3", "4"] and history.position == 2
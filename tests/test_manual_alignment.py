@@ -4,7 +4,7 @@ import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.manual.manual_alignment import add_anchor, remove_anchor, validate_anchors
+from src.manual.manual_alignment import AnchorSet, add_anchor, remove_anchor, validate_anchors
 
 
 def test_add_anchor_empty():
@@ -41,3 +41,54 @@ def test_validate_anchors():
     assert validate_anchors([(0, 0), (1, 1)])
     assert not validate_anchors([(0, 0), (0, 1)])
     assert not validate_anchors([(0, 0), (1, 0)])
+
+
+def test_add_anchor_keeps_crossing_anchors():
+    assert add_anchor([(5, 5)], 6, 1) == [(5, 5), (6, 1)]
+
+
+def test_list_wrappers_keep_order_and_reject_invalid_lists():
+    assert add_anchor([(5, 5), (1, 1)], 3, 3) == [(5, 5), (1, 1), (3, 3)]
+    assert remove_anchor([(5, 5), (1, 1), (3, 3)], 1, 1) == [(5, 5), (3, 3)]
+    for invalid in ([(0, 0), (0, 0)], [(0, 0), (0, 1)]):
+        assert not validate_anchors(invalid)
+        with pytest.raises(ValueError):
+            add_anchor(invalid, 2, 2)
+    with pytest.raises(ValueError, match="already mapped"):
+        add_anchor([(1, 2)], 3, 2)
+
+
+def test_anchor_set_indexes():
+    anchors = AnchorSet([(10, 12), (2, 3), (5, 8)])
+    assert anchors.to_list() == [(2, 3), (5, 8), (10, 12)]
+    assert (5, 8) in anchors and (5, 9) not in anchors and len(anchors) == 3
+    assert anchors.human_for(10) == 12 and anchors.ai_for(3) == 2 and anchors.ai_for(4) is None
+    assert anchors.neighbours(5) == ((2, 3), (10, 12))
+    assert anchors.neighbours(11) == ((10, 12), None)
+    assert not anchors.add(5, 8)
+    assert anchors.add(7, 9)
+    assert anchors.discard(2, 3) and not anchors.discard(2, 3)
+    assert anchors.to_list() == [(5, 8), (7, 9), (10, 12)]
+
+
+def test_anchor_set_rejects_conflicts_and_crossings():
+    anchors = AnchorSet([(2, 3), (10, 12)])
+    for ai, human in [(2, 4), (4, 3), (5, 2), (11, 11), (5, 12)]:
+        with pytest.raises(ValueError):
+            anchors.add(ai, human)
+    assert anchors.to_list() == [(2, 3), (10, 12)]
+    crossing = AnchorSet([(2, 3)], allow_crossing=True)
+    assert crossing.add(5, 1) and crossing.to_list() == [(2, 3), (5, 1)]
+
+
+def test_anchor_set_bulk_is_all_or_nothing():
+    anchors = AnchorSet([(0, 0)])
+    assert anchors.update([(i, 2 * i) for i in range(1, 2000)] + [(1, 2)]) == 1999
+    with pytest.raises(ValueError):
+        anchors.update([(5000, 5000), (3000, 6000)])
+    with pytest.raises(ValueError):
+        anchors.update([(5000, 5000), (5000, 5001)])
+    assert len(anchors) == 2000 and 5000 not in [ai for ai, _ in anchors]
+    assert anchors.difference_update([(i, 2 * i) for i in range(0, 2000, 2)] + [(1, 1)]) == 1000
+    assert anchors.to_list()[:2] == [(1, 2), (3, 6)]
+    assert anchors.add(2, 4)
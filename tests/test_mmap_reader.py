@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from parser.mmap_reader import read_track
+from parser.subtitle_parser import load_subtitles
+
+
+SRT = (
+    "﻿1\r\n00:00:01,000 --> 00:00:02,000\r\n  Hello  \r\n\r\n"
+    "2\r\n0:00:02.5 --> 00:00:04,000\r\nWörld\r\nagain\r\n\r\n\r\n"
+    "3\r\n00:00:04,250 --> 00:00:05,000\r\n\r\n"
+    "4\r\n00:00:06,000 --> 00:00:07,000\r\nlast\r\n"
+)
+
+
+def test_read_track_matches_load_subtitles(tmp_path):
+    path = tmp_path / "a.srt"
+    path.write_bytes(SRT.encode("utf-8"))
+    expected = load_subtitles(str(path))
+    for chunk_size in (1, 7, 1 << 20):
+        track = read_track(str(path), chunk_size=chunk_size)
+        assert track.to_events() == expected
+    assert track.text(1) == "Wörld\nagain"
+
+
+def test_read_track_vtt(tmp_path):
+    path = tmp_path / "a.vtt"
+    path.write_text("WEBVTT\n\n00:01.000 --> 00:02.000 align:start\nHi\n\n01:00:00.000 --> 01:00:01.500\nthere\n")
+    track = read_track(str(path))
+    assert track.start_ms.tolist() == [1000, 3600000]
+    assert track.end_ms.tolist() == [2000, 3601500]
+    assert track.texts() == ["Hi", "there"]
+
+
+def test_read_track_empty_and_invalid(tmp_path):
+    empty = tmp_path / "empty.srt"
+    empty.write_bytes(b"")
+    assert len(read_track(str(empty))) == 0
+    bad = tmp_path / "bad.srt"
+    bad.write_text("1\nnot a timing line\ntext\n")
+    with pytest.raises(ValueError):
+        read_track(str(bad))
+
+
+@pytest.mark.parametrize("text", [
+    # Separator lines the line parser strips to nothing: U+00A0, U+3000 and \x1c
+    "1\n00:00:01,000 --> 00:00:02,000\nHello\xa0\n\xa0\n2\n00:00:03,000 --> 00:00:04,000\nWorld\n",
+    "1\n00:00:01,000 --> 00:00:02,000\n　Hello\n　\n\n2\n00:00:03,000 --> 00:00:04,000\nWorld  \n",
+    "1\n00:00:01,000 --> 00:00:02,000\nHello\n\x1c\n2\n00:00:03,000 --> 00:00:04,000\nnon\xa0breaking\n",
+    # A lone index at the end of the file, with and without blank lines after it
+    "1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2",
+    "1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n\n \n",
+])
+def test_read_track_strips_like_the_line_parser(tmp_path, text):
+    path = tmp_path / "a.srt"
+    path.write_bytes(text.encode("utf-8"))
+    expected = load_subtitles(str(path))
+    for chunk_size in (1, 1 << 20):
+        assert read_track(str(path), chunk_size=chunk_size).to_events() == expected
+    assert expected[0].text == "Hello"
+
+
+def test_lone_index_before_more_cues_fails_in_both_parsers(tmp_path):
+    path = tmp_path / "a.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n\n3\n00:00:03,000 --> 00:00:04,000\nWorld\n")
+    for parse in (load_subtitles, read_track):
+        with pytest.raises(ValueError):
+            parse(str(path))
@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pytest
+
+from generator.output_generator import iter_retimed_subtitles, retime_track
+from generator.timing_normalizer import TimingPolicy, normalize_timing
+from parser.subtitle_track import SubtitleTrack
+
+
+def track(times, texts=None):
+    times = np.asarray(times, dtype=np.int64)
+    texts = texts or ["x"] * len(times)
+    return SubtitleTrack.from_texts(times[:, 0], times[:, 1], texts)
+
+
+def test_one_to_one_and_interpolated_gaps():
+    ai = track([(0, 1000), (2000, 3000), (4000, 5000), (6000, 7000)])
+    human = track([(500, 1500), (4700, 5700), (6800, 7900)])
+    out = retime_track(ai, human, [(0, 0), (2, 1), (3, 2)])
+    assert out.start_ms.tolist() == [500, 2600, 4700, 6800]
+    assert out.end_ms.tolist() == [1500, 3600, 5700, 7900]
+    assert out.index.tolist() == [1, 2, 3, 4]
+    assert out.texts() == ai.texts()
+
+    dropped = retime_track(ai, human, [(0, 0), (2, 1), (3, 2)], fill_unmatched=False)
+    assert dropped.start_ms.tolist() == [500, 4700, 6800]
+    assert [ev.index for ev in iter_retimed_subtitles(list(ai), list(human), [(0, 0)], False)] == [1]
+
+
+def test_many_to_one_splits_by_text_length():
+    ai = track([(0, 1000), (1000, 2000)], ["abc", "a"])
+    human = track([(10000, 14000)])
+    out = retime_track(ai, human, [(0, 0), (1, 0)])
+    assert out.start_ms.tolist() == [10000, 13000]
+    assert out.end_ms.tolist() == [13000, 14000]
+
+
+def test_one_to_many_takes_whole_span():
+    ai = track([(0, 3000), (4000, 5000)])
+    human = track([(100, 1000), (1200, 3100), (4200, 5200)])
+    out = retime_track(ai, human, [(0, 0), (0, 1), (1, 2)])
+    assert out.start_ms.tolist() == [100, 4200]
+    assert out.end_ms.tolist() == [3100, 5200]
+
+
+def test_long_overlapping_human_cue_keeps_dialogue_matches():
+    from aligner.alignment_engine import auto_align
+    ai = track([(i * 6000 + 100, i * 6000 + 2100) for i in range(5)])
+    human = track([(0, 30000)] + [(i * 6000 + 300, i * 6000 + 2300) for i in range(5)], ["[music]"] + ["d"] * 5)
+    alignment = auto_align(ai, human)
+    assert (0, 0) in alignment and (0, 1) in alignment
+    out = retime_track(ai, human, alignment)
+    assert out.start_ms.tolist() == [i * 6000 + 300 for i in range(5)]
+    assert out.end_ms.tolist() == [i * 6000 + 2300 for i in range(5)]
+    # A cue that only the long one overlaps still takes it
+    out = retime_track(ai, human, [(0, 1), (1, 0), (2, 0), (2, 3)])
+    assert out.start_ms.tolist()[:3] == [300, 0, 12300]
+    assert out.end_ms.tolist()[:3] == [2300, 30000, 14300]
+
+
+def test_out_of_range_pair_raises():
+    ai = track([(0, 1000)])
+    with pytest.raises(ValueError):
+        retime_track(ai, ai, [(0, 3)])
+    assert len(retime_track(ai, ai, [])) == 0
+
+
+def test_normalize_timing_rules():
+    ai = track(
+        [(0, 0), (1000, 3000), (2990, 4000), (4020, 4500), (9000, 9100)],
+        ["a", "b", "c", "d", "x" * 50],
+    )
+    policy = TimingPolicy(min_duration_ms=300, min_gap_ms=80, max_cps=25)
+    out, counts = normalize_timing(ai, policy)
+    starts, ends = out.start_ms, out.end_ms
+    assert np.all(starts[1:] - ends[:-1] >= 80)
+    assert np.all(ends > starts)
+    assert ends[-1] - starts[-1] == 2000  # 50 chars at 25 cps
+    assert counts == {"max_cps": 2, "min_duration": 1, "overlap": 1, "min_gap": 1, "shifted": 0}
+    assert out.texts() == ai.texts()
+
+
+def test_normalize_timing_shift_keeps_durations_and_sorts():
+    ai = track([(2000, 3000), (0, 1500), (1000, 1600)], ["c", "a", "b"])
+    out, counts = normalize_timing(ai, TimingPolicy(min_duration_ms=0, min_gap_ms=100, max_cps=None, overlap="shift"))
+    assert out.texts() == ["a", "b", "c"]
+    assert out.start_ms.tolist() == [0, 1600, 2300]
+    assert out.end_ms.tolist() == [1500, 2200, 3300]
+    assert counts["overlap"] == 1 and counts["shifted"] == 2
+
+
+@pytest.mark.parametrize("overlap", ["trim", "shift"])
+@pytest.mark.parametrize("gap", [0, 80])
+def test_normalize_timing_never_leaves_zero_length_cues(overlap, gap):
+    ai = track([(1000, 1000), (1000, 1000), (5000, 5000)])
+    out, _ = normalize_timing(ai, TimingPolicy(min_duration_ms=0, min_gap_ms=gap, max_cps=None, overlap=overlap))
+    starts, ends = out.start_ms, out.end_ms
+    assert np.all(ends > starts)
+    assert np.all(starts[1:] - ends[:-1] >= gap)
+
+
+def test_normalize_timing_renumbers_out_of_order_cues(tmp_path):
+    from parser.subtitle_parser import save_subtitles
+    ai = track([(2000, 3000), (0, 1500), (1000, 1600)], ["c", "a", "b"])
+    out, _ = normalize_timing(ai)
+    assert out.index.tolist() == [1, 2, 3]
+    path = tmp_path / "out.srt"
+    save_subtitles(out, str(path))
+    numbers = [line for line in path.read_text(encoding="utf-8").splitlines() if line.isdigit()]
+    assert numbers == ["1", "2", "3"]
@@ -0,0 +1,67 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import numpy as np
+import pytest
+
+from aligner.alignment_engine import auto_align, refine_alignment_with_anchors
+from aligner.drift import estimate_drift
+from aligner.parallel_alignment import align_parallel
+from synthetic import PairSpec, generate_pair
+
+NOISY = PairSpec(drop_rate=0.3, extra_rate=0.2, split_rate=0.1, merge_rate=0.1, noise_rate=0.8)
+
+
+@pytest.mark.parametrize("overlap", [0, 4, 50])
+def test_text_chunks_agree_with_serial_alignment(overlap):
+    ai, human, _ = generate_pair(3000, seed=8, spec=NOISY)
+    serial = set(auto_align(ai, human, mode="text"))
+    with ThreadPoolExecutor(2) as pool:
+        chunked = align_parallel(ai, human, mode="text", executor=pool, chunk_cues=300, overlap=overlap)
+    assert chunked == sorted(set(chunked))
+    assert len(serial.intersection(chunked)) >= 0.98 * len(serial)
+
+
+def test_text_chunks_are_an_approximation_where_cues_are_missing():
+    # Windows follow the proportional diagonal, so long deletions on one side can
+    # stitch a different (still ordered and in range) alignment than the serial one.
+    ai, human, _ = generate_pair(4000, seed=3, spec=PairSpec(noise_rate=0.9, noise_chars=0.3, drop_rate=0.2))
+    ai = ai.take(np.r_[0:2500, 2900:len(ai)])
+    human = human.take(np.r_[0:300, 1500:len(human)])
+    with ThreadPoolExecutor(2) as pool:
+        chunked = align_parallel(ai, human, mode="text", executor=pool, chunk_cues=250, overlap=40)
+    assert chunked and chunked == sorted(set(chunked))
+    assert all(0 <= a < len(ai) and 0 <= h < len(human) for a, h in chunked)
+    assert all(h0 <= h1 for (_, h0), (_, h1) in zip(chunked, chunked[1:]))
+
+
+def test_process_pool_matches_serial_where_exact():
+    ai, human, truth = generate_pair(3000, seed=2)
+    anchors = truth[::500]
+    serial = set(auto_align(ai, human, mode="text"))
+    assert len(serial.intersection(align_parallel(ai, human, mode="text", workers=2, chunk_cues=500))) >= 0.98 * len(serial)
+    # Anchored chunks and timing mode are exactly the serial alignment
+    for mode in ("timing", "text"):
+        assert align_parallel(ai, human, anchors, workers=2, chunk_cues=700, mode=mode) == \
+            refine_alignment_with_anchors(ai, human, anchors, mode=mode)
+
+
+def test_timing_mode_scores_drift_on_threads():
+    ai, human, _ = generate_pair(2000, seed=5, spec=PairSpec(scale=25 / 23.976, offset_ms=4000))
+    with ThreadPoolExecutor(3) as pool:
+        assert estimate_drift(ai, human, executor=pool) == estimate_drift(ai, human)
+    assert align_parallel(ai, human, workers=3) == auto_align(ai, human)
+
+
+def test_align_parallel_checks_anchors():
+    ai, human, _ = generate_pair(50, seed=1)
+    with pytest.raises(ValueError):
+        align_parallel(ai, human, anchors=[(0, 5), (3, 2)], executor="thread")
+    with pytest.raises(ValueError):
+        align_parallel(ai, human, anchors=[(0, len(human))], executor="thread")
+    assert align_parallel(ai[:0], human, executor="thread") == []
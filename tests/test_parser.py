@@ -1,9 +1,15 @@
 import sys
+import io
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from parser.subtitle_parser import SubtitleEvent, load_subtitles, save_subtitles
+from parser.subtitle_parser import (
+    SubtitleEvent, _format_timestamp, _parse_timestamp, _parse_timing_line,
+    iter_subtitles, load_subtitles, save_subtitles,
+)
 
 
 def create_srt_file(tmp_path: Path) -> Path:
@@ -113,3 +119,42 @@ def test_load_subtitles_with_bom(tmp_path):
         SubtitleEvent(1, 1.0, 2.0, "Hello"),
         SubtitleEvent(2, 2.5, 4.0, "World"),
     ]
+
+
+def test_iter_subtitles_is_lazy(tmp_path):
+    path = create_srt_file(tmp_path)
+    it = iter_subtitles(str(path))
+    assert next(it) == SubtitleEvent(1, 1.0, 2.0, "Hello")
+    assert next(it) == SubtitleEvent(2, 2.5, 4.0, "World")
+
+
+def test_iter_subtitles_from_stream_sniffs_format():
+    stream = io.StringIO("WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nHello\n")
+    assert list(iter_subtitles(stream)) == [SubtitleEvent(1, 1.0, 2.0, "Hello")]
+
+
+def test_save_subtitles_to_stream_matches_file(tmp_path):
+    events = [
+        SubtitleEvent(1, 0.0, 1.0, "A"),
+        SubtitleEvent(2, 1.5, 2.0, "B"),
+    ]
+    path = tmp_path / "out.srt"
+    save_subtitles(events, str(path))
+    stream = io.StringIO()
+    save_subtitles(iter(events), stream, fmt="srt")
+    assert stream.getvalue() == path.read_text(encoding="utf-8")
+
+
+def test_parse_timing_line_variants():
+    assert _parse_timing_line("00:00:01,000 --> 00:00:02,500") == (1000, 2500)
+    assert _parse_timing_line("01:02.5 --> 01:03.25 align:start") == (62500, 63250)
+    assert _parse_timing_line(" 10:00:00 --> 10:00:01.0005") == (36000000, 36001000)
+    assert _parse_timestamp("00:00:01.5") == 1.5
+    with pytest.raises(ValueError):
+        _parse_timing_line("00:00:01,000 -> 00:00:02,000")
+
+
+def test_format_timestamp_never_overflows_milliseconds():
+    assert _format_timestamp(1.9996) == "00:00:02,000"
+    assert _format_timestamp(3599.9999, as_vtt=True) == "01:00:00.000"
+    assert _format_timestamp(0.001) == "00:00:00,001"
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from parser.subtitle_parser import SubtitleEvent, load_subtitles, save_subtitles
+from parser.subtitle_track import SubtitleTrack, load_track, parse_timing_lines
+
+
+EVENTS = [
+    SubtitleEvent(1, 1.0, 2.0, "Hello"),
+    SubtitleEvent(2, 2.5, 4.0, "Wörld\nagain"),
+    SubtitleEvent(3, 4.25, 5.0, ""),
+]
+
+
+def test_from_events_roundtrip():
+    track = SubtitleTrack.from_events(EVENTS)
+    assert len(track) == 3
+    assert list(track) == EVENTS
+    assert track[-1] == EVENTS[-1]
+    assert track.start_ms.dtype == np.int64
+    assert track.start_ms.tolist() == [1000, 2500, 4250]
+    assert track.end_ms.tolist() == [2000, 4000, 5000]
+
+
+def test_slice_and_take_keep_texts():
+    track = SubtitleTrack.from_events(EVENTS)
+    assert list(track[1:]) == EVENTS[1:]
+    assert track.take([2, 0]).texts() == ["", "Hello"]
+
+
+def test_retimed_shares_text():
+    track = SubtitleTrack.from_events(EVENTS)
+    shifted = track.retimed(track.start_ms + 500, track.end_ms + 500)
+    assert shifted.texts() == track.texts()
+    assert shifted[0].start == 1.5
+
+
+def test_load_track_matches_load_subtitles(tmp_path):
+    path = tmp_path / "t.srt"
+    save_subtitles(EVENTS, str(path))
+    assert list(load_track(str(path))) == load_subtitles(str(path))
+    out = tmp_path / "again.srt"
+    save_subtitles(load_track(str(path)), str(out))
+    assert out.read_text(encoding="utf-8") == path.read_text(encoding="utf-8")
+
+
+def test_parse_timing_lines_bulk_and_fallback():
+    lines = [
+        "00:00:01,000 --> 00:00:02,500",
+        "01:02:03.456 --> 01:02:04.000",
+        "00:01.5 --> 00:02.000 line:0",
+        "10:00:00,000 --> 10:00:01,000",
+    ]
+    starts, ends = parse_timing_lines(lines)
+    assert starts.tolist() == [1000, 3723456, 1500, 36000000]
+    assert ends.tolist() == [2500, 3724000, 2000, 36001000]
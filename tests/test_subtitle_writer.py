@@ -0,0 +1,79 @@
+import gzip
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from generator.output_generator import generate_retimed_subtitles
+from parser.subtitle_parser import SubtitleEvent, save_subtitles
+from parser.subtitle_track import SubtitleTrack, format_timestamps
+from parser.subtitle_writer import SubtitleWriter
+
+
+EVENTS = [
+    SubtitleEvent(1, 1.0, 2.0, "Hello"),
+    SubtitleEvent(2, 2.5, 4.0, "Wörld\nagain"),
+    SubtitleEvent(3, 4.25, 360000.5, ""),
+]
+
+
+def _text(events, fmt):
+    stream = io.StringIO()
+    save_subtitles(events, stream, fmt=fmt)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["srt", "vtt"])
+def test_track_fast_path_matches_events(fmt):
+    track = SubtitleTrack.from_events(EVENTS)
+    stream = io.BytesIO()
+    with SubtitleWriter(stream, fmt, buffer_size=1) as writer:
+        writer.write_track(track[:1])
+        writer.write_track(track[1:])
+    assert stream.getvalue().decode("utf-8") == _text(EVENTS, fmt)
+    assert _text([], fmt) == ("WEBVTT" if fmt == "vtt" else "")
+
+
+def test_format_timestamps():
+    assert format_timestamps([0, -5, 3723004, 360000000], ".") == [
+        b"00:00:00.000", b"00:00:00.000", b"01:02:03.004", b"100:00:00.000",
+    ]
+
+
+def test_gzip_output_by_suffix(tmp_path):
+    path = tmp_path / "out.srt.gz"
+    save_subtitles(EVENTS, str(path))
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert f.read() == _text(EVENTS, "srt")
+
+
+def test_failed_write_keeps_previous_output(tmp_path):
+    path = tmp_path / "out.srt"
+    save_subtitles(EVENTS[:1], str(path))
+    before = path.read_bytes()
+
+    def broken():
+        yield EVENTS[1]
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        save_subtitles(broken(), str(path))
+    assert path.read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == ["out.srt"]
+
+
+def test_stdout_target(capsysbinary):
+    save_subtitles(EVENTS[:1], "-", fmt="srt")
+    assert capsysbinary.readouterr().out == b"1\n00:00:01,000 --> 00:00:02,000\nHello\n"
+
+
+def test_generate_from_tracks_matches_events(tmp_path):
+    ai = SubtitleTrack.from_events(EVENTS)
+    human = SubtitleTrack.from_events([SubtitleEvent(1, 10.0, 11.0, "x"), SubtitleEvent(2, 12.0, 13.5, "y")])
+    alignment = [(0, 1), (1, 0), (2, 1)]
+    generate_retimed_subtitles(ai, human, alignment, str(tmp_path / "fast.srt"))
+    generate_retimed_subtitles(list(ai), list(human), alignment, str(tmp_path / "slow.srt"))
+    assert (tmp_path / "fast.srt").read_bytes() == (tmp_path / "slow.srt").read_bytes()
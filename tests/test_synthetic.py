@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import numpy as np
+
+from aligner.alignment_engine import auto_align
+from synthetic import PairSpec, generate_pair, write_pair
+from parser.subtitle_track import load_track
+
+
+def test_generate_pair_is_seeded():
+    a1, h1, t1 = generate_pair(500, seed=3)
+    a2, h2, t2 = generate_pair(500, seed=3)
+    a3, _, _ = generate_pair(500, seed=4)
+    assert t1 == t2 and a1.texts() == a2.texts() and np.array_equal(a1.start_ms, a2.start_ms)
+    assert np.array_equal(h1.start_ms, h2.start_ms)
+    assert a1.texts() != a3.texts()
+
+
+def test_truth_covers_edits():
+    spec = PairSpec(split_rate=0.1, merge_rate=0.1, drop_rate=0.1, extra_rate=0.1)
+    ai, human, truth = generate_pair(2000, seed=1, spec=spec)
+    assert len(human) == 2000
+    ai_rows = [a for a, _ in truth]
+    human_rows = [h for _, h in truth]
+    assert len(set(ai_rows)) < len(ai)  # extra AI-only lines
+    assert len(set(human_rows)) < len(human)  # dropped lines
+    assert len(set(ai_rows)) < len(ai_rows) and len(set(human_rows)) < len(human_rows)  # merges, splits
+    assert auto_align(ai, human)[:50] == truth[:50]
+
+
+def test_write_pair(tmp_path):
+    ai_path, human_path = write_pair(str(tmp_path), 100, seed=2)
+    ai, human, _ = generate_pair(100, seed=2)
+    assert load_track(ai_path).texts() == ai.texts()
+    assert np.array_equal(load_track(human_path).end_ms, human.end_ms)
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from parser.subtitle_parser import SubtitleEvent
+from parser.subtitle_track import SubtitleTrack
+from aligner.alignment_engine import auto_align
+from aligner.text_alignment import compute_text_features, pair_similarity, text_features
+
+
+HUMAN = [
+    "Where are you going tonight?",
+    "To the harbour, to meet my brother.",
+    "He arrived from Lisbon this morning.",
+    "Take the umbrella, it is raining.",
+    "Thank you, I will be back by ten.",
+]
+
+
+def make_track(texts, start=0.0):
+    # Timings are deliberately meaningless so only the text can drive the alignment.
+    return [SubtitleEvent(i, start, start + 1.0, t) for i, t in enumerate(texts, start=1)]
+
+
+def test_similarity_of_identical_and_unrelated_texts():
+    features = compute_text_features(["hello there", "Hello, there!", "completely different", ""])
+    rows, cols = np.array([0, 0, 0, 3]), np.array([1, 2, 3, 3])
+    sims = pair_similarity(features, features, rows, cols)
+    assert sims[0] == 1.0
+    assert sims[1] < 0.3
+    assert sims[2] == 0.0 and sims[3] == 0.0
+
+
+def test_text_mode_handles_noise_missing_and_split_lines():
+    ai = make_track([
+        "where are you going tonight",
+        "to the harbour",
+        "to meet my brother",
+        "take the umbrella its raining",
+        "thank you ill be back by ten",
+    ], start=500.0)
+    alignment = auto_align(ai, make_track(HUMAN), mode="text")
+    assert alignment == [(0, 0), (1, 1), (2, 1), (3, 3), (4, 4)]
+
+
+def test_text_features_are_cached_per_track():
+    track = SubtitleTrack.from_events(make_track(HUMAN))
+    assert text_features(track) is text_features(track)
+    assert auto_align(track, track, mode="text") == [(i, i) for i in range(len(HUMAN))]
+
+
+def test_anchored_text_segments_slice_whole_track_features(monkeypatch):
+    import aligner.text_alignment as text_alignment
+    from aligner.alignment_engine import PiecewiseAligner
+    ai = SubtitleTrack.from_events(make_track(HUMAN * 4))
+    human = SubtitleTrack.from_events(make_track(HUMAN * 4))
+    computed = []
+    real = text_alignment.compute_text_features
+    monkeypatch.setattr(text_alignment, "compute_text_features", lambda texts: computed.append(len(texts)) or real(texts))
+    aligner = PiecewiseAligner(ai, human, mode="text")
+    anchors = [(5, 5), (10, 10), (15, 15)]
+    assert aligner.align(anchors) == [(i, i) for i in range(len(ai))]
+    # One computation per whole track, none per segment
+    assert computed == [len(ai), len(human)]
+    aligner.align(anchors[:2])
+    assert computed == [len(ai), len(human)]
@@ -0,0 +1,135 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from parser.subtitle_parser import SubtitleEvent, save_subtitles
+from parser.subtitle_track import load_track
+from parser.track_cache import TrackCache, default_cache_dir, load_track_cached
+
+
+def write(path, n, text="line"):
+    save_subtitles([SubtitleEvent(i + 1, i * 2.0, i * 2 + 1.5, f"{text} {i}\nsecond ü") for i in range(n)], str(path))
+
+
+def same(a, b):
+    return a.texts() == b.texts() and np.array_equal(a.start_ms, b.start_ms) and np.array_equal(a.index, b.index)
+
+
+def test_hit_miss_and_content_addressing(tmp_path, monkeypatch):
+    cache = TrackCache(str(tmp_path / "cache"))
+    src = tmp_path / "a.srt"
+    write(src, 50)
+    first = cache.load(str(src))
+    assert cache.stats()["entries"] == 1 and same(first, load_track(str(src)))
+
+    # Hits must not parse; the same content under another name shares the entry
+    monkeypatch.setattr("parser.track_cache.load_track", lambda *a: 1 / 0)
+    assert same(cache.load(str(src)), first)
+    copy = tmp_path / "copy.srt"
+    copy.write_bytes(src.read_bytes())
+    assert same(cache.load(str(copy)), first) and cache.stats()["entries"] == 1
+    monkeypatch.undo()
+
+    # A changed file is a new entry (different size or mtime forces a re-hash)
+    write(src, 51)
+    assert len(cache.load(str(src))) == 51 and cache.stats()["entries"] == 2
+
+
+def test_corrupt_entry_is_reparsed(tmp_path):
+    cache = TrackCache(str(tmp_path / "cache"))
+    src = tmp_path / "a.srt"
+    write(src, 10)
+    key = cache.key(str(src))
+    cache.load(str(src))
+    Path(cache._entry_path(key)).write_bytes(b"garbage")
+    assert len(cache.load(str(src))) == 10
+    assert cache.get(key) is not None
+
+
+def test_lru_eviction(tmp_path):
+    cache = TrackCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f"{i}.srt")
+        write(paths[-1], 200, text=str(i))
+        cache.load(str(paths[-1]))
+    size = cache.stats()["bytes"] // 4
+    cache.max_bytes = 2 * size + size // 2
+    assert cache.evict() == 2
+    keys = [cache.key(str(p)) for p in paths]
+    assert [cache.get(k) is not None for k in keys] == [False, False, True, True]
+    assert not os.path.exists(cache._entry_path(keys[0]))
+
+
+def _load_in_process(args):
+    cache_dir, path = args
+    return len(load_track_cached(path, cache_dir=cache_dir))
+
+
+def test_shared_between_processes(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"{i}.srt"))
+        write(paths[-1], 100 + i)
+    jobs = [(str(tmp_path / "cache"), paths[i % 3]) for i in range(24)]
+    with ProcessPoolExecutor(4) as pool:
+        assert list(pool.map(_load_in_process, jobs)) == [100 + i % 3 for i in range(24)]
+    cache = TrackCache(str(tmp_path / "cache"))
+    assert cache.stats()["entries"] == 3
+    assert not [p for p in (tmp_path / "cache").rglob("*.tmp")]
+
+
+def test_cache_dir_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUBTITLE_ALIGNER_CACHE_DIR", "")
+    assert default_cache_dir() is None
+    monkeypatch.setenv("SUBTITLE_ALIGNER_CACHE_DIR", str(tmp_path))
+    assert default_cache_dir() == str(tmp_path)
+    src = tmp_path / "a.srt"
+    write(src, 3)
+    blocked = tmp_path / "file"
+    blocked.write_text("not a directory")
+    assert len(load_track_cached(str(src), cache_dir=str(blocked))) == 3
+    assert len(load_track_cached(str(src), cache_dir=None)) == 3
+
+
+def test_cache_write_failures_fall_back_to_parsing(tmp_path, monkeypatch, caplog):
+    src = tmp_path / "a.srt"
+    write(src, 5)
+    cache_dir = tmp_path / "cache"
+    cache = TrackCache(str(cache_dir))
+    monkeypatch.setattr("parser.track_cache.os.replace", lambda *a: (_ for _ in ()).throw(OSError(28, "No space left")))
+    assert same(cache.load(str(src)), load_track(str(src)))
+    assert "No space left" in caplog.text and cache.stats()["entries"] == 0
+    assert not list(cache_dir.rglob("*.tmp"))
+    monkeypatch.undo()
+
+    # The directory disappearing under an open cache is not an error either
+    assert len(load_track_cached(str(src), cache_dir=str(cache_dir))) == 5
+    for path in sorted(cache_dir.rglob("*"), reverse=True):
+        path.rmdir() if path.is_dir() else path.unlink()
+    cache_dir.rmdir()
+    assert len(load_track_cached(str(src), cache_dir=str(cache_dir))) == 5
+    with pytest.raises(FileNotFoundError):
+        load_track_cached(str(tmp_path / "missing.srt"), cache_dir=str(cache_dir))
+
+
+def test_file_hashes_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr("parser.track_cache._MAX_FILES", 4)
+    cache = TrackCache(str(tmp_path / "cache"))
+    paths = []
+    for i in range(6):
+        paths.append(tmp_path / f"{i}.srt")
+        write(paths[-1], 3)
+        cache.key(str(paths[-1]))
+    paths[4].unlink()
+    cache.evict()
+    with closing(cache._connect()) as db:
+        remembered = sorted(Path(p).name for p, in db.execute("SELECT path FROM files"))
+    assert remembered == ["3.srt", "5.srt"]